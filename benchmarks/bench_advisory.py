@@ -0,0 +1,221 @@
+"""Benchmark for the per-bar overhead of the advisory
+
+Runs cerebro with synthetic data feeds and indicators and measures the time
+and allocations of data generation, prompt compilation and the advisory
+fan-out. A local model without latency is used, so only the overhead of the
+package is measured. Results are written as JSON.
+
+```
+python benchmarks/bench_advisory.py --feeds 1 10 --indicators 10 200 --lookbacks 5 500
+```
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import backtrader as bt
+
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import (
+    BacktraderCandlePatternAdvisor,
+    BacktraderFeedbackAdvisor,
+    BacktraderPersonaAdvisor,
+    BacktraderStrategyAdvisor,
+    BacktraderTechnicalAnalysisAdvisor,
+    BacktraderTrendAdvisor,
+)
+from bt_llm_advisory.helper.bt_data_generation import (
+    show_lineroot_obj,
+    generate_strategy_data,
+    generate_broker_data,
+    generate_positions_data,
+    generate_data_feed_data,
+    generate_indicator_data,
+)
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+from synthetic import add_indicators, create_cerebro
+
+NUM_PERSONAS = 8
+
+
+def create_advisory() -> BacktraderLLMAdvisory:
+    """Returns an advisory with all advisors and a local model"""
+    return BacktraderLLMAdvisory(
+        advisors=[
+            BacktraderTrendAdvisor(add_all_data_feeds=True),
+            BacktraderCandlePatternAdvisor(add_all_data_feeds=True),
+            BacktraderStrategyAdvisor(),
+            BacktraderTechnicalAnalysisAdvisor(),
+            BacktraderFeedbackAdvisor(),
+        ]
+        + [
+            BacktraderPersonaAdvisor(f"Persona {i}", "benchmark persona")
+            for i in range(NUM_PERSONAS)
+        ],
+        local_model=BacktraderLocalModel(),
+    )
+
+
+class BenchmarkStrategy(bt.Strategy):
+    """Strategy measuring the advisory overhead on the last bars"""
+
+    params = (
+        ("advisory", None),
+        ("num_indicators", 10),
+        ("lookback", 25),
+        ("measure_bars", 50),
+        ("allocations", False),
+    )
+
+    def __init__(self):
+        self.advisory = self.p.advisory
+        self.advisory.init_strategy(
+            self,
+            data_lookback_period=self.p.lookback,
+            indicator_lookback_period=self.p.lookback,
+        )
+        add_indicators(self, self.p.num_indicators)
+        self.timings: dict[str, list[float]] = {}
+        self.allocations: dict[str, list[int]] = {}
+
+    def next(self):
+        if len(self) <= self.data.p.bars - self.p.measure_bars:
+            return
+        lookback = self.p.lookback
+        indicators = [i for i in self.getindicators() if show_lineroot_obj(i)]
+        sections: dict[str, Callable[[], Any]] = {
+            "generate_strategy_data": lambda: generate_strategy_data(self),
+            "generate_broker_data": lambda: generate_broker_data(self),
+            "generate_positions_data": lambda: generate_positions_data(self),
+            "generate_data_feed_data": lambda: [
+                generate_data_feed_data(data_feed, lookback) for data_feed in self.datas
+            ],
+            "generate_indicator_data": lambda: [
+                generate_indicator_data(indicator, lookback) for indicator in indicators
+            ],
+            "default_strategy_data": lambda: BacktraderStrategySnapshot(
+                self, lookback, lookback
+            ).get_default_strategy_data(),
+            "default_strategy_data_merged": lambda: BacktraderStrategySnapshot(
+                self, lookback, lookback
+            ).get_default_strategy_data(merge_indicator_tables=True),
+            "compile_data_artefacts": lambda: compile_data_artefacts(default_data),
+            "advisory": lambda: self.advisory.get_advisory(),
+        }
+        default_data = BacktraderStrategySnapshot(
+            self, lookback, lookback
+        ).get_default_strategy_data()
+        for name, section in sections.items():
+            start = time.perf_counter()
+            section()
+            self.timings.setdefault(name, []).append(time.perf_counter() - start)
+            if self.p.allocations:
+                tracemalloc.start()
+                section()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.allocations.setdefault(name, []).append(peak)
+
+
+def summarize(timings: list[float], allocations: list[int]) -> dict[str, float]:
+    """Returns statistics for the measurements of a section"""
+    timings_ms = sorted(timing * 1000 for timing in timings)
+    summary = {
+        "mean_ms": statistics.fmean(timings_ms),
+        "p50_ms": statistics.median(timings_ms),
+        "p95_ms": timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.95))],
+        "max_ms": timings_ms[-1],
+    }
+    if allocations:
+        summary["alloc_peak_bytes"] = statistics.fmean(allocations)
+    return summary
+
+
+def run_scenario(
+    num_data_feeds: int,
+    num_indicators: int,
+    lookback: int,
+    bars: int,
+    measure_bars: int,
+    allocations: bool,
+) -> dict[str, Any]:
+    """Runs a single benchmark scenario"""
+    bars = max(bars, lookback + measure_bars + 100)
+    cerebro = create_cerebro(
+        BenchmarkStrategy,
+        num_data_feeds=num_data_feeds,
+        bars=bars,
+        advisory=create_advisory(),
+        num_indicators=num_indicators,
+        lookback=lookback,
+        measure_bars=measure_bars,
+        allocations=allocations,
+    )
+    start = time.perf_counter()
+    strategy = cerebro.run()[0]
+    duration = time.perf_counter() - start
+    return {
+        "data_feeds": num_data_feeds,
+        "indicators": num_indicators,
+        "lookback": lookback,
+        "bars": bars,
+        "measured_bars": measure_bars,
+        "run_seconds": duration,
+        "sections": {
+            name: summarize(timings, strategy.allocations.get(name, []))
+            for name, timings in strategy.timings.items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feeds", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--indicators", type=int, nargs="+", default=[10, 200])
+    parser.add_argument("--lookbacks", type=int, nargs="+", default=[5, 100, 500])
+    parser.add_argument("--bars", type=int, default=1000)
+    parser.add_argument("--measure-bars", type=int, default=20)
+    parser.add_argument("--allocations", action="store_true")
+    parser.add_argument("--output", default="-", help="output file, - for stdout")
+    args = parser.parse_args()
+
+    scenarios = []
+    for num_data_feeds in args.feeds:
+        for num_indicators in args.indicators:
+            for lookback in args.lookbacks:
+                scenarios.append(
+                    run_scenario(
+                        num_data_feeds=num_data_feeds,
+                        num_indicators=num_indicators,
+                        lookback=lookback,
+                        bars=args.bars,
+                        measure_bars=args.measure_bars,
+                        allocations=args.allocations,
+                    )
+                )
+    results = {
+        "python": platform.python_version(),
+        "backtrader": bt.__version__,
+        "personas": NUM_PERSONAS,
+        "scenarios": scenarios,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output == "-":
+        sys.stdout.write(output + "\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
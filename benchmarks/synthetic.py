@@ -0,0 +1,69 @@
+import math
+import random
+from datetime import datetime, timedelta
+
+import backtrader as bt
+
+INDICATOR_TYPES = (
+    (bt.ind.SMA, "period", (5, 10, 20, 50)),
+    (bt.ind.EMA, "period", (5, 10, 20, 50)),
+    (bt.ind.RSI, "period", (7, 14, 21)),
+    (bt.ind.ATR, "period", (7, 14, 21)),
+    (bt.ind.BollingerBands, "period", (10, 20)),
+)
+
+
+class SyntheticData(bt.feed.DataBase):
+    """Random walk data feed with 1 minute bars"""
+
+    params = (
+        ("bars", 1000),
+        ("seed", 0),
+        ("start", datetime(2024, 1, 1)),
+    )
+
+    def start(self):
+        super().start()
+        self._random = random.Random(self.p.seed)
+        self._bar = 0
+        self._datetime = self.p.start
+        self._price = 100.0 + self.p.seed
+
+    def _load(self):
+        if self._bar >= self.p.bars:
+            return False
+        self._bar += 1
+        self._datetime += timedelta(minutes=1)
+        open_price = self._price
+        self._price = max(1.0, self._price + self._random.gauss(0, 1))
+        spread = abs(self._random.gauss(0, 0.5))
+        self.lines.datetime[0] = bt.date2num(self._datetime)
+        self.lines.open[0] = open_price
+        self.lines.high[0] = max(open_price, self._price) + spread
+        self.lines.low[0] = min(open_price, self._price) - spread
+        self.lines.close[0] = self._price
+        self.lines.volume[0] = math.floor(self._random.uniform(100, 1000))
+        self.lines.openinterest[0] = 0
+        return True
+
+
+def add_indicators(strategy: bt.Strategy, num_indicators: int) -> list[bt.Indicator]:
+    """Adds indicators to a strategy, distributed over all data feeds"""
+    indicators = []
+    for i in range(num_indicators):
+        indicator_type, param, values = INDICATOR_TYPES[i % len(INDICATOR_TYPES)]
+        data_feed = strategy.datas[i % len(strategy.datas)]
+        value = values[(i // len(INDICATOR_TYPES)) % len(values)]
+        indicators.append(indicator_type(data_feed, **{param: value}))
+    return indicators
+
+
+def create_cerebro(
+    strategy: type[bt.Strategy], num_data_feeds: int, bars: int, **kwargs
+) -> bt.Cerebro:
+    """Returns cerebro with synthetic data feeds and the strategy added"""
+    cerebro = bt.Cerebro(stdstats=False)
+    for i in range(num_data_feeds):
+        cerebro.adddata(SyntheticData(bars=bars, seed=i), name=f"SYN{i}")
+    cerebro.addstrategy(strategy, **kwargs)
+    return cerebro
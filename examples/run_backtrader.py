@@ -18,9 +18,18 @@ from bt_llm_advisory.advisors import (
     BacktraderTechnicalAnalysisAdvisor,
     BacktraderTrendAdvisor,
 )
+from bt_llm_advisory.helper.bt_scheduler import OnDataFeedBar
 
 load_dotenv()
 
+NON_BLOCKING_ADVISORY = os.getenv("LLM_NON_BLOCKING_ADVISORY", "0") == "1"
+
+# candle patterns are only identified on new bars of the 5 minute data feed
+candle_pattern_advisor = BacktraderCandlePatternAdvisor(
+    lookback_period=10, add_all_data_feeds=True
+)
+candle_pattern_advisor.schedule = [OnDataFeedBar(1)]
+
 bot_advisory = BacktraderLLMAdvisory(
     model_provider_name=os.getenv("LLM_MODEL_PROVIDER"),
     model_name=os.getenv("LLM_MODEL"),
@@ -32,7 +41,7 @@ bot_advisory = BacktraderLLMAdvisory(
             lookback_period=10,
             add_all_data_feeds=True,
         ),
-        BacktraderCandlePatternAdvisor(lookback_period=10, add_all_data_feeds=True),
+        candle_pattern_advisor,
         BacktraderStrategyAdvisor(),
         BacktraderTechnicalAnalysisAdvisor(),
         BacktraderFeedbackAdvisor(),
@@ -118,10 +127,12 @@ class TestStrategy(bt.Strategy):
 
     def __init__(self):
         bot_advisory.init_strategy(self)
-        self.ma = bt.indicators.SMA(period=10)
-        self.ma2 = bt.indicators.SMA(period=40)
+        # indicators already created by advisors are reused
+        self.ma = bot_advisory.get_indicator(bt.indicators.SMA, self.data, period=10)
+        self.ma2 = bot_advisory.get_indicator(bt.indicators.SMA, self.data, period=40)
 
     def stop(self):
+        bot_advisory.stop()
         print("STOP")
 
     def prenext(self):
@@ -133,8 +144,20 @@ class TestStrategy(bt.Strategy):
             return
         print("NEXT", self.data0.datetime.datetime(0), len(self.data0))
 
+        if NON_BLOCKING_ADVISORY:
+            # advisories are running in the background, results are
+            # delivered on a later bar
+            for handle in bot_advisory.get_completed_advisories():
+                print("ADVISORY FOR BAR", handle.bar, handle.datetime)
+                self.print_advisory(handle.result())
+            if not bot_advisory.has_pending_advisories():
+                bot_advisory.submit_advisory()
+            return
+
         advisory_response = bot_advisory.get_advisory()
+        self.print_advisory(advisory_response)
 
+    def print_advisory(self, advisory_response):
         print("\n", "ADDITIONAL DATA", "-" * 80, "\n")
         print(advisory_response.state.data)
 
@@ -171,7 +194,11 @@ class TestStrategy(bt.Strategy):
             "\n\n",
         )
 
+    def notify_order(self, order):
+        bot_advisory.notify_order(order)
+
     def notify_trade(self, trade):
+        bot_advisory.notify_trade(trade)
         print(trade)
 
 
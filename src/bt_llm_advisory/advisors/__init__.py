@@ -1,6 +1,7 @@
 from .bt_candle_pattern_advisor import BacktraderCandlePatternAdvisor
 from .bt_feedback_advisor import BacktraderFeedbackAdvisor
 from .bt_persona_advisor import BacktraderPersonaAdvisor
+from .bt_persona_panel_advisor import BacktraderPersonaPanelAdvisor
 from .bt_strategy_advisor import BacktraderStrategyAdvisor
 from .bt_technical_analysis_advisor import BacktraderTechnicalAnalysisAdvisor
 from .bt_trend_advisor import BacktraderTrendAdvisor
@@ -9,6 +10,7 @@ __all__ = [
     "BacktraderCandlePatternAdvisor",
     "BacktraderFeedbackAdvisor",
     "BacktraderPersonaAdvisor",
+    "BacktraderPersonaPanelAdvisor",
     "BacktraderStrategyAdvisor",
     "BacktraderTechnicalAnalysisAdvisor",
     "BacktraderTrendAdvisor",
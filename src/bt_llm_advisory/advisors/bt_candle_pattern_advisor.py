@@ -1,17 +1,13 @@
 import backtrader as bt
 
-from llm_advisory.helper.llm_prompt import compile_data_artefacts
-from llm_advisory.pydantic_models import (
-    LLMAdvisorDataArtefact,
-    LLMAdvisorDataArtefactOutputMode,
-    LLMAdvisorUpdateStateData,
-)
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact, LLMAdvisorSignal
 
 from bt_llm_advisory import BacktraderLLMAdvisor
-from bt_llm_advisory.helper.bt_data_generation import (
-    generate_data_feed_data,
-    get_strategy_from_state,
+from bt_llm_advisory.helper.bt_candle_patterns import (
+    CANDLE_PATTERNS,
+    get_latest_candle_patterns,
 )
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
 
 
 ADVISOR_INSTRUCTIONS = """
@@ -55,46 +51,90 @@ IMPORTANT CONSTRAINS
 class BacktraderCandlePatternAdvisor(BacktraderLLMAdvisor):
 
     advisor_instructions = ADVISOR_INSTRUCTIONS
+    use_state_data = False
 
     def __init__(
         self,
         lookback_period: int = 5,  # lookback period for ohlc data
         add_all_data_feeds: bool = False,  # should all data feeds be included
+        detect_patterns: bool = False,  # detect patterns by rules before the model
+        confirm_patterns: bool = False,  # let the model confirm detected patterns
     ):
         super().__init__()
         self.lookback_period = lookback_period
         self.add_all_data_feeds = add_all_data_feeds
-
-    def update_state(
-        self, state: LLMAdvisorUpdateStateData
-    ) -> LLMAdvisorUpdateStateData:
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        strategy = get_strategy_from_state(state)
-        data_feeds = (
-            [strategy.datas[0]] if not self.add_all_data_feeds else strategy.datas
-        )
-        data_feed_data = self._get_ohlc_data(data_feeds, self.lookback_period)
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            data_feed_data
+        self.detect_patterns = detect_patterns
+        self.confirm_patterns = confirm_patterns
+
+    def get_local_signal(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> LLMAdvisorSignal | None:
+        """Returns a signal from rule based pattern detection
+
+        If no pattern is detected on the latest candle, a none signal is
+        returned. If all detected patterns point in the same direction, the
+        signal is returned without invoking the model, unless patterns should
+        be confirmed by the model."""
+        if not self.detect_patterns:
+            return None
+        patterns = self._get_candle_patterns(snapshot)
+        detected = [name for names in patterns.values() for name in names]
+        if not detected:
+            return self.signal_model_type(
+                signal="none",
+                confidence=1.0,
+                reasoning="No Pattern: no pattern detected on the latest candle",
+            )
+        signals = {CANDLE_PATTERNS[name][0] for name in detected}
+        if self.confirm_patterns or len(signals) > 1:
+            return None
+        pattern_names = ", ".join(dict.fromkeys(detected))
+        data_names = ", ".join(name for name, names in patterns.items() if names)
+        return self.signal_model_type(
+            signal=signals.pop(),
+            confidence=max(CANDLE_PATTERNS[name][1] for name in detected),
+            reasoning=f"{pattern_names}: detected on the latest candle of {data_names}",
         )
-        return self._update_state(state)
 
-    def _get_ohlc_data(
-        self, data_feeds: list[bt.DataBase], lookback_period: int
+    def get_advisor_data(
+        self, snapshot: BacktraderStrategySnapshot
     ) -> list[LLMAdvisorDataArtefact]:
-        ohlc_data = []
-        for data_feed in data_feeds:
-            feed_data = generate_data_feed_data(
-                data_feed=data_feed,
-                lookback_period=lookback_period,
+        """Returns ohlc data of the data feeds with detected patterns"""
+        response = snapshot.get_data_feed_artefacts(
+            data_feeds=self._get_data_feeds(snapshot.strategy),
+            lookback_period=self.lookback_period,
+            only_close=False,
+            add_volume=False,
+        )
+        if self.detect_patterns:
+            response.append(
+                LLMAdvisorDataArtefact(
+                    description=(
+                        "Candle patterns detected by rules on the latest candle,"
+                        " confirm or reject them"
+                    ),
+                    artefact=self._get_candle_patterns(snapshot),
+                )
+            )
+        return response
+
+    def _get_data_feeds(self, strategy: bt.Strategy) -> list[bt.DataBase]:
+        """Returns the data feeds used by the advisor"""
+        return [strategy.datas[0]] if not self.add_all_data_feeds else strategy.datas
+
+    def _get_candle_patterns(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> dict[str, list[str]]:
+        """Returns the patterns of the latest candle per data feed"""
+        patterns = {}
+        for data_feed in self._get_data_feeds(snapshot.strategy):
+            data_feed_data = snapshot.get_data_feed_data(
+                data_feed,
+                lookback_period=self.lookback_period,
                 only_close=False,
                 add_volume=False,
             )
-            ohlc_data.append(
-                LLMAdvisorDataArtefact(
-                    description=f"DataFeed {feed_data.name}",
-                    artefact=feed_data.data,
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE
-                )
+            patterns[data_feed_data.name] = get_latest_candle_patterns(
+                data_feed_data.columns
             )
-        return ohlc_data
+        return patterns
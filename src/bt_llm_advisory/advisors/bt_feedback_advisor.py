@@ -1,19 +1,11 @@
 from llm_advisory.pydantic_models import (
-    LLMAdvisorState,
     LLMAdvisorSignal,
     LLMAdvisorDataArtefact,
-    LLMAdvisorDataArtefactOutputMode,
-    LLMAdvisorUpdateStateData,
 )
-from llm_advisory.helper.llm_prompt import compile_data_artefacts
 
 from bt_llm_advisory import BacktraderLLMAdvisor
-from bt_llm_advisory.helper.bt_data_generation import (
-    get_strategy_from_state,
-    generate_strategy_data,
-    generate_broker_data,
-    generate_positions_data,
-)
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
 
 ADVISOR_INSTRUCTIONS = """
 You are the Backtrader Feedback Advisor, an AI agent dedicated to evaluating the full state
@@ -63,47 +55,10 @@ class BacktraderFeedbackAdvisor(BacktraderLLMAdvisor):
 
     advisor_instructions = ADVISOR_INSTRUCTIONS
     signal_model_type = LLMAdvisorSignal
+    use_state_data = False
 
-    def update_state(
-        self, state: LLMAdvisorUpdateStateData
-    ) -> LLMAdvisorUpdateStateData:
-        """Default update_state method which uses all available strategy data
-
-        To modify the data that the advisor is using, this method needs to be
-        overwritten."""
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_feedback_data(state)
-        )
-        return self._update_state(state)
-
-    def _get_feedback_data(
-        self, state: LLMAdvisorState
+    def get_advisor_data(
+        self, snapshot: BacktraderStrategySnapshot
     ) -> list[LLMAdvisorDataArtefact]:
-        """Returns default strategy data"""
-        strategy = get_strategy_from_state(state)
-        strategy_data = generate_strategy_data(strategy)
-        broker_data = generate_broker_data(strategy)
-        positions_data = generate_positions_data(strategy)
-        response = []
-        response.append(
-            LLMAdvisorDataArtefact(
-                description="Strategy", artefact=strategy_data.description
-            )
-        )
-        response.append(
-            LLMAdvisorDataArtefact(
-                description="Broker",
-                artefact=broker_data.description,
-                output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-            )
-        )
-        for data_name, position in positions_data.positions.items():
-            response.append(
-                LLMAdvisorDataArtefact(
-                    description=f"Position {data_name}",
-                    artefact=position.model_dump(),
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-                )
-            )
-        return response
+        """Returns strategy, broker and positions data"""
+        return snapshot.get_strategy_artefacts() + snapshot.get_broker_artefacts()
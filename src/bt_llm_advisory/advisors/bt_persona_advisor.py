@@ -1,6 +1,4 @@
 from llm_advisory.advisors import PersonaAdvisor
-from llm_advisory.pydantic_models import LLMAdvisorUpdateStateData
-from llm_advisory.helper.llm_prompt import compile_data_artefacts
 
 from bt_llm_advisory import BacktraderLLMAdvisor
 
@@ -14,19 +12,6 @@ trading signal.
 
 ---
 
-PERSONALITY CONTEXT
-
-You are acting as a specific expert advisor with unique experience, strategic
-insight, or risk appetite. This persona is provided as:
-
-- Name: {name}
-- Personality: {personality}
-
-You must generate your signal from the perspective of this advisor, incorporating
-the personality's approach to risk, markets, and strategic decision-making.
-
----
-
 DATA FORMAT
 All input is provided as markdown tables in chronological ascending order (oldest at top, latest at bottom). The input consists of:
 Strategy Table
@@ -62,18 +47,22 @@ IMPORTANT CONSTRAINS
     - Your advice should reflect the strategy's logic and the advisor's personality (e.g., aggressive, risk-averse, trend-following, contrarian, etc.).
     - Your signal is used to guide the next trade decision immediately after the current data.
 
+---
+
+PERSONALITY CONTEXT
+
+You are acting as a specific expert advisor with unique experience, strategic
+insight, or risk appetite. This persona is provided as:
+
+- Name: {name}
+- Personality: {personality}
+
+You must generate your signal from the perspective of this advisor, incorporating
+the personality's approach to risk, markets, and strategic decision-making.
+
 ---"""
 
 
 class BacktraderPersonaAdvisor(BacktraderLLMAdvisor, PersonaAdvisor):
 
     advisor_instructions = ADVISOR_INSTRUCTIONS
-
-    def update_state(
-        self, state: LLMAdvisorUpdateStateData
-    ) -> LLMAdvisorUpdateStateData:
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_default_strategy_data(state) + state.data
-        )
-        return self._update_state(state)
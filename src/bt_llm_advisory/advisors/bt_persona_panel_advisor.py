@@ -0,0 +1,153 @@
+from llm_advisory.pydantic_models import LLMAdvisorSignal, LLMAdvisorUpdateStateData
+
+from bt_llm_advisory import BacktraderLLMAdvisor
+from bt_llm_advisory.pydantic_models import (
+    BacktraderLLMAdvisorSignal,
+    BacktraderPersonaPanelSignal,
+)
+from bt_llm_advisory.helper.bt_batch import is_pending_signal
+
+
+ADVISOR_INSTRUCTIONS = """
+You are the Backtrader Persona Panel, an AI agent responsible for evaluating
+a Backtrader strategy’s internal state and issuing one discrete trade signal
+for every expert advisor of a panel. You operate as part of a multi-agent
+advisory system, where your role is to analyze broker, position, data feed,
+and indicator data — and synthesize a trading signal from the perspective of
+every advisor of the panel.
+
+---
+
+DATA FORMAT
+All input is provided as markdown tables in chronological ascending order (oldest at top, latest at bottom). The input consists of:
+Strategy Table
+    - Common informations about the strategy
+Broker Table
+    - cash: Current cash available
+    - value: Total portfolio value (cash + unrealized positions)
+Position Table
+    - position_size: Current position size (zero if no position)
+    - position_price: Entry price of current position
+DataFeed Table
+    - Contains OHLCV or price/volume data from the strategy's feeds
+Indicator Table
+    - Technical indicator values relevant to the strategy
+
+---
+
+TASK
+1. Analyze all available data — nothing can be skipped.
+2. For every advisor of the panel, choose exactly one signal from the perspective of this advisor:
+    - "bullish": Expecting upward price movement.
+    - "bearish": Expecting downward price movement.
+    - "neutral": Sideways movement or low conviction.
+    - "none": No actionable signal detected at this time.
+3. Assign a confidence score between 0.0 and 1.0 to every signal reflecting the certainty of the advisor.
+4. The reasoning of every advisor must explain how the data and the advisor's personality justify the signal and the chosen confidence level.
+5. Return the signal of every advisor in personas with the name of the advisor as persona, and the consensus of the panel as overall signal, confidence and reasoning.
+
+---
+
+IMPORTANT CONSTRAINS
+    - Do not emit more than one signal per advisor and do not skip any advisor.
+    - Do not invent data or signals — your response must be directly supported by the latest available data.
+    - Every advice should reflect the strategy's logic and the advisor's personality (e.g., aggressive, risk-averse, trend-following, contrarian, etc.).
+    - Advisors decide independently, do not let one advisor influence another.
+    - The signals are used to guide the next trade decision immediately after the current data.
+
+---
+
+PANEL
+
+Every advisor of the panel is an expert with unique experience, strategic
+insight, or risk appetite. The advisors are provided as:
+
+{personas}
+
+---"""
+
+
+class BacktraderPersonaPanelAdvisor(BacktraderLLMAdvisor):
+    """Persona advisors answered by a single model request
+
+    Instead of sending the same data once per persona, the signals of all
+    personas are requested in one structured response. The signals are
+    reported per persona name in the state, so every persona counts as an
+    advisor of the advisory."""
+
+    signal_model_type = BacktraderPersonaPanelSignal
+
+    def __init__(self, personas: list[tuple[str, str]]) -> None:
+        """Initializes the panel with a list of person names and personalities"""
+        super().__init__()
+        self.personas = dict(personas)
+        self.advisor_instructions = ADVISOR_INSTRUCTIONS.format(
+            personas="\n".join(
+                f"- Name: {name}\n  Personality: {personality}"
+                for name, personality in self.personas.items()
+            )
+        )
+
+    def get_persona_names(self) -> list[str]:
+        """Returns the names of all personas of the panel"""
+        return list(self.personas.keys())
+
+    def update_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Returns the signals of all personas"""
+        return self._get_persona_update_state(super().update_state(state))
+
+    async def aupdate_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Asyncio version of update_state"""
+        return self._get_persona_update_state(await super().aupdate_state(state))
+
+    def get_stale_signal(
+        self, signal: LLMAdvisorSignal, decay: float
+    ) -> LLMAdvisorSignal:
+        """Returns a panel signal with the confidence of all personas decayed"""
+        get_stale_signal = super().get_stale_signal
+        return get_stale_signal(signal, decay).model_copy(
+            update={
+                "personas": [
+                    get_stale_signal(persona_signal, decay)
+                    for persona_signal in getattr(signal, "personas", [])
+                ]
+            }
+        )
+
+    def get_state_signals(
+        self, signal: LLMAdvisorSignal | None
+    ) -> dict[str, LLMAdvisorSignal]:
+        """Returns the signals of all personas contained in a panel signal
+
+        Personas missing in the response are not reported, a pending batch
+        signal is reported as pending for all personas."""
+        if signal is None:
+            return {}
+        if is_pending_signal(signal):
+            return {
+                name: BacktraderLLMAdvisorSignal.model_validate(
+                    signal.model_dump(include={"signal", "confidence", "reasoning"})
+                )
+                for name in self.personas
+            }
+        return {
+            persona_signal.persona: BacktraderLLMAdvisorSignal.model_validate(
+                persona_signal.model_dump(exclude={"persona"})
+            )
+            for persona_signal in getattr(signal, "personas", [])
+            if persona_signal.persona in self.personas
+        }
+
+    def _get_persona_update_state(
+        self, update_state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Replaces the panel signal of a state update by the persona signals"""
+        return LLMAdvisorUpdateStateData(
+            signals=self.get_state_signals(
+                update_state.signals.get(self.advisor_name)
+            )
+        )
@@ -1,20 +1,7 @@
-from llm_advisory.pydantic_models import (
-    LLMAdvisorState,
-    LLMAdvisorDataArtefact,
-    LLMAdvisorDataArtefactOutputMode,
-    LLMAdvisorUpdateStateData,
-)
-from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
 
 from bt_llm_advisory import BacktraderLLMAdvisor
-from bt_llm_advisory.helper.bt_data_generation import (
-    get_data_feed_name,
-    get_strategy_from_state,
-    generate_data_feed_data,
-    get_indicator_name,
-    show_lineroot_obj,
-    generate_indicator_data,
-)
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
 
 
 ADVISOR_INSTRUCTIONS = """"
@@ -60,54 +47,12 @@ class BacktraderTechnicalAnalysisAdvisor(BacktraderLLMAdvisor):
 
     advisor_instructions = ADVISOR_INSTRUCTIONS
 
-    def update_state(
-        self, state: LLMAdvisorUpdateStateData
-    ) -> LLMAdvisorUpdateStateData:
-        """Default update_state method which uses all available strategy data
-
-        To modify the data that the advisor is using, this method needs to be
-        overwritten."""
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_technical_analysis_data(state) + state.data
-        )
-        return self._update_state(state)
-
-    def _get_technical_analysis_data(
-        self, state: LLMAdvisorState
+    def get_advisor_data(
+        self, snapshot: BacktraderStrategySnapshot
     ) -> list[LLMAdvisorDataArtefact]:
-        """Returns default strategy data"""
-        strategy = get_strategy_from_state(state)
-        data_feeds_data = {
-            get_data_feed_name(data_feed): generate_data_feed_data(
-                data_feed=data_feed,
-                lookback_period=state.metadata["data_lookback_period"],
-            )
-            for data_feed in strategy.datas
-        }
-        indicators_data = {
-            get_indicator_name(indicator): generate_indicator_data(
-                indicator=indicator,
-                lookback_period=state.metadata["indicator_lookback_period"],
-            )
-            for indicator in strategy.getindicators()
-            if show_lineroot_obj(indicator)
-        }
-        response = []
-        for data_feed_data in data_feeds_data.values():
-            response.append(
-                LLMAdvisorDataArtefact(
-                    description=f"DataFeed {data_feed_data.name}",
-                    artefact=data_feed_data.data,
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-                )
-            )
-        for indicator_data in indicators_data.values():
-            response.append(
-                LLMAdvisorDataArtefact(
-                    description=f"Indicator {indicator_data.name}",
-                    artefact=indicator_data.data,
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-                )
-            )
-        return response
+        """Returns data feed and indicator data"""
+        if self.merge_indicator_tables:
+            return snapshot.get_merged_data_feed_artefacts()
+        return (
+            snapshot.get_data_feed_artefacts() + snapshot.get_indicator_artefacts()
+        )
@@ -1,14 +1,12 @@
+from array import array
+
 import backtrader as bt
 import numpy as np
 
-from llm_advisory.pydantic_models import (
-    LLMAdvisorDataArtefact,
-    LLMAdvisorUpdateStateData,
-)
-from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
 
 from bt_llm_advisory import BacktraderLLMAdvisor
-from bt_llm_advisory.helper.bt_data_generation import get_data_feed_name
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
 
 ADVISOR_INSTRUCTIONS = """
 You are an Backtrader Trend Advisor, an AI advisor agent specialized in detecting
@@ -78,30 +76,86 @@ class BollingerBandsW(bt.ind.BollingerBands):
 class LinearRegressionSlope(bt.Indicator):
     """
     Computes the slope of a linear regression over the last `period` values of `data`.
+
+    The sums over the window are updated incrementally with every bar. In
+    runonce mode the whole series is computed with a single convolution.
     """
 
     lines = ("slope",)
     params = (("period", 10),)  # look‐back window
 
+    # bars after which the running sums are recomputed to avoid float drift
+    RESEED_INTERVAL = 1000
+
     def __init__(self):
         # ensure we have at least `period` data points before calculating
         self.addminperiod(self.params.period)
+        period = self.params.period
+        # sums over x = 0 .. period - 1 do not change
+        self._sum_x = period * (period - 1) / 2
+        sum_xx = (period - 1) * period * (2 * period - 1) / 6
+        self._denominator = period * sum_xx - self._sum_x**2
+        self._sum_y = 0.0
+        self._sum_xy = 0.0
+        self._last_len = 0
+        self._updates = 0
+
+    def nextstart(self):
+        self._reseed()
+        self._set_slope()
 
     def next(self):
+        if len(self) == self._last_len or self._updates >= self.RESEED_INTERVAL:
+            # same bar was updated (replay) or sums need to be refreshed
+            self._reseed()
+        else:
+            period = self.params.period
+            y_new = self.data[0]
+            y_old = self.data[-period]
+            # all values shift one position to the left
+            self._sum_xy += (period - 1) * y_new - (self._sum_y - y_old)
+            self._sum_y += y_new - y_old
+            self._last_len = len(self)
+            self._updates += 1
+            if not np.isfinite(self._sum_xy):
+                self._reseed()
+        self._set_slope()
+
+    def once(self, start, end):
+        period = self.params.period
+        y = np.asarray(self.data.array[:end], dtype=float)
+        # window sums, index i contains the window ending at i + period - 1
+        sum_y = np.convolve(y, np.ones(period), "valid")
+        sum_xy = np.convolve(y, np.arange(period, dtype=float)[::-1], "valid")
+        slope = self._get_slope(sum_y, sum_xy)
+        self.lines.slope.array[start:end] = array(
+            "d", slope[start - period + 1 : end - period + 1].tolist()
+        )
+
+    def _reseed(self):
         # grab the last `period` values as a NumPy array
         y = np.array(self.data.get(size=self.params.period))
-        x = np.arange(self.params.period)
+        self._sum_y = y.sum()
+        self._sum_xy = (np.arange(self.params.period) * y).sum()
+        self._last_len = len(self)
+        self._updates = 0
+
+    def _set_slope(self):
+        self.lines.slope[0] = self._get_slope(self._sum_y, self._sum_xy)
+
+    def _get_slope(self, sum_y, sum_xy):
         # compute slope = Cov(x,y) / Var(x)
-        xm = x.mean()
-        ym = y.mean()
-        slope = ((x - xm) * (y - ym)).sum() / ((x - xm) ** 2).sum()
-        self.lines.slope[0] = slope
+        if self._denominator == 0:
+            return sum_y * float("nan")
+        period = self.params.period
+        return (period * sum_xy - self._sum_x * sum_y) / self._denominator
 
 
 class BacktraderTrendAdvisor(BacktraderLLMAdvisor):
     """Advisor for identifing trends"""
 
     advisor_instructions = ADVISOR_INSTRUCTIONS
+    use_state_data = False
 
     def __init__(
         self,
@@ -118,42 +172,51 @@ class BacktraderTrendAdvisor(BacktraderLLMAdvisor):
         self.indicators: dict[str, dict[str, bt.Indicator]] = {}
 
     def init_strategy(self, strategy):
-        # init and add all required indicators
+        # init and add all required indicators, indicators of previous runs
+        # are dropped
+        self.indicators = {}
         data_feeds = [strategy.datas[0]] if not self.add_all_data_feeds else strategy.datas
         for data_feed in data_feeds:
-            short_ma = bt.ind.SMA(
+            short_ma = self.get_indicator(
+                bt.ind.SMA,
                 data_feed,
                 period=self.short_ma_period,
                 plotskip=True,
                 plotname="bt_trend_short_ma",
             )
-            long_ma = bt.ind.SMA(
+            long_ma = self.get_indicator(
+                bt.ind.SMA,
                 data_feed,
                 period=self.long_ma_period,
                 plotskip=True,
                 plotname="bt_trend_long_ma",
             )
-            adx = bt.ind.AverageDirectionalMovementIndex(
+            adx = self.get_indicator(
+                bt.ind.AverageDirectionalMovementIndex,
                 data_feed,
                 plotskip=True,
                 plotname="bt_trend_adx",
             )
-            atr = bt.ind.ATR(
+            atr = self.get_indicator(
+                bt.ind.ATR,
                 data_feed,
                 plotskip=True,
                 plotname="bt_trend_atr",
             )
-            rsi = bt.ind.RSI(
+            rsi = self.get_indicator(
+                bt.ind.RSI,
                 data_feed,
                 plotskip=True,
                 plotname="bt_trend_rsi",
             )
-            bb = BollingerBandsW(
+            bb = self.get_indicator(
+                BollingerBandsW,
                 data_feed,
                 plotskip=True,
                 plotname="bt_trend_bb",
             )
-            linreg_slope = LinearRegressionSlope(
+            linreg_slope = self.get_indicator(
+                LinearRegressionSlope,
                 data_feed,
                 plotskip=True,
                 period=10,
@@ -170,18 +233,33 @@ class BacktraderTrendAdvisor(BacktraderLLMAdvisor):
             }
             self.indicators[data_feed] = data_indicators
 
-    def update_state(self, state: LLMAdvisorUpdateStateData) -> LLMAdvisorUpdateStateData:
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_trend_indicators_data(self.lookback_period)
-        )
-        return self._update_state(state)
+    def get_advisor_data(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns trend indicators data"""
+        return self._get_trend_indicators_data(snapshot, self.lookback_period)
+
+    def get_fingerprint(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> dict[str, float] | None:
+        """Returns the latest close and trend indicator values per data feed"""
+        fingerprint = {}
+        for data_feed, indicators in self.indicators.items():
+            data_name = snapshot.metadata_index.get_data_feed_metadata(data_feed).name
+            fingerprint[f"{data_name}.close"] = data_feed.close[0]
+            for indicator_name, indicator in indicators.items():
+                fingerprint[f"{data_name}.{indicator_name}"] = indicator[0]
+        return fingerprint
 
     def _get_trend_indicators_data(
-        self, lookback_period: int, accuracy: int = 4
+        self,
+        snapshot: BacktraderStrategySnapshot,
+        lookback_period: int,
+        accuracy: int = 4,
     ) -> LLMAdvisorDataArtefact:
         response = []
         for data_feed, indicators in self.indicators.items():
+            data_name = snapshot.metadata_index.get_data_feed_metadata(data_feed).name
             feed_data = {"price_history": [data_feed[-i] for i in range(lookback_period)]}
             feed_data |= {
                 indicator_name: round(indicator[0], accuracy)
@@ -189,7 +267,7 @@ class BacktraderTrendAdvisor(BacktraderLLMAdvisor):
             }
             response.append(
                 LLMAdvisorDataArtefact(
-                    description=f"DataFeed {get_data_feed_name(data_feed)}",
+                    description=f"DataFeed {data_name}",
                     artefact=feed_data,
                 )
             )
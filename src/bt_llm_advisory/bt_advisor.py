@@ -1,26 +1,43 @@
-from backtrader import Strategy
+import asyncio
+from contextlib import nullcontext
+from time import perf_counter
+
+from backtrader import Indicator, LineRoot, Strategy
 
 from llm_advisory.llm_advisor import LLMAdvisor
 from llm_advisory.pydantic_models import (
     LLMAdvisorState,
+    LLMAdvisorSignal,
     LLMAdvisorDataArtefact,
-    LLMAdvisorDataArtefactOutputMode,
     LLMAdvisorUpdateStateData,
 )
 from llm_advisory.helper.llm_prompt import compile_data_artefacts
 
 from bt_llm_advisory.pydantic_models import BacktraderLLMAdvisorSignal
-from bt_llm_advisory.helper.bt_data_generation import (
-    show_lineroot_obj,
-    get_strategy_from_state,
-    get_data_feed_name,
-    get_indicator_name,
-    generate_strategy_data,
-    generate_broker_data,
-    generate_positions_data,
-    generate_data_feed_data,
-    generate_indicator_data,
-)
+from bt_llm_advisory.helper.bt_change_gate import BacktraderChangeGate
+from bt_llm_advisory.helper.bt_data_generation import get_strategy_from_state
+from bt_llm_advisory.helper.bt_indicator_registry import BacktraderIndicatorRegistry
+from bt_llm_advisory.helper.bt_prefix_cache import BacktraderPrefixLayout
+from bt_llm_advisory.helper.bt_prompt_builder import BacktraderPromptBuilder
+from bt_llm_advisory.helper.bt_prompt_compaction import BacktraderPromptCompactor
+from bt_llm_advisory.helper.bt_scheduler import BacktraderAdvisorTrigger
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+
+def get_snapshot_from_state(state: LLMAdvisorState) -> BacktraderStrategySnapshot:
+    """Returns the snapshot of the current bar from a state
+
+    If the state contains no snapshot, a new one is created from the strategy."""
+    snapshot = state.metadata.get("snapshot")
+    if snapshot is None:
+        snapshot = BacktraderStrategySnapshot(
+            get_strategy_from_state(state),
+            data_lookback_period=state.metadata["data_lookback_period"],
+            indicator_lookback_period=state.metadata["indicator_lookback_period"],
+            rolling_store=state.metadata.get("rolling_store"),
+            metadata_index=state.metadata.get("metadata_index"),
+        )
+    return snapshot
 
 
 class BacktraderLLMAdvisor(LLMAdvisor):
@@ -28,6 +45,29 @@ class BacktraderLLMAdvisor(LLMAdvisor):
 
     # Default signal for backtrader advisors
     signal_model_type = BacktraderLLMAdvisorSignal
+    # Should additional data provided to the advisory be added to the advisor data
+    use_state_data = True
+    # Registry of the advisory to share indicators, set by the advisory
+    indicator_registry: BacktraderIndicatorRegistry | None = None
+    # Triggers deciding on which bars the advisor runs, runs every bar if not set
+    schedule: list[BacktraderAdvisorTrigger] | None = None
+    # Should indicators be joined to the tables of their data feeds
+    merge_indicator_tables = False
+    # Compacts the advisor data to fit into a token budget, disabled if not set
+    prompt_compactor: BacktraderPromptCompactor | None = None
+    # Compiles the advisor data incrementally, compile_data_artefacts if not set
+    prompt_builder: BacktraderPromptBuilder | None = None
+    # Places data which does not change first for provider prompt caching
+    prefix_layout: BacktraderPrefixLayout | None = None
+    # Gate reusing the last signal while the fingerprint does not change
+    change_gate: BacktraderChangeGate | None = None
+    # Last signal of the advisor, reused on bars the advisor does not run
+    last_signal: LLMAdvisorSignal | None = None
+    # Seconds to wait for the signal in the asyncio advisory, no timeout if not set
+    timeout: float | None = None
+    # Seconds spent on (de)serializing responses for the response cache in the
+    # current run, parsing provider responses is part of the model call
+    _response_parsing_time = 0.0
 
     def init_strategy(self, strategy: Strategy) -> None:
         """Init method of advisors
@@ -37,77 +77,331 @@ class BacktraderLLMAdvisor(LLMAdvisor):
         strategy"""
         pass
 
+    def reset(self) -> None:
+        """Resets the state of the advisor before a new run
+
+        Drops the last signal and resets the schedule triggers, the change gate,
+        the prompt builder and the prefix layout."""
+        self.last_signal = None
+        for trigger in self.schedule or []:
+            trigger.reset()
+        for component in (self.change_gate, self.prompt_builder, self.prefix_layout):
+            if component is not None:
+                component.reset()
+
+    def get_indicator(
+        self, indicator_type: type[Indicator], *datas: LineRoot, **kwargs
+    ) -> Indicator:
+        """Returns an indicator for the strategy
+
+        Advisors should add indicators using this method, so identical
+        indicators are shared instead of being created multiple times."""
+        if self.indicator_registry is None:
+            return indicator_type(*datas, **kwargs)
+        return self.indicator_registry.get_indicator(indicator_type, *datas, **kwargs)
+
     def update_state(
         self, state: LLMAdvisorUpdateStateData
     ) -> LLMAdvisorUpdateStateData:
-        """Default update_state method which uses all available strategy data
+        """Default update_state method which uses the data of the advisor
 
-        To modify the data that the advisor is using, this method needs to be
+        The data is taken from the snapshot of the current bar, to modify the
+        data that the advisor is using, get_advisor_data needs to be
         overwritten."""
-        self.advisor_messages_input.advisor_prompt = state.messages[0].content
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_default_strategy_data(state) + state.data
-        )
-        return self._update_state(state)
+        snapshot = get_snapshot_from_state(state)
+        update_state = self._get_skipped_update_state(state, snapshot)
+        if update_state is not None:
+            return update_state
+        timings = self._compile_update(state, snapshot)
+        update_state = self._update_state(state)
+        self._complete_update(state, snapshot, update_state, timings)
+        return update_state
 
-    def _get_default_strategy_data(
-        self, state: LLMAdvisorState
-    ) -> list[LLMAdvisorDataArtefact]:
-        """Returns default strategy data"""
-        strategy = get_strategy_from_state(state)
-        strategy_data = generate_strategy_data(strategy)
-        broker_data = generate_broker_data(strategy)
-        positions_data = generate_positions_data(strategy)
-        data_feeds_data = {
-            get_data_feed_name(data_feed): generate_data_feed_data(
-                data_feed=data_feed,
-                lookback_period=state.metadata["data_lookback_period"],
-            )
-            for data_feed in strategy.datas
-        }
-        indicators_data = {
-            get_indicator_name(indicator): generate_indicator_data(
-                indicator=indicator,
-                lookback_period=state.metadata["indicator_lookback_period"],
+    async def aupdate_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Asyncio version of update_state
+
+        Data and prompt are generated before awaiting the model, so the
+        strategy is only accessed until the first await."""
+        snapshot = get_snapshot_from_state(state)
+        update_state = self._get_skipped_update_state(state, snapshot)
+        if update_state is not None:
+            return update_state
+        timings = self._compile_update(state, snapshot)
+        update_state = await self._aupdate_state(state)
+        self._complete_update(state, snapshot, update_state, timings)
+        return update_state
+
+    def _get_skipped_update_state(
+        self, state: LLMAdvisorUpdateStateData, snapshot: BacktraderStrategySnapshot
+    ) -> LLMAdvisorUpdateStateData | None:
+        """Returns a state update if the advisor does not need to run"""
+        if not self.needs_update(snapshot):
+            return self._create_update_state(self.last_signal)
+        signal = self.get_local_signal(snapshot)
+        if signal is not None:
+            self.last_signal = signal
+            return self._create_update_state(signal)
+        session = state.metadata.get("session")
+        if session is not None and session.replay and not session.validate:
+            # replay without generating data
+            signal = session.get_signal(self, snapshot)
+            if signal is not None:
+                self.last_signal = signal
+                return self._create_update_state(signal)
+        return None
+
+    def _compile_update(
+        self, state: LLMAdvisorUpdateStateData, snapshot: BacktraderStrategySnapshot
+    ) -> tuple[float, float, float]:
+        """Compiles prompt and data of the advisor, returns the timings"""
+        start = perf_counter()
+        if self.change_gate is not None:
+            # taken before the model is awaited, the strategy may continue
+            snapshot.get_advisor_fingerprint(self)
+        advisor_data = self.get_update_data(state, snapshot)
+        if self.prompt_compactor is not None:
+            advisor_data = self.prompt_compactor.compact(advisor_data)
+        data_generated = perf_counter()
+        self.advisor_messages_input.advisor_prompt = self.get_update_prompt(state)
+        compile_artefacts = (
+            self.prompt_builder.compile
+            if self.prompt_builder is not None
+            else compile_data_artefacts
+        )
+        if self.prefix_layout is not None:
+            self.advisor_messages_input.advisor_data = self.prefix_layout.compile(
+                advisor_data, compile_artefacts
             )
-            for indicator in strategy.getindicators()
-            if show_lineroot_obj(indicator)
-        }
-        response = []
-        response.append(
-            LLMAdvisorDataArtefact(
-                description="Strategy", artefact=strategy_data.description
+        else:
+            self.advisor_messages_input.advisor_data = compile_artefacts(advisor_data)
+        prompt_compiled = perf_counter()
+        self._response_parsing_time = 0.0
+        return start, data_generated, prompt_compiled
+
+    def _complete_update(
+        self,
+        state: LLMAdvisorUpdateStateData,
+        snapshot: BacktraderStrategySnapshot,
+        update_state: LLMAdvisorUpdateStateData,
+        timings: tuple[float, float, float],
+    ) -> None:
+        """Stores the signal of the advisor, records session and metrics"""
+        model_called = perf_counter()
+        start, data_generated, prompt_compiled = timings
+        self.last_signal = update_state.signals.get(self.advisor_name, self.last_signal)
+        if self.change_gate is not None:
+            self.change_gate.update(
+                snapshot.get_advisor_fingerprint(self), snapshot.key[0]
             )
+        session = state.metadata.get("session")
+        if session is not None and not session.replay:
+            session.record(self, snapshot, update_state.signals.get(self.advisor_name))
+        metrics = state.metadata.get("metrics")
+        prefix_cache_simulator = state.metadata.get("prefix_cache_simulator")
+        if metrics is None and prefix_cache_simulator is None:
+            return
+        prompt = (
+            f"{self.advisor_instructions}"
+            f"{self.advisor_messages_input.advisor_prompt}"
+            f"{self.advisor_messages_input.advisor_data}"
         )
-        response.append(
-            LLMAdvisorDataArtefact(
-                description="Broker",
-                artefact=broker_data.description,
-                output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+        if prefix_cache_simulator is not None:
+            prefix_cache_simulator.record(self.advisor_name, prompt)
+        if metrics is not None:
+            metrics.record(
+                advisor_name=self.advisor_name,
+                bar=snapshot.key[0],
+                prompt=prompt,
+                data_generation=data_generated - start,
+                prompt_compilation=prompt_compiled - data_generated,
+                model_call=model_called - prompt_compiled - self._response_parsing_time,
+                response_parsing=self._response_parsing_time,
             )
+
+    def get_update_data(
+        self, state: LLMAdvisorUpdateStateData, snapshot: BacktraderStrategySnapshot
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns the data to compile into the prompt of the advisor"""
+        advisor_data = snapshot.get_advisor_data(self)
+        if self.use_state_data:
+            advisor_data = advisor_data + state.data
+        return advisor_data
+
+    def get_update_prompt(self, state: LLMAdvisorUpdateStateData) -> str:
+        """Returns the prompt of the advisor"""
+        return state.messages[0].content
+
+    def get_local_signal(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> LLMAdvisorSignal | None:
+        """Returns a signal computed without the model
+
+        If a signal is returned, the model is not invoked for the snapshot.
+        Advisors can override this method for inputs that can be decided by
+        rules, returns None by default."""
+        return None
+
+    def get_fingerprint(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> dict[str, float] | None:
+        """Returns cheap features of the advisor inputs for the change gate
+
+        Invoked once per snapshot, see get_advisor_fingerprint of the
+        snapshot. Returns None by default, so the change gate never skips a
+        run."""
+        return None
+
+    def needs_update(self, snapshot: BacktraderStrategySnapshot) -> bool:
+        """Returns True if the advisor needs to run for the snapshot
+
+        An advisor without a signal always runs, otherwise it runs only if it
+        is scheduled for the bar of the snapshot and, with a change gate, if
+        its inputs changed."""
+        if self.last_signal is None:
+            return True
+        if not snapshot.is_advisor_due(self):
+            return False
+        if self.change_gate is None:
+            return True
+        return self.change_gate.is_changed(
+            snapshot.get_advisor_fingerprint(self), snapshot.key[0]
         )
-        for data_name, position in positions_data.positions.items():
-            response.append(
-                LLMAdvisorDataArtefact(
-                    description=f"Position {data_name}",
-                    artefact=position.model_dump(),
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-                )
-            )
-        for data_feed_data in data_feeds_data.values():
-            response.append(
-                LLMAdvisorDataArtefact(
-                    description=f"DataFeed {data_feed_data.name}",
-                    artefact=data_feed_data.data,
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-                )
-            )
-        for indicator_data in indicators_data.values():
-            response.append(
-                LLMAdvisorDataArtefact(
-                    description=f"Indicator {indicator_data.name}",
-                    artefact=indicator_data.data,
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+
+    def _update_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Returns the signal of the advisor
+
+        If a session is replayed or a batch is set, the signal is taken from
+        them, otherwise the model is invoked."""
+        signal = self._get_known_signal(state)
+        if signal is not None:
+            return self._create_update_state(signal)
+        return self._invoke_model(state)
+
+    async def _aupdate_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Asyncio version of _update_state"""
+        signal = self._get_known_signal(state)
+        if signal is not None:
+            return self._create_update_state(signal)
+        return await self._ainvoke_model(state)
+
+    def _get_known_signal(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorSignal | None:
+        """Returns the signal from a replayed session or a batch if available"""
+        session = state.metadata.get("session")
+        if session is not None and session.replay and session.validate:
+            signal = session.get_signal(self, get_snapshot_from_state(state))
+            if signal is not None:
+                return signal
+        batch = state.metadata.get("batch")
+        if batch is not None:
+            return batch.get_signal(self, state)
+        return None
+
+    async def _ainvoke_model(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Invokes the model without blocking the event loop
+
+        A local model with aget_signal is awaited directly. Model providers
+        are invoked in the model executor of the advisory, or the default
+        executor of the event loop if not set. If a rate limiter is set for
+        the model provider, it is acquired for the call. The permit of a call
+        running in the model executor is released once the call ends, also if
+        the awaiting task was cancelled before."""
+        rate_limiter = (state.metadata.get("rate_limits") or {}).get(
+            state.metadata.get("model_provider_name")
+        )
+        local_model = state.metadata.get("local_model")
+        if local_model is not None and hasattr(local_model, "aget_signal"):
+            async with rate_limiter or nullcontext():
+                return self._create_update_state(await local_model.aget_signal(self))
+        model_executor = state.metadata.get("model_executor")
+        if rate_limiter is None or model_executor is None:
+            async with rate_limiter or nullcontext():
+                return await asyncio.get_running_loop().run_in_executor(
+                    model_executor, self._invoke_model, state
                 )
-            )
-        return response
+        await rate_limiter.acquire()
+        try:
+            future = model_executor.submit(self._invoke_model, state)
+        except BaseException:
+            rate_limiter.release()
+            raise
+        future.add_done_callback(lambda _: rate_limiter.release())
+        return await asyncio.wrap_future(future)
+
+    def _invoke_model(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        """Invokes the model, uses the response cache if available
+
+        Responses are cached by the instructions, prompt and data of the advisor
+        together with the model used. If a local model is set, it is used
+        instead of the model provider."""
+        local_model = state.metadata.get("local_model")
+        if local_model is not None:
+            return self._create_update_state(local_model.get_signal(self))
+        response_cache = state.metadata.get("response_cache")
+        if response_cache is None:
+            return super()._update_state(state)
+        cache_key = response_cache.get_key(
+            state.metadata.get("model_provider_name"),
+            state.metadata.get("model_name"),
+            self.advisor_name,
+            self.signal_model_type.__name__,
+            self.advisor_instructions,
+            self.advisor_messages_input.advisor_prompt,
+            self.advisor_messages_input.advisor_data,
+        )
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            start = perf_counter()
+            signal = self.signal_model_type.model_validate_json(cached_response)
+            self._response_parsing_time += perf_counter() - start
+            return self._create_update_state(signal)
+        update_state = super()._update_state(state)
+        signal = update_state.signals.get(self.advisor_name)
+        if signal is not None:
+            start = perf_counter()
+            response = signal.model_dump_json()
+            self._response_parsing_time += perf_counter() - start
+            response_cache.set(cache_key, response)
+        return update_state
+
+    def _create_update_state(
+        self, signal: LLMAdvisorSignal
+    ) -> LLMAdvisorUpdateStateData:
+        """Returns a state update containing the signal of the advisor"""
+        return LLMAdvisorUpdateStateData(signals={self.advisor_name: signal})
+
+    def get_stale_signal(
+        self, signal: LLMAdvisorSignal, decay: float
+    ) -> LLMAdvisorSignal:
+        """Returns a signal reused on a bar the advisor is missing
+
+        The confidence is multiplied by decay."""
+        return signal.model_copy(update={"confidence": signal.confidence * decay})
+
+    def get_state_signals(
+        self, signal: LLMAdvisorSignal | None
+    ) -> dict[str, LLMAdvisorSignal]:
+        """Returns the signals reported in the state for a signal of the advisor"""
+        if signal is None:
+            return {}
+        return {self.advisor_name: signal}
+
+    def get_advisor_data(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns the data used by the advisor
+
+        Uses all available strategy data by default. This method is invoked
+        once per snapshot, the result is shared by all calls for the same bar."""
+        return snapshot.get_default_strategy_data(self.merge_indicator_tables)
@@ -1,22 +1,122 @@
-from backtrader import Strategy
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any
+
+from backtrader import Indicator, LineRoot, Strategy
+from langchain_core.messages import HumanMessage
 
 from llm_advisory.llm_advisory import LLMAdvisory
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorState,
+    LLMAdvisorUpdateStateData,
+)
 
 from bt_llm_advisory import BacktraderLLMAdvisor
+from bt_llm_advisory.pydantic_models import BacktraderAdvisoryResponse
 from bt_llm_advisory.state_advisors import BacktraderAdvisoryAdvisor
+from bt_llm_advisory.helper.bt_batch import BacktraderAdvisoryBatch
+from bt_llm_advisory.helper.bt_data_generation import BacktraderMetadataIndex
+from bt_llm_advisory.helper.bt_indicator_registry import BacktraderIndicatorRegistry
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_metrics import BacktraderAdvisoryMetrics
+from bt_llm_advisory.helper.bt_prefix_cache import BacktraderPrefixCacheSimulator
+from bt_llm_advisory.helper.bt_rate_limit import BacktraderRateLimiter
+from bt_llm_advisory.helper.bt_response_cache import BacktraderResponseCache
+from bt_llm_advisory.helper.bt_rolling_store import BacktraderRollingStore
+from bt_llm_advisory.helper.bt_session import BacktraderAdvisorySession
+from bt_llm_advisory.helper.bt_scheduler import is_schedule_due
+from bt_llm_advisory.helper.bt_snapshot import (
+    BacktraderStrategySnapshot,
+    get_snapshot_key,
+)
 
 DATA_LOOKBACK_PERIOD = 25
 INDICATOR_LOOKBACK_PERIOD = 10
+ADVISORY_MESSAGE = "Create your signal based on the provided data."
+MAX_MODEL_THREADS = 64
+
+logger = logging.getLogger(__name__)
+
+
+class BacktraderAdvisoryHandle:
+    """Handle of an advisory which is running in the background
+
+    Contains the bar the advisory was submitted for."""
+
+    def __init__(self, future: Future, bar: int, bar_datetime: datetime | None):
+        self.future = future
+        self.bar = bar
+        self.datetime = bar_datetime
+
+    def done(self) -> bool:
+        """Returns True if the advisory is available"""
+        return self.future.done()
+
+    def result(self, timeout: float | None = None) -> Any:
+        """Returns the advisory, waits until it is available"""
+        return self.future.result(timeout=timeout)
 
 
 class BacktraderLLMAdvisory(LLMAdvisory):
     """LLM Advisory for backtrader"""
 
+    def __init__(
+        self,
+        *args,
+        response_cache: BacktraderResponseCache | None = None,
+        local_model: BacktraderLocalModel | None = None,
+        metrics: BacktraderAdvisoryMetrics | None = None,
+        batch: BacktraderAdvisoryBatch | None = None,
+        session: BacktraderAdvisorySession | None = None,
+        rate_limits: dict[str, BacktraderRateLimiter] | None = None,
+        prefix_cache_simulator: BacktraderPrefixCacheSimulator | None = None,
+        max_model_threads: int = MAX_MODEL_THREADS,
+        **kwargs,
+    ) -> None:
+        """Initializes the advisory
+
+        All other arguments are passed to LLMAdvisory. If a response cache is
+        provided, advisor responses for identical inputs are taken from the
+        cache instead of invoking the model. If a local model is provided, it
+        is used instead of the model provider, e.g. for offline benchmarks.
+        If metrics are provided, timings of every advisor run are recorded.
+        If a batch is provided, signals are taken from the batch, see
+        BacktraderAdvisoryBatch for running backtests in batches. If a session
+        is provided, all signals are recorded or replayed from the session.
+        Rate limits are used by aget_advisory per model provider name. If a
+        prefix cache simulator is provided, all prompts are recorded to report
+        prompt cache hit ratios. The asyncio advisory invokes model providers
+        in up to max_model_threads threads, model calls of cancelled advisors
+        keep a thread until they end."""
+        super().__init__(*args, **kwargs)
+        self.response_cache = response_cache
+        self.local_model = local_model
+        self.metrics = metrics
+        self.batch = batch
+        self.session = session
+        self.rate_limits = rate_limits
+        self.prefix_cache_simulator = prefix_cache_simulator
+        self.max_model_threads = max_model_threads
+        self.metadata["response_cache"] = response_cache
+        self.metadata["local_model"] = local_model
+        self.metadata["metrics"] = metrics
+        self.metadata["batch"] = batch
+        self.metadata["session"] = session
+        self.metadata["rate_limits"] = rate_limits
+        self.metadata["prefix_cache_simulator"] = prefix_cache_simulator
+        self.metadata["model_provider_name"] = kwargs.get("model_provider_name")
+        self.metadata["model_name"] = kwargs.get("model_name")
+        self.metadata["model_executor"] = None
+
     def init_strategy(
         self,
         strategy: Strategy,
         data_lookback_period: int = DATA_LOOKBACK_PERIOD,
         indicator_lookback_period=INDICATOR_LOOKBACK_PERIOD,
+        rolling_store: bool = False,
     ) -> None:
         """Initializes backtrader functionality
 
@@ -28,14 +128,345 @@ class BacktraderLLMAdvisory(LLMAdvisory):
                 self.bt_llm_advisory = BacktraderLLMAdvisory(...)
                 self.bt_llm_advisory.init_strategy(self)
         ```
+        If rolling_store is set, data feed and indicator data is kept in ring
+        buffers which are updated with new bars only, see
+        BacktraderRollingStore. The store catches up on every advisory, call
+        update_rolling_store in next and prenext to update it on every bar.
         """
         self.advisory_advisor = BacktraderAdvisoryAdvisor()
         self.metadata["strategy"] = strategy
         self.metadata["data_lookback_period"] = data_lookback_period
         self.metadata["indicator_lookback_period"] = indicator_lookback_period
+        self.metadata["snapshot"] = None
+        self.metadata["metadata_index"] = BacktraderMetadataIndex(strategy)
+        self.metadata["rolling_store"] = (
+            BacktraderRollingStore(
+                max(data_lookback_period, indicator_lookback_period)
+            )
+            if rolling_store
+            else None
+        )
+        self._snapshot: BacktraderStrategySnapshot | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending_advisories: list[BacktraderAdvisoryHandle] = []
+        self.indicator_registry = BacktraderIndicatorRegistry(strategy)
+        self._notifications: dict[str, int] = {"order": 0, "trade": 0}
         for advisor in self.all_advisors:
             if not isinstance(advisor, BacktraderLLMAdvisor):
                 continue
+            advisor.indicator_registry = self.indicator_registry
+            advisor.reset()
             if not hasattr(advisor, "init_strategy"):
                 continue
             advisor.init_strategy(strategy)
+
+    def get_indicator(
+        self, indicator_type: type[Indicator], *datas: LineRoot, **kwargs
+    ) -> Indicator:
+        """Returns an indicator for the strategy
+
+        Reuses an identical indicator (same class, data and params) if it was
+        already added by the strategy or an advisor. Needs to be called inside
+        __init__ of the strategy after init_strategy was called.
+        ```
+        self.sma = self.bt_llm_advisory.get_indicator(bt.ind.SMA, self.data, period=10)
+        ```
+        """
+        return self.indicator_registry.get_indicator(indicator_type, *datas, **kwargs)
+
+    def get_advisory(self, *args, deadline: float | None = None, **kwargs):
+        """Returns the advisory for the current bar of the strategy
+
+        A snapshot of the strategy data is created once per bar and shared by
+        all advisors. If a deadline in seconds is set, the advisory is run
+        with aget_advisory and advisors which did not answer until the
+        deadline are dropped. Model calls of dropped advisors finish in the
+        background without delaying the strategy.
+
+        Raises a RuntimeError while submitted advisories are pending, since
+        they use the same advisors."""
+        if self.has_pending_advisories():
+            raise RuntimeError(
+                "get_advisory can not be used while submitted advisories are pending"
+            )
+        if deadline is not None:
+            return asyncio.run(self.aget_advisory(*args, deadline=deadline, **kwargs))
+        self.metadata["snapshot"] = self.get_snapshot()
+        self.metadata["missing_advisors"] = []
+        self.metadata["stale_advisors"] = []
+        return super().get_advisory(*args, **kwargs)
+
+    async def aget_advisory(
+        self,
+        message: str = ADVISORY_MESSAGE,
+        data: list[LLMAdvisorDataArtefact] | None = None,
+        min_signals: int | None = None,
+        deadline: float | None = None,
+        stale_decay: float | None = None,
+    ) -> BacktraderAdvisoryResponse:
+        """Returns the advisory for the current bar using asyncio
+
+        All advisors are awaited concurrently, so the time per bar is bound
+        by the slowest advisor instead of the number of advisors. Advisors
+        exceeding their timeout or failing are dropped, failures are logged.
+        If min_signals is set, remaining advisors are cancelled as soon as
+        this number of signals is available. If a deadline in seconds is set,
+        all advisors without a signal at the deadline are cancelled. The
+        deadline applies to the advisors, the advisory advisor is limited by
+        its own timeout.
+
+        The advisory advisor decides on the available signals, advisors
+        without a signal are returned as missing advisors. If stale_decay is
+        set, the last signal of a missing advisor is reused with its
+        confidence multiplied by stale_decay, so the confidence decays with
+        every bar an advisor is missing.
+        ```
+        def next(self):
+            advisory_response = asyncio.run(self.bt_llm_advisory.aget_advisory())
+        ```
+        Model providers are invoked in threads of an executor owned by the
+        advisory, which is not awaited when the event loop is closed, so
+        cancelled advisors do not block asyncio.run until their call ends.
+
+        Raises a RuntimeError while submitted advisories are pending, since
+        they use the same advisors.
+        """
+        if self.has_pending_advisories():
+            raise RuntimeError(
+                "aget_advisory can not be used while submitted advisories are pending"
+            )
+        if self.metadata["model_executor"] is None:
+            self.metadata["model_executor"] = ThreadPoolExecutor(
+                max_workers=self.max_model_threads,
+                thread_name_prefix="bt_llm_advisory_model",
+            )
+        state = LLMAdvisorState(
+            messages=[HumanMessage(content=message)],
+            data=data or [],
+            metadata={
+                **self.metadata,
+                "snapshot": self.get_snapshot(),
+                "missing_advisors": [],
+                "stale_advisors": [],
+            },
+        )
+        signals, answered_advisors = await self._aget_advisor_signals(
+            state, min_signals, deadline
+        )
+        missing_advisors = [
+            advisor.advisor_name
+            for advisor in self.advisors
+            if advisor.advisor_name not in answered_advisors
+        ]
+        stale_advisors = []
+        if stale_decay is not None:
+            for advisor in self.advisors:
+                if not isinstance(advisor, BacktraderLLMAdvisor):
+                    continue
+                last_signal = advisor.last_signal
+                if advisor.advisor_name in answered_advisors or last_signal is None:
+                    continue
+                advisor.last_signal = advisor.get_stale_signal(last_signal, stale_decay)
+                signals.update(advisor.get_state_signals(advisor.last_signal))
+                stale_advisors.append(advisor.advisor_name)
+        state.metadata["missing_advisors"] = missing_advisors
+        state.metadata["stale_advisors"] = stale_advisors
+        state.signals.update(signals)
+        advise = None
+        try:
+            advisory_state = await self._aupdate_advisor(self.advisory_advisor, state)
+            advise = advisory_state.signals.get(self.advisory_advisor.advisor_name)
+        except TimeoutError:
+            pass
+        if advise is not None:
+            state.signals[self.advisory_advisor.advisor_name] = advise
+        return BacktraderAdvisoryResponse(
+            state=state,
+            advise=advise,
+            missing_advisors=missing_advisors,
+            stale_advisors=stale_advisors,
+        )
+
+    async def _aget_advisor_signals(
+        self,
+        state: LLMAdvisorState,
+        min_signals: int | None,
+        deadline: float | None,
+    ) -> tuple[dict[str, Any], set[str]]:
+        """Returns the signals and names of all advisors which answered in time
+
+        Advisors may report more than one signal, e.g. a persona panel.
+        Advisors raising an exception are logged and have no signal."""
+        loop = asyncio.get_running_loop()
+        end = loop.time() + deadline if deadline is not None else None
+        tasks = {
+            asyncio.ensure_future(self._aupdate_advisor(advisor, state)): advisor
+            for advisor in self.advisors
+        }
+        signals = {}
+        answered_advisors = set()
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = max(0.0, end - loop.time()) if end is not None else None
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    exception = task.exception()
+                    if exception is not None:
+                        # failed advisors are missing like advisors timing out
+                        if not isinstance(exception, TimeoutError):
+                            logger.error(
+                                "Advisor %s failed",
+                                tasks[task].advisor_name,
+                                exc_info=exception,
+                            )
+                        continue
+                    advisor_signals = {
+                        name: signal
+                        for name, signal in task.result().signals.items()
+                        if signal is not None
+                    }
+                    if advisor_signals:
+                        signals.update(advisor_signals)
+                        answered_advisors.add(tasks[task].advisor_name)
+                if min_signals is not None and len(signals) >= min_signals:
+                    break
+        finally:
+            # cancel stragglers, threads of model providers finish unobserved
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return signals, answered_advisors
+
+    async def _aupdate_advisor(
+        self, advisor: Any, state: LLMAdvisorState
+    ) -> LLMAdvisorUpdateStateData:
+        """Runs an advisor within its timeout"""
+        if hasattr(advisor, "aupdate_state"):
+            update = advisor.aupdate_state(state)
+        else:
+            update = asyncio.get_running_loop().run_in_executor(
+                self.metadata["model_executor"], advisor.update_state, state
+            )
+        return await asyncio.wait_for(update, getattr(advisor, "timeout", None))
+
+    def get_snapshot(self) -> BacktraderStrategySnapshot:
+        """Returns the snapshot of the current bar
+
+        An existing snapshot is reused if it was created for the same bar."""
+        strategy = self.metadata["strategy"]
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.key != get_snapshot_key(strategy):
+            snapshot = BacktraderStrategySnapshot(
+                strategy,
+                data_lookback_period=self.metadata["data_lookback_period"],
+                indicator_lookback_period=self.metadata["indicator_lookback_period"],
+                rolling_store=self.metadata["rolling_store"],
+                metadata_index=self.metadata["metadata_index"],
+            )
+            for advisor in self.all_advisors:
+                if not isinstance(advisor, BacktraderLLMAdvisor):
+                    continue
+                snapshot.set_advisor_due(
+                    advisor,
+                    is_schedule_due(advisor.schedule, strategy, self._notifications),
+                )
+            self._snapshot = snapshot
+        return snapshot
+
+    def update_rolling_store(self) -> None:
+        """Updates the rolling store with the bars added since the last update
+
+        Does nothing if the rolling store is not used."""
+        rolling_store = self.metadata.get("rolling_store")
+        if rolling_store is not None:
+            rolling_store.update()
+
+    def notify_order(self, order) -> None:
+        """Forwards an order notification of the strategy to advisor schedules"""
+        self._notifications["order"] += 1
+
+    def notify_trade(self, trade) -> None:
+        """Forwards a trade notification of the strategy to advisor schedules"""
+        self._notifications["trade"] += 1
+
+    def submit_advisory(self, *args, **kwargs) -> BacktraderAdvisoryHandle:
+        """Submits the advisory for the current bar without blocking
+
+        The data of all advisors is generated from the strategy before
+        returning, the advisors are then invoked in a background thread.
+        Advisories are processed one after another in the order they were
+        submitted. Use get_completed_advisories on a later bar to get the
+        results.
+        ```
+        def next(self):
+            for handle in self.bt_llm_advisory.get_completed_advisories():
+                advisory_response = handle.result()
+            if not self.bt_llm_advisory.has_pending_advisories():
+                self.bt_llm_advisory.submit_advisory()
+        ```
+        """
+        strategy = self.metadata["strategy"]
+        snapshot = self.get_snapshot()
+        snapshot.prime(self.all_advisors)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="bt_llm_advisory"
+            )
+        future = self._executor.submit(
+            self._get_snapshot_advisory, snapshot, *args, **kwargs
+        )
+        handle = BacktraderAdvisoryHandle(
+            future=future,
+            bar=len(strategy),
+            bar_datetime=strategy.datetime.datetime(0) if len(strategy) else None,
+        )
+        self._pending_advisories.append(handle)
+        return handle
+
+    def has_pending_advisories(self) -> bool:
+        """Returns True if submitted advisories are not yet completed"""
+        return any(not handle.done() for handle in self._pending_advisories)
+
+    def get_completed_advisories(self) -> list[BacktraderAdvisoryHandle]:
+        """Returns all completed advisories in the order they were submitted
+
+        Returned handles are removed from the pending advisories."""
+        completed = []
+        for handle in self._pending_advisories:
+            if not handle.done():
+                break
+            completed.append(handle)
+        del self._pending_advisories[: len(completed)]
+        return completed
+
+    def stop(self, wait: bool = True) -> None:
+        """Stops the background processing of submitted advisories
+
+        Should be called from stop of the strategy when using submit_advisory,
+        the asyncio advisory or a session."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+        model_executor = self.metadata.get("model_executor")
+        if model_executor is not None:
+            # model calls of cancelled advisors are not awaited
+            model_executor.shutdown(wait=False, cancel_futures=True)
+            self.metadata["model_executor"] = None
+        if self.session is not None:
+            self.session.close()
+
+    def _get_snapshot_advisory(
+        self, snapshot: BacktraderStrategySnapshot, *args, **kwargs
+    ):
+        """Returns the advisory for a primed snapshot
+
+        Runs in the background thread, get_advisory is rejected meanwhile."""
+        self.metadata["snapshot"] = snapshot
+        self.metadata["missing_advisors"] = []
+        self.metadata["stale_advisors"] = []
+        return super().get_advisory(*args, **kwargs)
@@ -0,0 +1,141 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any
+
+import backtrader as bt
+
+from llm_advisory.pydantic_models import LLMAdvisorSignal, LLMAdvisorUpdateStateData
+
+from bt_llm_advisory.helper.bt_local_model import get_advisor_input_hash
+
+PENDING_REASONING = "Signal pending in advisory batch"
+
+
+def is_pending_signal(signal: Any) -> bool:
+    """Returns True if a signal is a placeholder for a pending batch request"""
+    return getattr(signal, "reasoning", None) == PENDING_REASONING
+
+
+class BacktraderAdvisoryBatch:
+    """Batched advisory for backtests
+
+    Instead of invoking the model bar by bar, a backtest is run in passes.
+    While collecting, inputs of advisors without a known signal are collected
+    and a pending placeholder signal is returned. Collected inputs are then
+    submitted concurrently and the signals are stored by the input hash of
+    the advisor. On the next pass the stored signals are replayed to the
+    strategy bar by bar. Inputs depending on pending signals, e.g. the
+    advisory advisor, are collected on a later pass once the signals they
+    depend on are known.
+
+    Inputs of advisors using broker or positions data may change once the
+    strategy receives real signals, these are collected again on the next
+    pass. If collecting is disabled, inputs without a known signal are sent
+    to the model directly."""
+
+    def __init__(self, max_workers: int = 8, collect: bool = True) -> None:
+        self.max_workers = max_workers
+        self.collect = collect
+        self._lock = Lock()
+        self._signals: dict[str, LLMAdvisorSignal] = {}
+        self._pending: dict[str, tuple[Any, Any, LLMAdvisorUpdateStateData]] = {}
+
+    def get_signal(
+        self, advisor: Any, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorSignal | None:
+        """Returns the signal for the current input of an advisor
+
+        Returns None if no signal is known and collecting is disabled."""
+        input_hash = get_advisor_input_hash(advisor)
+        with self._lock:
+            signal = self._signals.get(input_hash)
+            if signal is not None or not self.collect:
+                return signal
+            if not any(is_pending_signal(s) for s in state.signals.values()):
+                # the snapshot is not needed to invoke the model
+                metadata = {
+                    k: v
+                    for k, v in state.metadata.items()
+                    if k not in ("snapshot", "strategy")
+                }
+                self._pending.setdefault(
+                    input_hash,
+                    (
+                        advisor,
+                        copy.copy(advisor.advisor_messages_input),
+                        state.model_copy(update={"metadata": metadata}),
+                    ),
+                )
+        return advisor.signal_model_type.model_validate(
+            {"signal": "none", "confidence": 0.0, "reasoning": PENDING_REASONING}
+        )
+
+    def has_pending(self) -> bool:
+        """Returns True if collected inputs are not yet submitted"""
+        return len(self._pending) > 0
+
+    def submit(self) -> int:
+        """Requests signals for all collected inputs
+
+        The requests are processed concurrently, returns the number of
+        submitted inputs."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="bt_llm_advisory_batch"
+        ) as executor:
+            signals = executor.map(
+                lambda item: self._request_signal(*item), pending.values()
+            )
+            for input_hash, signal in zip(pending.keys(), signals):
+                if signal is None:
+                    continue
+                with self._lock:
+                    self._signals[input_hash] = signal
+        return len(pending)
+
+    def run(self, cerebro: bt.Cerebro, max_passes: int = 5) -> list[bt.Strategy]:
+        """Runs a backtest in passes until all signals are known
+
+        Every pass collects missing inputs which are submitted before the next
+        pass. After max_passes, a last pass is run with collecting disabled,
+        so remaining inputs are sent to the model directly. Returns the
+        strategies of the last pass.
+
+        The strategy is created again on every pass, its call of
+        init_strategy resets the advisory and the state of all advisors, so
+        an advisory shared by the strategies of all passes starts every pass
+        like a new backtest."""
+        collect = self.collect
+        try:
+            for _ in range(max_passes):
+                self.collect = True
+                strategies = cerebro.run()
+                if not self.submit():
+                    return strategies
+            self.collect = False
+            return cerebro.run()
+        finally:
+            self.collect = collect
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the number of known signals and pending inputs"""
+        return {"signals": len(self._signals), "pending": len(self._pending)}
+
+    def _request_signal(
+        self,
+        advisor: Any,
+        messages_input: Any,
+        state: LLMAdvisorUpdateStateData,
+    ) -> LLMAdvisorSignal | None:
+        """Invokes the model for a collected input of an advisor
+
+        A copy of the advisor is used, so inputs of the same advisor can be
+        requested concurrently."""
+        worker = copy.copy(advisor)
+        worker.advisor_messages_input = messages_input
+        update_state = worker._invoke_model(state)
+        return update_state.signals.get(advisor.advisor_name)
@@ -0,0 +1,91 @@
+import numpy as np
+
+# candle patterns with the signal and confidence used for a local signal
+CANDLE_PATTERNS = {
+    "Doji": ("neutral", 0.6),
+    "Hammer": ("bullish", 0.6),
+    "Shooting Star": ("bearish", 0.6),
+    "Bullish Engulfing": ("bullish", 0.7),
+    "Bearish Engulfing": ("bearish", 0.7),
+    "Morning Star": ("bullish", 0.8),
+    "Evening Star": ("bearish", 0.8),
+}
+
+
+def shift(values: np.ndarray, periods: int) -> np.ndarray:
+    """Returns values shifted by periods, missing values are nan"""
+    shifted = np.full(len(values), np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[: len(values) - periods]
+    return shifted
+
+
+def detect_candle_patterns(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    doji_ratio: float = 0.1,
+) -> dict[str, np.ndarray]:
+    """Detects candle patterns on ohlc values in ascending order
+
+    Returns a boolean array per pattern, which is True for every candle
+    completing the pattern. Candles with missing values never match."""
+    with np.errstate(invalid="ignore"):
+        body = np.abs(close - open_)
+        candle_range = high - low
+        upper_shadow = high - np.maximum(open_, close)
+        lower_shadow = np.minimum(open_, close) - low
+        bullish = close > open_
+        bearish = close < open_
+        doji = (candle_range > 0) & (body <= doji_ratio * candle_range)
+        small_body = ~doji & (body > 0)
+
+        prev_open, prev_close = shift(open_, 1), shift(close, 1)
+        prev_body = np.abs(prev_close - prev_open)
+        first_open, first_close = shift(open_, 2), shift(close, 2)
+        first_body = np.abs(first_close - first_open)
+        first_range = shift(high, 2) - shift(low, 2)
+        first_mid = (first_open + first_close) / 2
+        star = prev_body <= 0.3 * first_body
+        return {
+            "Doji": doji,
+            "Hammer": small_body
+            & (lower_shadow >= 2 * body)
+            & (upper_shadow <= 0.25 * candle_range)
+            & (prev_close < prev_open),
+            "Shooting Star": small_body
+            & (upper_shadow >= 2 * body)
+            & (lower_shadow <= 0.25 * candle_range)
+            & (prev_close > prev_open),
+            "Bullish Engulfing": bullish
+            & (prev_close < prev_open)
+            & (open_ <= prev_close)
+            & (close >= prev_open)
+            & (body > prev_body),
+            "Bearish Engulfing": bearish
+            & (prev_close > prev_open)
+            & (open_ >= prev_close)
+            & (close <= prev_open)
+            & (body > prev_body),
+            "Morning Star": (first_close < first_open)
+            & (first_body >= 0.5 * first_range)
+            & star
+            & bullish
+            & (close > first_mid),
+            "Evening Star": (first_close > first_open)
+            & (first_body >= 0.5 * first_range)
+            & star
+            & bearish
+            & (close < first_mid),
+        }
+
+
+def get_latest_candle_patterns(columns: dict[str, np.ndarray]) -> list[str]:
+    """Returns the names of all patterns completed by the latest candle
+
+    The columns need to contain open, high, low and close in ascending order."""
+    patterns = detect_candle_patterns(
+        columns["open"], columns["high"], columns["low"], columns["close"]
+    )
+    return [name for name, matches in patterns.items() if len(matches) and matches[-1]]
@@ -0,0 +1,64 @@
+import math
+
+
+class BacktraderChangeGate:
+    """Gate skipping advisor runs while its inputs do not change
+
+    The inputs of an advisor are represented by a fingerprint, a dict of
+    feature values provided by the advisor. The advisor runs again if any
+    feature changed by more than its threshold since the last run, or if the
+    last run is max_staleness bars ago. Thresholds are set per feature name,
+    for a fingerprint key like "BTCUSD[1 Minute].rsi" the threshold of the
+    full key or of "rsi" is used. If relative is set, changes are relative
+    to the value of the last run.
+
+    Every advisor needs its own gate."""
+
+    def __init__(
+        self,
+        thresholds: dict[str, float] | None = None,
+        default_threshold: float = 0.0,
+        max_staleness: int = 10,
+        relative: bool = False,
+    ) -> None:
+        self.thresholds = thresholds or {}
+        self.default_threshold = default_threshold
+        self.max_staleness = max_staleness
+        self.relative = relative
+        self._fingerprint: dict[str, float] | None = None
+        self._bar: int | None = None
+
+    def is_changed(self, fingerprint: dict[str, float] | None, bar: int) -> bool:
+        """Returns True if the advisor needs to run for a fingerprint"""
+        if fingerprint is None or self._fingerprint is None or self._bar is None:
+            return True
+        if bar - self._bar >= self.max_staleness:
+            return True
+        if fingerprint.keys() != self._fingerprint.keys():
+            return True
+        for key, value in fingerprint.items():
+            if self._is_feature_changed(key, self._fingerprint[key], value):
+                return True
+        return False
+
+    def update(self, fingerprint: dict[str, float] | None, bar: int) -> None:
+        """Stores the fingerprint of an advisor run"""
+        self._fingerprint = fingerprint
+        self._bar = bar
+
+    def reset(self) -> None:
+        """Drops the fingerprint of the last run before a new run"""
+        self._fingerprint = None
+        self._bar = None
+
+    def _is_feature_changed(self, key: str, last_value: float, value: float) -> bool:
+        """Returns True if a feature changed by more than its threshold"""
+        threshold = self.thresholds.get(
+            key, self.thresholds.get(key.rsplit(".", 1)[-1], self.default_threshold)
+        )
+        if math.isnan(value) or math.isnan(last_value):
+            return math.isnan(value) != math.isnan(last_value)
+        change = abs(value - last_value)
+        if self.relative:
+            change = change / abs(last_value) if last_value else math.inf
+        return change > threshold
@@ -1,6 +1,7 @@
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import backtrader as bt
+import numpy as np
 
 from llm_advisory.pydantic_models import LLMAdvisorState
 
@@ -14,6 +15,9 @@ from bt_llm_advisory.pydantic_models import (
     BacktraderAnalyzerData,
 )
 
+if TYPE_CHECKING:
+    from bt_llm_advisory.helper.bt_rolling_store import BacktraderRollingStore
+
 
 def get_clock_from_lineroot(
     lineroot_obj: bt.LineRoot, resolve_to_data: bool = False
@@ -92,7 +96,7 @@ def get_indicator_name(indicator: bt.IndicatorBase) -> str:
     name = indicator.__class__.__name__
     if hasattr(indicator, "plotinfo") and indicator.plotinfo.plotname:
         name = indicator.plotinfo.plotname
-    return f"{name}{indicator._plotlabel() if hasattr(indicator, "_plotlabel") else ""}"
+    return f"{name}{indicator._plotlabel() if hasattr(indicator, '_plotlabel') else ''}"
 
 
 def get_analyzer_name(analyzer: bt.Analyzer) -> str:
@@ -109,36 +113,115 @@ def get_resolution_name(data_feed: bt.DataBase) -> str:
     )
 
 
+class BacktraderDataFeedMetadata:
+    """Names of a data feed"""
+
+    def __init__(self, data_feed: bt.DataBase) -> None:
+        self.data_feed = data_feed
+        self.name = get_data_feed_name(data_feed)
+        self.instrument = get_data_feed_instrument(data_feed)
+        self.resolution = get_resolution_name(data_feed)
+
+
+class BacktraderIndicatorMetadata:
+    """Names, lines, data feed and visibility of an indicator"""
+
+    def __init__(self, indicator: bt.IndicatorBase | bt.LinesOperation) -> None:
+        self.indicator = indicator
+        self.name = get_indicator_name(indicator)
+        self.data_feed = get_clock_from_lineroot(indicator, True)
+        self.visible = show_lineroot_obj(indicator)
+        if isinstance(indicator, bt.IndicatorBase):
+            self.data_name = self.name
+            self.lines = {
+                f"{self.name}.{line_alias}": getattr(indicator, line_alias)
+                for line_alias in indicator.getlinealiases()
+            }
+        elif isinstance(indicator, bt.LinesOperation):
+            self.data_name = indicator.__class__.__name__
+            self.lines = {self.name: indicator}
+        else:
+            raise ValueError(f"Unkown indicator type: {indicator.__class__.__name__}")
+
+
+class BacktraderMetadataIndex:
+    """Index of data feed and indicator metadata
+
+    Names, line aliases, data feeds and visibility do not change once the
+    strategy is initialized, so they are resolved once per object and reused
+    on every bar. Indicators are created in __init__ of the strategy, so the
+    index is built on first use and objects missing in the index, e.g.
+    indicators created by advisors, are added on first access."""
+
+    def __init__(self, strategy: bt.Strategy | None = None) -> None:
+        self.strategy = strategy
+        self._data_feeds: dict[int, BacktraderDataFeedMetadata] = {}
+        self._indicators: dict[int, BacktraderIndicatorMetadata] = {}
+        self._visible_indicators: list | None = None
+
+    def get_data_feed_metadata(
+        self, data_feed: bt.DataBase
+    ) -> BacktraderDataFeedMetadata:
+        """Returns the metadata of a data feed"""
+        metadata = self._data_feeds.get(id(data_feed))
+        if metadata is None:
+            metadata = BacktraderDataFeedMetadata(data_feed)
+            self._data_feeds[id(data_feed)] = metadata
+        return metadata
+
+    def get_indicator_metadata(
+        self, indicator: bt.IndicatorBase | bt.LinesOperation
+    ) -> BacktraderIndicatorMetadata:
+        """Returns the metadata of an indicator"""
+        metadata = self._indicators.get(id(indicator))
+        if metadata is None:
+            metadata = BacktraderIndicatorMetadata(indicator)
+            self._indicators[id(indicator)] = metadata
+        return metadata
+
+    def get_visible_indicators(self) -> list[bt.IndicatorBase | bt.LinesOperation]:
+        """Returns all visible indicators of the strategy"""
+        if self._visible_indicators is None:
+            self._visible_indicators = [
+                indicator
+                for indicator in self.strategy.getindicators()
+                if self.get_indicator_metadata(indicator).visible
+            ]
+        return self._visible_indicators
+
+
 def generate_strategy_data(
-    strategy: bt.Strategy, add_indicators: bool = True, add_analyzers: bool = False
+    strategy: bt.Strategy,
+    add_indicators: bool = True,
+    add_analyzers: bool = False,
+    metadata_index: BacktraderMetadataIndex | None = None,
 ) -> BacktraderStrategyData:
     """Generates strategy data"""
+    metadata_index = metadata_index or BacktraderMetadataIndex(strategy)
     strategy_name = strategy.__class__.__name__
     data_names = []
     instrument_names = []
     indicator_names = []
     analyzer_names = []
     for data in strategy.datas:
-        data_names.append(get_data_feed_name(data))
-        instrument_names.append(get_data_feed_instrument(data))
+        data_metadata = metadata_index.get_data_feed_metadata(data)
+        data_names.append(data_metadata.name)
+        instrument_names.append(data_metadata.instrument)
     if add_indicators:
-        for indicator in strategy.getindicators():
-            if not show_lineroot_obj(indicator):
-                continue
-            indicator_name = get_indicator_name(indicator)
-            indicator_names.append(indicator_name)
+        for indicator in metadata_index.get_visible_indicators():
+            indicator_names.append(metadata_index.get_indicator_metadata(indicator).name)
     if add_analyzers:
         for analyzer in strategy.analyzers:
             analyzer_name = get_analyzer_name(analyzer)
             analyzer_names.append(analyzer_name)
     description = (
         f"This is an overview of the trading strategy {strategy_name}."
-        f"\nDataFeeds in use: {",".join(list(data_names))}."
+        f"\nDataFeeds in use: {','.join(list(data_names))}."
     )
     if len(indicator_names) > 0:
-        description += f"\nIndicators in use: {",".join(list(indicator_names))}"
+        description += f"\nIndicators in use: {','.join(list(indicator_names))}"
     if len(analyzer_names) > 0:
-        description += f"\nAnalyzers in use: {",".join(list(analyzer_names))}"
+        description += f"\nAnalyzers in use: {','.join(list(analyzer_names))}"
     return BacktraderStrategyData(
         name=strategy_name,
         description=description,
@@ -179,71 +262,226 @@ def generate_positions_data(strategy: bt.Strategy) -> BacktraderPositionsData:
     return BacktraderPositionsData(positions=positions)
 
 
+def get_line_array(line: bt.LineBuffer, size: int) -> np.ndarray:
+    """Returns the last values of a line as array in ascending order
+
+    The values are sliced from the line buffer in one go. If the line contains
+    less than size values, the missing values are filled with nan."""
+    available = min(size, len(line))
+    values = np.full(size, np.nan)
+    if available > 0:
+        values[size - available :] = line.get(size=available)
+    return values
+
+
+def num2date_array(values: np.ndarray, tz: Any = None) -> np.ndarray:
+    """Converts backtrader datetime values into a datetime64 array
+
+    Without a timezone the conversion is done in a single vectorized pass,
+    invalid values are returned as NaT."""
+    values = np.asarray(values, dtype=float)
+    datetimes = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[us]")
+    valid = np.isfinite(values)
+    if tz is None:
+        # backtrader values are days since 0001-01-01, 719163 is 1970-01-01
+        days = np.floor(values[valid])
+        microseconds = (days.astype(np.int64) - 719163) * 86400000000 + np.rint(
+            (values[valid] - days) * 86400e6
+        ).astype(np.int64)
+        # snap to full seconds like num2date does for float inaccuracies
+        remainder = microseconds % 1000000
+        microseconds -= np.where(remainder < 10, remainder, 0)
+        microseconds += np.where(remainder > 999990, 1000000 - remainder, 0)
+        datetimes[valid] = microseconds.astype("datetime64[us]")
+    else:
+        datetimes[valid] = [bt.num2date(value, tz=tz) for value in values[valid]]
+    return datetimes
+
+
+def get_datetime_array(line: bt.LineBuffer, size: int) -> np.ndarray:
+    """Returns the last datetimes of a datetime line in ascending order"""
+    return num2date_array(get_line_array(line, size), getattr(line, "_tz", None))
+
+
+def generate_data_feed_columns(
+    data_feed: bt.DataBase,
+    lookback_period: int,
+    only_close: bool = False,
+    add_volume: bool = True,
+    rolling_store: "BacktraderRollingStore | None" = None,
+) -> dict[str, np.ndarray]:
+    """Generates data feed columns in ascending order
+
+    If a rolling store is provided, the columns are taken from the store."""
+    if rolling_store is not None:
+        return rolling_store.get_data_feed_columns(
+            data_feed, lookback_period, only_close, add_volume
+        )
+    size = min(lookback_period, len(data_feed))
+    line_names = ["close"] if only_close else ["open", "high", "low", "close"]
+    if add_volume:
+        line_names.append("volume")
+    columns = {"datetime": get_datetime_array(data_feed.lines.datetime, size)}
+    for line_name in line_names:
+        columns[line_name] = get_line_array(getattr(data_feed.lines, line_name), size)
+    return columns
+
+
+def generate_indicator_line_columns(
+    indicator: bt.IndicatorBase | bt.LinesOperation,
+    size: int,
+    metadata_index: BacktraderMetadataIndex | None = None,
+) -> dict[str, np.ndarray]:
+    """Generates the line columns of an indicator in ascending order"""
+    metadata_index = metadata_index or BacktraderMetadataIndex()
+    return {
+        column: get_line_array(line, size)
+        for column, line in metadata_index.get_indicator_metadata(
+            indicator
+        ).lines.items()
+    }
+
+
+def generate_indicator_columns(
+    indicator: bt.IndicatorBase | bt.LinesOperation,
+    lookback_period: int,
+    rolling_store: "BacktraderRollingStore | None" = None,
+    metadata_index: BacktraderMetadataIndex | None = None,
+) -> dict[str, np.ndarray]:
+    """Generates indicator columns in ascending order
+
+    If a rolling store is provided, the columns are taken from the store."""
+    if rolling_store is not None:
+        return rolling_store.get_indicator_columns(indicator, lookback_period)
+    metadata_index = metadata_index or BacktraderMetadataIndex()
+    data_for_indicator = metadata_index.get_indicator_metadata(indicator).data_feed
+    size = min(lookback_period, len(data_for_indicator))
+    columns = {"datetime": get_datetime_array(data_for_indicator.lines.datetime, size)}
+    columns.update(generate_indicator_line_columns(indicator, size, metadata_index))
+    return columns
+
+
+def group_indicators_by_data_feed(
+    indicators: list[bt.IndicatorBase | bt.LinesOperation],
+    metadata_index: BacktraderMetadataIndex | None = None,
+) -> dict[int, list[bt.IndicatorBase | bt.LinesOperation]]:
+    """Groups indicators by the id of the data feed they are running on"""
+    metadata_index = metadata_index or BacktraderMetadataIndex()
+    groups = {}
+    for indicator in indicators:
+        data_feed = metadata_index.get_indicator_metadata(indicator).data_feed
+        groups.setdefault(id(data_feed), []).append(indicator)
+    return groups
+
+
+def generate_merged_data_feed_columns(
+    data_feed: bt.DataBase,
+    indicators: list[bt.IndicatorBase | bt.LinesOperation],
+    lookback_period: int,
+    only_close: bool = False,
+    add_volume: bool = True,
+    rolling_store: "BacktraderRollingStore | None" = None,
+    metadata_index: BacktraderMetadataIndex | None = None,
+) -> dict[str, np.ndarray]:
+    """Generates data feed columns joined with the columns of its indicators
+
+    All indicators need to run on the clock of the data feed, so the datetime
+    column is shared by all lines."""
+    columns = generate_data_feed_columns(
+        data_feed=data_feed,
+        lookback_period=lookback_period,
+        only_close=only_close,
+        add_volume=add_volume,
+        rolling_store=rolling_store,
+    )
+    size = len(columns["datetime"])
+    for indicator in indicators:
+        if rolling_store is not None:
+            indicator_columns = rolling_store.get_indicator_columns(indicator, size)
+            indicator_columns.pop("datetime")
+        else:
+            indicator_columns = generate_indicator_line_columns(
+                indicator, size, metadata_index
+            )
+        columns.update(indicator_columns)
+    return columns
+
+
 def generate_data_feed_data(
     data_feed: bt.DataBase,
     lookback_period: int,
     only_close: bool = False,
     add_volume: bool = True,
+    rolling_store: "BacktraderRollingStore | None" = None,
+    metadata_index: BacktraderMetadataIndex | None = None,
 ) -> BacktraderDataFeedData:
     """Generates data feed data"""
-    name = get_data_feed_name(data_feed)
-    instrument = get_data_feed_instrument(data_feed)
-    resolution = get_resolution_name(data_feed)
-    data: list[dict[str, Any]] = []
-    for i in range(lookback_period):
-        try:
-            feed_data_row = {
-                "datetime": data_feed.datetime.datetime(-i),
-            }
-            if only_close:
-                feed_data_row["close"] = data_feed.close[-i]
-            else:
-                feed_data_row["open"] = data_feed.open[-i]
-                feed_data_row["high"] = data_feed.high[-i]
-                feed_data_row["low"] = data_feed.low[-i]
-                feed_data_row["close"] = data_feed.close[-i]
-            if add_volume:
-                feed_data_row["volume"] = data_feed.volume[-i]
-            data.append(feed_data_row)
-        except Exception:
-            break
+    columns = generate_data_feed_columns(
+        data_feed=data_feed,
+        lookback_period=lookback_period,
+        only_close=only_close,
+        add_volume=add_volume,
+        rolling_store=rolling_store,
+    )
+    data_feed_metadata = (
+        metadata_index or BacktraderMetadataIndex()
+    ).get_data_feed_metadata(data_feed)
     return BacktraderDataFeedData(
-        name=name,
-        instrument=instrument,
-        resolution=resolution,
-        data=data,
+        name=data_feed_metadata.name,
+        instrument=data_feed_metadata.instrument,
+        resolution=data_feed_metadata.resolution,
+        columns=columns,
+    )
+
+
+def generate_merged_data_feed_data(
+    data_feed: bt.DataBase,
+    indicators: list[bt.IndicatorBase | bt.LinesOperation],
+    lookback_period: int,
+    only_close: bool = False,
+    add_volume: bool = True,
+    rolling_store: "BacktraderRollingStore | None" = None,
+    metadata_index: BacktraderMetadataIndex | None = None,
+) -> BacktraderDataFeedData:
+    """Generates data feed data joined with the data of its indicators"""
+    columns = generate_merged_data_feed_columns(
+        data_feed=data_feed,
+        indicators=indicators,
+        lookback_period=lookback_period,
+        only_close=only_close,
+        add_volume=add_volume,
+        rolling_store=rolling_store,
+        metadata_index=metadata_index,
+    )
+    data_feed_metadata = (
+        metadata_index or BacktraderMetadataIndex()
+    ).get_data_feed_metadata(data_feed)
+    return BacktraderDataFeedData(
+        name=data_feed_metadata.name,
+        instrument=data_feed_metadata.instrument,
+        resolution=data_feed_metadata.resolution,
+        columns=columns,
     )
 
 
 def generate_indicator_data(
-    indicator: bt.IndicatorBase | bt.LinesOperation, lookback_period: int
+    indicator: bt.IndicatorBase | bt.LinesOperation,
+    lookback_period: int,
+    rolling_store: "BacktraderRollingStore | None" = None,
+    metadata_index: BacktraderMetadataIndex | None = None,
 ) -> BacktraderIndicatorData:
     """Generates indicator data"""
-    indicator_name = (
-        get_indicator_name(indicator)
-        if isinstance(indicator, bt.IndicatorBase)
-        else indicator.__class__.__name__
+    metadata_index = metadata_index or BacktraderMetadataIndex()
+    columns = generate_indicator_columns(
+        indicator=indicator,
+        lookback_period=lookback_period,
+        rolling_store=rolling_store,
+        metadata_index=metadata_index,
+    )
+    return BacktraderIndicatorData(
+        name=metadata_index.get_indicator_metadata(indicator).data_name,
+        columns=columns,
     )
-    data_for_indicator = get_clock_from_lineroot(indicator, True)
-    indicator_data = []
-    for i in range(lookback_period):
-        lines = {"datetime": data_for_indicator.datetime.datetime(-i)}
-        if isinstance(indicator, bt.IndicatorBase):
-            line_aliases = indicator.getlinealiases()
-            for line_alias in line_aliases:
-                line = getattr(indicator, line_alias)
-                line_name = f"{get_indicator_name(indicator)}.{line_alias}"
-                try:
-                    line_value = line[-i]
-                except Exception:
-                    line_value = float("nan")
-                lines[line_name] = line_value
-        elif isinstance(indicator, bt.LinesOperation):
-            lines[get_indicator_name(indicator)] = indicator[-i]
-        else:
-            raise ValueError(f"Unkown indicator type: {indicator.__class__.__name__}")
-        indicator_data.append(lines)
-    return BacktraderIndicatorData(name=indicator_name, data=indicator_data)
 
 
 def generate_analyzer_data(analyzer: bt.Analyzer) -> BacktraderAnalyzerData:
@@ -0,0 +1,92 @@
+from typing import Any, Hashable
+
+import backtrader as bt
+
+from bt_llm_advisory.helper.bt_data_generation import show_lineroot_obj
+
+
+class BacktraderIndicatorRegistry:
+    """Registry for indicators of a strategy
+
+    Resolves indicator requests by indicator class, data and params. If an
+    identical indicator already exists in the strategy or was requested
+    before, the existing indicator is returned instead of creating a new one.
+    Arguments which are not params of the indicator are used as plotinfo
+    when creating a new indicator."""
+
+    def __init__(self, strategy: bt.Strategy) -> None:
+        self.strategy = strategy
+        self.created = 0
+        self.reused = 0
+        self._indicators: dict[Hashable, bt.Indicator] = {}
+
+    def get_indicator(
+        self, indicator_type: type[bt.Indicator], *datas: bt.LineRoot, **kwargs
+    ) -> bt.Indicator:
+        """Returns an indicator, reuses an existing identical indicator
+
+        Needs to be called while the strategy is initialized."""
+        param_names = set(indicator_type.params._getkeys())
+        params = {k: v for k, v in kwargs.items() if k in param_names}
+        plot_kwargs = {k: v for k, v in kwargs.items() if k not in param_names}
+        key = self._get_key(
+            indicator_type, datas or self.strategy.datas[:1], params
+        )
+        if key is None:
+            self.created += 1
+            return indicator_type(*datas, **kwargs)
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            indicator = self._find_strategy_indicator(key)
+        if indicator is None:
+            indicator = indicator_type(*datas, **kwargs)
+            self.created += 1
+        else:
+            self._update_plotinfo(indicator, plot_kwargs)
+            self.reused += 1
+        self._indicators[key] = indicator
+        return indicator
+
+    def _find_strategy_indicator(self, key: Hashable) -> bt.Indicator | None:
+        """Returns an identical indicator already added to the strategy"""
+        for indicator in self.strategy.getindicators():
+            if not isinstance(indicator, bt.IndicatorBase):
+                continue
+            indicator_key = self._get_key(
+                type(indicator), indicator.datas, indicator.params._getkwargs()
+            )
+            if indicator_key == key:
+                return indicator
+        return None
+
+    def _get_key(
+        self,
+        indicator_type: type[bt.Indicator],
+        datas: tuple[bt.LineRoot, ...] | list[bt.LineRoot],
+        params: dict[str, Any],
+    ) -> Hashable | None:
+        """Returns the key of an indicator, None if params are not hashable"""
+        all_params = dict(indicator_type.params._getitems())
+        all_params.update(params)
+        key = (
+            indicator_type,
+            tuple(id(data) for data in datas),
+            tuple(sorted(all_params.items())),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _update_plotinfo(
+        self, indicator: bt.Indicator, plot_kwargs: dict[str, Any]
+    ) -> None:
+        """Makes a hidden indicator visible if a visible one was requested"""
+        if show_lineroot_obj(indicator):
+            return
+        if not plot_kwargs.get("plot", True) or plot_kwargs.get("plotskip", False):
+            return
+        indicator.plotinfo.plot = True
+        indicator.plotinfo.plotskip = False
+        indicator.plotinfo.plotname = plot_kwargs.get("plotname", "")
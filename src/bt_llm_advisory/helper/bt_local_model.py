@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from threading import Lock
+from typing import Any, Callable, get_args
+
+from llm_advisory.pydantic_models import LLMAdvisorSignal
+
+
+def get_signal_values(signal_model_type: type[LLMAdvisorSignal]) -> tuple[str, ...]:
+    """Returns the allowed values of the signal field of a signal model"""
+    signal_values = get_args(signal_model_type.model_fields["signal"].annotation)
+    return signal_values or ("none",)
+
+
+def get_advisor_input_hash(advisor: Any) -> str:
+    """Returns a hash of the current input of an advisor"""
+    input_hash = hashlib.sha256()
+    for part in (
+        advisor.advisor_name,
+        advisor.advisor_instructions,
+        advisor.advisor_messages_input.advisor_prompt,
+        advisor.advisor_messages_input.advisor_data,
+    ):
+        input_hash.update(str(part or "").encode("utf-8"))
+        input_hash.update(b"\x00")
+    return input_hash.hexdigest()
+
+
+class BacktraderLocalModel:
+    """Deterministic local stand-in for a model provider
+
+    Returns schema valid signals without network access. By default the
+    signal is derived from a hash of the advisor input, so identical inputs
+    always return the same signal. A rule can be provided which returns a
+    signal for an advisor, if the rule returns None the hash based signal is
+    used. Latency of a model call can be simulated in seconds."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rule: Callable[[Any], LLMAdvisorSignal | None] | None = None,
+        seed: str = "",
+    ) -> None:
+        self.latency = latency
+        self.rule = rule
+        self.seed = seed
+        self.calls = 0
+        # advisors may call the model from several threads
+        self._calls_lock = Lock()
+
+    def get_signal(self, advisor: Any) -> LLMAdvisorSignal:
+        """Returns a signal for the current input of an advisor"""
+        self._count_call()
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return self._get_signal(advisor)
+
+    async def aget_signal(self, advisor: Any) -> LLMAdvisorSignal:
+        """Returns a signal for the current input of an advisor without blocking"""
+        self._count_call()
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return self._get_signal(advisor)
+
+    def _count_call(self) -> None:
+        """Counts a call of the model"""
+        with self._calls_lock:
+            self.calls += 1
+
+    def _get_signal(self, advisor: Any) -> LLMAdvisorSignal:
+        """Returns a signal for the current input of an advisor"""
+        if self.rule is not None:
+            signal = self.rule(advisor)
+            if signal is not None:
+                return signal
+        input_hash = self.seed + get_advisor_input_hash(advisor)
+        signal_values = get_signal_values(advisor.signal_model_type)
+        values = self._get_signal_values(input_hash, signal_values)
+        if hasattr(advisor, "get_persona_names"):
+            # persona panels answer with a signal per persona
+            values["personas"] = [
+                {"persona": name}
+                | self._get_signal_values(input_hash + name, signal_values)
+                for name in advisor.get_persona_names()
+            ]
+        return advisor.signal_model_type.model_validate(values)
+
+    def _get_signal_values(
+        self, input_hash: str, signal_values: tuple[str, ...]
+    ) -> dict[str, Any]:
+        """Returns signal, confidence and reasoning derived from a hash"""
+        digest = hashlib.sha256(input_hash.encode("utf-8")).digest()
+        return {
+            "signal": signal_values[digest[0] % len(signal_values)],
+            "confidence": round(digest[1] / 255, 2),
+            "reasoning": f"Local model response {digest[:4].hex()}",
+        }
+
+
+class BacktraderReplayModel(BacktraderLocalModel):
+    """Local stand-in model replaying recorded signals
+
+    Signals are read from a JSONL file, every line contains the advisor name
+    and the signal, optionally with the input hash of the advisor:
+    ```
+    {"advisor": "BacktraderTrendAdvisor", "signal": {"signal": "bullish", ...}}
+    ```
+    Signals with an input hash are returned for matching inputs, all others
+    are returned per advisor in the recorded order. If no recorded signal is
+    available, the local model is used as fallback or a LookupError is raised
+    if strict is set."""
+
+    def __init__(self, path: str, strict: bool = False, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+        self.strict = strict
+        self._lock = Lock()
+        self._signals_by_hash: dict[str, dict[str, Any]] = {}
+        self._signals_by_advisor: defaultdict[str, deque[dict[str, Any]]] = (
+            defaultdict(deque)
+        )
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("input_hash"):
+                    self._signals_by_hash[record["input_hash"]] = record["signal"]
+                else:
+                    self._signals_by_advisor[record["advisor"]].append(record["signal"])
+
+    def _get_signal(self, advisor: Any) -> LLMAdvisorSignal:
+        """Returns the recorded signal for the current input of an advisor"""
+        with self._lock:
+            signal = self._signals_by_hash.get(get_advisor_input_hash(advisor))
+            recorded = self._signals_by_advisor.get(advisor.advisor_name)
+            if signal is None and recorded:
+                signal = recorded.popleft()
+        if signal is None:
+            if self.strict:
+                raise LookupError(
+                    f"No recorded signal available for {advisor.advisor_name}"
+                )
+            return super()._get_signal(advisor)
+        return advisor.signal_model_type.model_validate(signal)
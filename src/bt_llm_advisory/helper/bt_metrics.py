@@ -0,0 +1,158 @@
+import os
+import time
+from collections import deque
+from threading import Lock
+from typing import Callable
+
+from bt_llm_advisory.pydantic_models import BacktraderAdvisorMetrics
+
+METRICS_PHASES = ("data_generation", "prompt_compilation", "model_call", "response_parsing")
+
+
+def estimate_tokens(text: str) -> int:
+    """Returns a rough token estimate of a text (about 4 chars per token)"""
+    return (len(text) + 3) // 4
+
+
+class BacktraderAdvisoryMetrics:
+    """Collects timings of advisors per bar
+
+    Every advisor run creates a metrics record which is passed to all sinks.
+    A sink is any callable accepting a record, e.g. RingBufferMetricsSink or
+    PrometheusTextFileSink. The prompt size is counted in chars and tokens,
+    tokens are estimated if no token counter is provided.
+
+    Model providers parse their responses while they are invoked, so parsing
+    is part of the model call. The response parsing phase only covers the
+    (de)serialization of responses read from or written to the response
+    cache, it is 0 without a response cache."""
+
+    def __init__(
+        self,
+        sinks: list[Callable[[BacktraderAdvisorMetrics], None]],
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ) -> None:
+        self.sinks = sinks
+        self.token_counter = token_counter
+
+    def record(
+        self,
+        advisor_name: str,
+        bar: int,
+        prompt: str,
+        data_generation: float,
+        prompt_compilation: float,
+        model_call: float,
+        response_parsing: float,
+    ) -> BacktraderAdvisorMetrics:
+        """Creates a metrics record and passes it to all sinks"""
+        metrics = BacktraderAdvisorMetrics(
+            advisor_name=advisor_name,
+            bar=bar,
+            data_generation=data_generation,
+            prompt_compilation=prompt_compilation,
+            model_call=model_call,
+            response_parsing=response_parsing,
+            prompt_chars=len(prompt),
+            prompt_tokens=self.token_counter(prompt),
+        )
+        for sink in self.sinks:
+            sink(metrics)
+        return metrics
+
+
+class RingBufferMetricsSink:
+    """Keeps the latest metrics records in memory"""
+
+    def __init__(self, maxlen: int = 1000) -> None:
+        self._records: deque[BacktraderAdvisorMetrics] = deque(maxlen=maxlen)
+        self._lock = Lock()
+
+    def __call__(self, metrics: BacktraderAdvisorMetrics) -> None:
+        with self._lock:
+            self._records.append(metrics)
+
+    def get_records(
+        self, advisor_name: str | None = None
+    ) -> list[BacktraderAdvisorMetrics]:
+        """Returns the stored records, optionally only for a single advisor"""
+        with self._lock:
+            return [
+                record
+                for record in self._records
+                if advisor_name is None or record.advisor_name == advisor_name
+            ]
+
+
+class PrometheusTextFileSink:
+    """Writes aggregated metrics in the Prometheus text format to a file
+
+    The file is rewritten at most every write_interval seconds and can be
+    collected e.g. by the textfile collector of the node exporter."""
+
+    def __init__(self, path: str, write_interval: float = 5.0) -> None:
+        self.path = path
+        self.write_interval = write_interval
+        self._lock = Lock()
+        self._last_write = 0.0
+        self._runs: dict[str, int] = {}
+        self._seconds: dict[tuple[str, str], float] = {}
+        self._prompt_chars: dict[str, int] = {}
+        self._prompt_tokens: dict[str, int] = {}
+        self._last_bar = 0
+
+    def __call__(self, metrics: BacktraderAdvisorMetrics) -> None:
+        advisor_name = metrics.advisor_name
+        with self._lock:
+            self._runs[advisor_name] = self._runs.get(advisor_name, 0) + 1
+            for phase in METRICS_PHASES:
+                key = (advisor_name, phase)
+                self._seconds[key] = self._seconds.get(key, 0.0) + getattr(
+                    metrics, phase
+                )
+            self._prompt_chars[advisor_name] = (
+                self._prompt_chars.get(advisor_name, 0) + metrics.prompt_chars
+            )
+            self._prompt_tokens[advisor_name] = (
+                self._prompt_tokens.get(advisor_name, 0) + metrics.prompt_tokens
+            )
+            self._last_bar = max(self._last_bar, metrics.bar)
+            if time.monotonic() - self._last_write >= self.write_interval:
+                self._write()
+
+    def flush(self) -> None:
+        """Writes the current metrics to the file"""
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        lines = [
+            "# TYPE bt_llm_advisory_advisor_runs_total counter",
+            *(
+                f'bt_llm_advisory_advisor_runs_total{{advisor="{name}"}} {runs}'
+                for name, runs in self._runs.items()
+            ),
+            "# TYPE bt_llm_advisory_advisor_seconds_total counter",
+            *(
+                f'bt_llm_advisory_advisor_seconds_total{{advisor="{name}",phase="{phase}"}}'
+                f" {seconds:.6f}"
+                for (name, phase), seconds in self._seconds.items()
+            ),
+            "# TYPE bt_llm_advisory_prompt_chars_total counter",
+            *(
+                f'bt_llm_advisory_prompt_chars_total{{advisor="{name}"}} {chars}'
+                for name, chars in self._prompt_chars.items()
+            ),
+            "# TYPE bt_llm_advisory_prompt_tokens_total counter",
+            *(
+                f'bt_llm_advisory_prompt_tokens_total{{advisor="{name}"}} {tokens}'
+                for name, tokens in self._prompt_tokens.items()
+            ),
+            "# TYPE bt_llm_advisory_last_bar gauge",
+            f"bt_llm_advisory_last_bar {self._last_bar}",
+        ]
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self.path)
+        self._last_write = time.monotonic()
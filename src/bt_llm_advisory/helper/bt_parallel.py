@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+import backtrader as bt
+
+
+def get_broker_values(strategies: list[bt.Strategy]) -> list[float]:
+    """Returns the broker value of every strategy of a backtest"""
+    return [strategy.broker.getvalue() for strategy in strategies]
+
+
+def run_backtest(
+    create_cerebro: Callable[..., bt.Cerebro],
+    params: dict[str, Any],
+    get_result: Callable[[list[bt.Strategy]], Any] = get_broker_values,
+) -> Any:
+    """Runs a single backtest and returns its result"""
+    cerebro = create_cerebro(**params)
+    return get_result(cerebro.run())
+
+
+def run_parallel_backtests(
+    create_cerebro: Callable[..., bt.Cerebro],
+    params: list[dict[str, Any]],
+    get_result: Callable[[list[bt.Strategy]], Any] = get_broker_values,
+    max_workers: int | None = None,
+) -> list[Any]:
+    """Runs backtests with advisories in parallel processes
+
+    For every entry in params, create_cerebro is called with the entry as
+    keyword arguments in a worker process, e.g. with a symbol or strategy
+    params. create_cerebro needs to create the advisory, so every backtest
+    uses its own advisory and advisor state is isolated. Responses are shared
+    between processes by using a response cache with the same path.
+
+    create_cerebro and get_result need to be picklable, e.g. module level
+    functions. get_result receives the strategies returned by cerebro.run
+    and returns a picklable result. Results are returned in the order of
+    params."""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(run_backtest, create_cerebro, backtest_params, get_result)
+            for backtest_params in params
+        ]
+        return [future.result() for future in futures]
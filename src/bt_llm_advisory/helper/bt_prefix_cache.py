@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable
+
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+
+PREFIX_BOUNDARY_MARKER = "<!-- prompt-cache-boundary -->"
+
+
+class BacktraderPrefixLayout:
+    """Layout of advisor data for provider prompt caching
+
+    Providers with prompt caching reuse the longest byte-identical prefix of
+    a prompt. Artefacts which did not change since the first bar, e.g. the
+    strategy description, are placed first, followed by all artefacts which
+    changed. Once an artefact changed it stays in the changing part, so the
+    order of artefacts is stable. If a boundary marker is set, it is placed
+    between both parts, e.g. for providers or proxies setting cache
+    breakpoints at a marker."""
+
+    def __init__(self, boundary_marker: str | None = None) -> None:
+        self.boundary_marker = boundary_marker
+        self._stable: dict[str, Any] = {}
+        self._changed: set[str] = set()
+
+    def split(
+        self, artefacts: list[LLMAdvisorDataArtefact]
+    ) -> tuple[list[LLMAdvisorDataArtefact], list[LLMAdvisorDataArtefact]]:
+        """Splits artefacts into stable and changing artefacts"""
+        stable, changing = [], []
+        for artefact in artefacts:
+            description = artefact.description
+            if description not in self._changed:
+                if description not in self._stable:
+                    self._stable[description] = artefact.artefact
+                elif self._stable[description] != artefact.artefact:
+                    del self._stable[description]
+                    self._changed.add(description)
+            if description in self._changed:
+                changing.append(artefact)
+            else:
+                stable.append(artefact)
+        return stable, changing
+
+    def reset(self) -> None:
+        """Drops the stable and changed artefacts before a new run"""
+        self._stable = {}
+        self._changed = set()
+
+    def compile(
+        self,
+        artefacts: list[LLMAdvisorDataArtefact],
+        compile_artefacts: Callable[[list[LLMAdvisorDataArtefact]], str],
+    ) -> str:
+        """Compiles artefacts with stable artefacts first"""
+        stable, changing = self.split(artefacts)
+        response = [compile_artefacts(part) for part in (stable, changing) if part]
+        if self.boundary_marker is not None and stable and changing:
+            response.insert(1, self.boundary_marker)
+        return "\n\n".join(response)
+
+
+class BacktraderPrefixCacheSimulator:
+    """Simulates a provider prompt cache to report prefix hit ratios
+
+    Prompts are split into blocks and every block is identified by a hash of
+    all blocks up to it, like provider and inference server prompt caches.
+    The leading blocks of a prompt which were seen before, by any advisor,
+    are counted as cached if they are at least min_prefix chars long. The
+    cache holds max_blocks blocks, the least recently used are evicted.
+    Sizes are counted in chars, about 4 chars are a token."""
+
+    def __init__(
+        self,
+        block_size: int = 256,
+        min_prefix: int = 4096,
+        max_blocks: int = 100000,
+    ) -> None:
+        self.block_size = block_size
+        self.min_prefix = min_prefix
+        self.max_blocks = max_blocks
+        self._blocks: OrderedDict[int, None] = OrderedDict()
+        self._stats: dict[str, dict[str, int]] = {}
+        self._lock = Lock()
+
+    def record(self, advisor_name: str, prompt: str) -> int:
+        """Records the prompt of an advisor, returns the number of cached chars"""
+        block_hash = 0
+        cached_blocks = 0
+        with self._lock:
+            for index, start in enumerate(range(0, len(prompt), self.block_size)):
+                block_hash = hash((block_hash, prompt[start : start + self.block_size]))
+                if block_hash in self._blocks:
+                    self._blocks.move_to_end(block_hash)
+                    if cached_blocks == index:
+                        cached_blocks += 1
+                else:
+                    self._blocks[block_hash] = None
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+            cached_chars = min(len(prompt), cached_blocks * self.block_size)
+            if cached_chars < self.min_prefix:
+                cached_chars = 0
+            stats = self._stats.setdefault(
+                advisor_name, {"requests": 0, "prompt_chars": 0, "cached_chars": 0}
+            )
+            stats["requests"] += 1
+            stats["prompt_chars"] += len(prompt)
+            stats["cached_chars"] += cached_chars
+        return cached_chars
+
+    def get_stats(self, advisor_name: str | None = None) -> dict[str, float]:
+        """Returns requests, prompt and cached chars and the hit ratio
+
+        Returns the stats of all advisors if no advisor name is set."""
+        with self._lock:
+            stats = [
+                advisor_stats
+                for name, advisor_stats in self._stats.items()
+                if advisor_name is None or name == advisor_name
+            ]
+            response = {
+                key: sum(advisor_stats[key] for advisor_stats in stats)
+                for key in ("requests", "prompt_chars", "cached_chars")
+            }
+        response["hit_ratio"] = (
+            response["cached_chars"] / response["prompt_chars"]
+            if response["prompt_chars"]
+            else 0.0
+        )
+        return response
@@ -0,0 +1,36 @@
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+
+class BacktraderPromptBuilder:
+    """Incremental compilation of advisor data
+
+    Every artefact is compiled on its own with compile_data_artefacts. The
+    compiled artefacts are kept until they are compiled again and artefacts
+    which did not change are reused, so on every bar only changed artefacts
+    are compiled, e.g. tables of data feeds and indicators with a new bar.
+    Tables of resampled data feeds, their indicators and strategy data
+    which did not change are reused. The result is the same as compiling
+    all artefacts at once."""
+
+    def __init__(self) -> None:
+        self._compiled: dict[str, tuple[LLMAdvisorDataArtefact, str]] = {}
+
+    def compile(self, artefacts: list[LLMAdvisorDataArtefact]) -> str:
+        """Compiles artefacts into the data of an advisor prompt"""
+        compiled = {}
+        response = []
+        for artefact in artefacts:
+            previous_artefact, data = self._compiled.get(
+                artefact.description, (None, None)
+            )
+            if previous_artefact != artefact:
+                data = compile_data_artefacts([artefact])
+            compiled[artefact.description] = (artefact, data)
+            response.append(data)
+        self._compiled.update(compiled)
+        return "\n\n".join(response)
+
+    def reset(self) -> None:
+        """Drops the compiled artefacts before a new run"""
+        self._compiled = {}
@@ -0,0 +1,262 @@
+import math
+from typing import Any, Callable, Hashable
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactOutputMode,
+)
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+from bt_llm_advisory.helper.bt_metrics import estimate_tokens
+
+
+def round_value(value: Any, precision: int) -> Any:
+    """Rounds a float to a number of significant digits"""
+    if not isinstance(value, float) or not math.isfinite(value) or value == 0:
+        return value
+    digits = precision - int(math.floor(math.log10(abs(value)))) - 1
+    return round(value, digits)
+
+
+def format_markdown_value(value: Any) -> str:
+    """Formats a single value of a markdown table"""
+    if value is None:
+        return ""
+    return str(value).replace("|", "\\|")
+
+
+def format_markdown_row(values: tuple[Any, ...]) -> str:
+    """Formats a row of a markdown table"""
+    return f"| {' | '.join(map(format_markdown_value, values))} |"
+
+
+def is_table_artefact(artefact: LLMAdvisorDataArtefact) -> bool:
+    """Returns True if an artefact is a table with records"""
+    return (
+        artefact.output_mode == LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE
+        and isinstance(artefact.artefact, list)
+        and len(artefact.artefact) > 0
+        and all(isinstance(record, dict) for record in artefact.artefact)
+    )
+
+
+class BacktraderPromptCompactor:
+    """Compacts the data of an advisor to fit into a token budget
+
+    The data is compacted in stages until the compiled data fits into the
+    budget:
+
+    1. Numeric values are rounded to a number of significant digits
+    2. Tables sharing the same datetime column are merged into one table,
+       so the datetime column and table headers are only sent once
+    3. Older rows are downsampled, the most recent rows are always kept
+    4. The most recent rows are truncated
+
+    Stages are only applied if the data is above the budget, so data within
+    the budget is sent unchanged. While compacting, the size of the data is
+    estimated as the sum of the tokens of its artefacts and table rows, which
+    are counted only once, so the data is not compiled again for every
+    step. A candidate within the estimated budget is compiled to check that
+    it fits, otherwise compacting continues with the next step."""
+
+    def __init__(
+        self,
+        max_tokens: int,
+        precision: int = 6,
+        keep_recent: int = 10,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.precision = precision
+        self.keep_recent = keep_recent
+        self.token_counter = token_counter
+
+    def compact(
+        self, artefacts: list[LLMAdvisorDataArtefact]
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns the artefacts compacted to fit into the token budget"""
+        if self._fits(artefacts):
+            return artefacts
+        tokens: dict[Hashable, tuple[Any, int]] = {}
+        artefacts = self.round_values(artefacts)
+        if self._is_within_budget(artefacts, tokens):
+            return artefacts
+        artefacts = self.merge_tables(artefacts)
+        if self._is_within_budget(artefacts, tokens):
+            return artefacts
+        max_rows = max((self._get_rows(artefact) for artefact in artefacts), default=0)
+        if max_rows == 0:
+            # only tables can be compacted further
+            return artefacts
+        step = 2
+        while step < max_rows:
+            downsampled = self.downsample_tables(artefacts, step)
+            if self._is_within_budget(downsampled, tokens):
+                return downsampled
+            step *= 2
+        keep_recent = self.keep_recent
+        while keep_recent > 1:
+            keep_recent //= 2
+            truncated = self.truncate_tables(artefacts, keep_recent)
+            if self._is_within_budget(truncated, tokens):
+                return truncated
+        return self.truncate_tables(artefacts, 1)
+
+    def round_values(
+        self, artefacts: list[LLMAdvisorDataArtefact]
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns artefacts with numeric table values rounded"""
+        response = []
+        for artefact in artefacts:
+            if is_table_artefact(artefact):
+                artefact = artefact.model_copy(
+                    update={
+                        "artefact": [
+                            {
+                                k: round_value(v, self.precision)
+                                for k, v in record.items()
+                            }
+                            for record in artefact.artefact
+                        ]
+                    }
+                )
+            response.append(artefact)
+        return response
+
+    def merge_tables(
+        self, artefacts: list[LLMAdvisorDataArtefact]
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns artefacts with tables sharing a datetime column merged
+
+        Tables are only merged if their columns do not overlap, the merged
+        table is placed at the position of the first table."""
+        response: list[LLMAdvisorDataArtefact] = []
+        merged: dict[tuple, int] = {}
+        for artefact in artefacts:
+            if not is_table_artefact(artefact) or "datetime" not in artefact.artefact[0]:
+                response.append(artefact)
+                continue
+            key = tuple(record.get("datetime") for record in artefact.artefact)
+            index = merged.get(key)
+            if index is not None:
+                target = response[index]
+                columns = set(target.artefact[0].keys()) - {"datetime"}
+                if columns.isdisjoint(set(artefact.artefact[0].keys()) - {"datetime"}):
+                    response[index] = target.model_copy(
+                        update={
+                            "description": (
+                                f"{target.description}, {artefact.description}"
+                            ),
+                            "artefact": [
+                                {**target_record, **record}
+                                for target_record, record in zip(
+                                    target.artefact, artefact.artefact
+                                )
+                            ],
+                        }
+                    )
+                    continue
+            merged.setdefault(key, len(response))
+            response.append(artefact)
+        return response
+
+    def downsample_tables(
+        self, artefacts: list[LLMAdvisorDataArtefact], step: int
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns artefacts with older table rows downsampled
+
+        The most recent rows are kept, of the older rows only every n-th row
+        is kept."""
+        response = []
+        for artefact in artefacts:
+            if is_table_artefact(artefact) and len(artefact.artefact) > self.keep_recent:
+                # records are ordered with the latest values first
+                records = artefact.artefact
+                artefact = artefact.model_copy(
+                    update={
+                        "description": (
+                            f"{artefact.description} (rows older than"
+                            f" {self.keep_recent} bars sampled every {step} bars)"
+                        ),
+                        "artefact": records[: self.keep_recent]
+                        + records[self.keep_recent :][step - 1 :: step],
+                    }
+                )
+            response.append(artefact)
+        return response
+
+    def truncate_tables(
+        self, artefacts: list[LLMAdvisorDataArtefact], rows: int
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns artefacts with only the most recent table rows"""
+        response = []
+        for artefact in artefacts:
+            if is_table_artefact(artefact) and len(artefact.artefact) > rows:
+                artefact = artefact.model_copy(
+                    update={"artefact": artefact.artefact[:rows]}
+                )
+            response.append(artefact)
+        return response
+
+    def _fits(self, artefacts: list[LLMAdvisorDataArtefact]) -> bool:
+        """Returns True if the compiled artefacts fit into the budget"""
+        return self.token_counter(compile_data_artefacts(artefacts)) <= self.max_tokens
+
+    def _is_within_budget(
+        self,
+        artefacts: list[LLMAdvisorDataArtefact],
+        tokens: dict[Hashable, tuple[Any, int]],
+    ) -> bool:
+        """Returns True if the artefacts fit into the budget
+
+        The compiled artefacts are only checked if their estimated tokens fit
+        into the budget."""
+        if self._get_tokens(artefacts, tokens) > self.max_tokens:
+            return False
+        return self._fits(artefacts)
+
+    def _get_tokens(
+        self,
+        artefacts: list[LLMAdvisorDataArtefact],
+        tokens: dict[Hashable, tuple[Any, int]],
+    ) -> int:
+        """Returns the estimated tokens of the compiled artefacts
+
+        Tokens of artefacts, table headers and table rows are stored in
+        tokens, so unchanged parts are not counted again."""
+
+        def count(key: Hashable, part: Any, compile_part: Callable[[], str]) -> int:
+            # parts are kept with their tokens, so ids are not reused
+            if key not in tokens:
+                tokens[key] = (part, self.token_counter(compile_part()))
+            return tokens[key][1]
+
+        response = 0
+        for artefact in artefacts:
+            if not is_table_artefact(artefact):
+                response += count(
+                    id(artefact),
+                    artefact,
+                    lambda: compile_data_artefacts([artefact]),
+                )
+                continue
+            columns = tuple(artefact.artefact[0].keys())
+            response += count(
+                (artefact.description, columns),
+                None,
+                lambda: (
+                    f"{artefact.description}\n{format_markdown_row(columns)}\n"
+                    f"|{' --- |' * len(columns)}"
+                ),
+            )
+            for record in artefact.artefact:
+                response += count(
+                    id(record),
+                    record,
+                    lambda: format_markdown_row(tuple(record.values())),
+                )
+        return response
+
+    def _get_rows(self, artefact: LLMAdvisorDataArtefact) -> int:
+        """Returns the number of rows of a table artefact"""
+        return len(artefact.artefact) if is_table_artefact(artefact) else 0
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from threading import Lock
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    """Wakes a call waiting for a permit"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class BacktraderRateLimiter:
+    """Rate limiter for model calls of the asyncio advisory
+
+    Limits the number of concurrent calls and the number of calls per
+    second. Can be used in any event loop, e.g. when the advisory is run
+    with asyncio.run on every bar, permits and the call rate are kept across
+    loops. Permits can be released from any thread, so a permit can be held
+    until a model call running in an executor thread ends, even if the loop
+    awaiting it is already closed."""
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        requests_per_second: float | None = None,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self._lock = Lock()
+        self._active = 0
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._next_request = 0.0
+
+    async def __aenter__(self) -> "BacktraderRateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    async def acquire(self) -> None:
+        """Waits for a permit and the rate slot of a call
+
+        Every acquired permit needs to be released with release."""
+        if self.max_concurrency:
+            await self._acquire_permit()
+        try:
+            if self.requests_per_second:
+                with self._lock:
+                    now = time.monotonic()
+                    wait = self._next_request - now
+                    self._next_request = max(now, self._next_request) + (
+                        1 / self.requests_per_second
+                    )
+                if wait > 0:
+                    await asyncio.sleep(wait)
+        except BaseException:
+            # a call cancelled while waiting for its rate slot frees its permit
+            self.release()
+            raise
+
+    def release(self) -> None:
+        """Releases the permit of a call, can be called from any thread"""
+        if not self.max_concurrency:
+            return
+        with self._lock:
+            self._active -= 1
+            waiters, self._waiters = self._waiters, []
+        # all waiters try again, waiters of closed loops are gone
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass
+
+    async def _acquire_permit(self) -> None:
+        """Waits until less than max_concurrency calls are running"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._active < self.max_concurrency:
+                    self._active += 1
+                    return
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
@@ -0,0 +1,167 @@
+import hashlib
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Any
+
+RESPONSE_CACHE_PATH = ".bt_llm_advisory_cache.sqlite"
+RESPONSE_CACHE_MAX_SIZE = 100 * 1024 * 1024
+
+
+class BacktraderResponseCache:
+    """Disk backed cache for advisor responses
+
+    Responses are stored in a SQLite database, so they are available across
+    runs and processes. If the stored responses exceed max_size bytes, the
+    least recently used responses are evicted. The total size is kept in the
+    database, so inserts do not need to scan all responses and the size is
+    shared by all processes. The cache can be pickled and
+    is shared by all processes using the same path, every process opens its
+    own connection."""
+
+    def __init__(
+        self,
+        path: str = RESPONSE_CACHE_PATH,
+        max_size: int = RESPONSE_CACHE_MAX_SIZE,
+    ) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._connect()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path, "max_size": self.max_size}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def _connect(self) -> None:
+        """Opens the connection of the current process"""
+        self._lock = Lock()
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        # allows readers while another process is writing
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access"
+                " ON responses (last_access)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses_size ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " size INTEGER NOT NULL)"
+            )
+            # caches created without a size are summed up once
+            self._connection.execute(
+                "INSERT OR IGNORE INTO responses_size (id, size)"
+                " SELECT 0, COALESCE(SUM(size), 0) FROM responses"
+            )
+
+    @staticmethod
+    def get_key(*parts: str | None) -> str:
+        """Returns a cache key for the given parts"""
+        key = hashlib.sha256()
+        for part in parts:
+            key.update((part or "").encode("utf-8"))
+            key.update(b"\x00")
+        return key.hexdigest()
+
+    def _check_process(self) -> None:
+        """Reconnects if the cache is used in a forked process"""
+        if self._pid != os.getpid():
+            self._connect()
+
+    def get(self, key: str) -> str | None:
+        """Returns a cached response, None if not available"""
+        self._check_process()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """Stores a response, evicts least recently used responses if needed"""
+        self._check_process()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._connection:
+            # the size is updated first, so the transaction is started before
+            # reading the size of a replaced response
+            self._connection.execute(
+                "UPDATE responses_size SET size = size + ?"
+                " - COALESCE((SELECT size FROM responses WHERE key = ?), 0)",
+                (size, key),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            (total_size,) = self._connection.execute(
+                "SELECT size FROM responses_size"
+            ).fetchone()
+            if total_size > self.max_size:
+                self._evict(total_size)
+
+    def _evict(self, total_size: int) -> None:
+        """Evicts least recently used responses until max_size is reached"""
+        evicted_keys = []
+        cursor = self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        )
+        for key, size in cursor:
+            if total_size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            total_size -= size
+        cursor.close()
+        self._connection.executemany(
+            "DELETE FROM responses WHERE key = ?", evicted_keys
+        )
+        self._connection.execute("UPDATE responses_size SET size = ?", (total_size,))
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns hit and miss counters and the current cache size"""
+        self._check_process()
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT (SELECT COUNT(*) FROM responses), size FROM responses_size"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size": size,
+        }
+
+    def clear(self) -> None:
+        """Removes all cached responses"""
+        self._check_process()
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self._connection.execute("UPDATE responses_size SET size = 0")
+
+    def close(self) -> None:
+        """Closes the cache"""
+        with self._lock:
+            self._connection.close()
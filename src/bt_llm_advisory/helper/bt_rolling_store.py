@@ -0,0 +1,176 @@
+import math
+from threading import RLock
+from typing import Hashable
+
+import backtrader as bt
+import numpy as np
+
+from bt_llm_advisory.helper.bt_data_generation import (
+    BacktraderIndicatorMetadata,
+    get_datetime_array,
+    get_line_array,
+)
+
+DATA_FEED_LINES = ("open", "high", "low", "close", "volume")
+
+
+def num2datetime64(value: float) -> np.datetime64:
+    """Converts a single backtrader datetime value like num2date_array"""
+    if not math.isfinite(value):
+        return np.datetime64("NaT")
+    days = math.floor(value)
+    microseconds = (days - 719163) * 86400000000 + round((value - days) * 86400e6)
+    remainder = microseconds % 1000000
+    if remainder < 10:
+        microseconds -= remainder
+    elif remainder > 999990:
+        microseconds += 1000000 - remainder
+    return np.datetime64(microseconds, "us")
+
+
+class BacktraderRollingBuffer:
+    """Ring buffer with the latest values of lines sharing a clock
+
+    Values are stored twice in an array of double size, so the latest values
+    are always available as a contiguous slice. On every access only the bars
+    which were added to the clock since the last access are read from the
+    lines."""
+
+    def __init__(
+        self,
+        clock: bt.LineRoot,
+        lines: dict[str, bt.LineBuffer],
+        size: int,
+    ) -> None:
+        self.clock = clock
+        self.lines = lines
+        self.size = size
+        self._line_list = list(lines.values())
+        self._column_index = {name: i for i, name in enumerate(lines)}
+        self._tz = getattr(clock.lines.datetime, "_tz", None)
+        self._clock_len = 0
+        self._count = 0
+        self._pos = 0
+        self._datetimes = np.full(2 * size, np.datetime64("NaT"), dtype="datetime64[us]")
+        self._values = np.full((2 * size, len(lines)), np.nan)
+
+    def update(self) -> None:
+        """Appends all bars added to the clock since the last update
+
+        The latest stored bar is read again, since the current bar of a
+        replayed or live resampled data feed is updated in place. If more
+        bars were added than the buffer holds or the clock was reset, the
+        buffer is reloaded from the lines."""
+        clock_len = len(self.clock)
+        new_bars = clock_len - self._clock_len
+        if new_bars < 0 or new_bars >= self.size:
+            self._count = self._pos = 0
+            new_bars = min(clock_len, self.size)
+        bars = new_bars + min(self._count, 1)
+        if bars == 0:
+            return
+        start = self._pos + new_bars - bars
+        if bars <= 2 and self._tz is None:
+            # common case of one new bar, avoids numpy overhead for single values
+            datetime_line = self.clock.lines.datetime
+            for ago in range(1 - bars, 1):
+                datetime = num2datetime64(datetime_line[ago])
+                values = [line[ago] for line in self._line_list]
+                index = (start + bars - 1 + ago) % self.size
+                for offset in (0, self.size):
+                    self._datetimes[index + offset] = datetime
+                    self._values[index + offset] = values
+        else:
+            datetime = get_datetime_array(self.clock.lines.datetime, bars)
+            values = np.column_stack(
+                [get_line_array(line, bars) for line in self._line_list]
+            )
+            index = (start + np.arange(bars)) % self.size
+            for offset in (0, self.size):
+                self._datetimes[index + offset] = datetime
+                self._values[index + offset] = values
+        self._pos = (self._pos + new_bars) % self.size
+        self._count = min(self.size, self._count + new_bars)
+        self._clock_len = clock_len
+
+    def get_columns(self, size: int, names: list[str]) -> dict[str, np.ndarray]:
+        """Returns the latest values of the lines in ascending order
+
+        Returned arrays are copies, so they stay valid on later bars."""
+        size = min(size, self._count)
+        start = self._pos + self.size - size
+        end = self._pos + self.size
+        columns = {"datetime": self._datetimes[start:end].copy()}
+        for name in names:
+            columns[name] = self._values[start:end, self._column_index[name]].copy()
+        return columns
+
+
+class BacktraderRollingStore:
+    """Incremental store for data feed and indicator data
+
+    Keeps a ring buffer per data feed and indicator, which is updated with
+    the bars added since the last access. Generating a lookback window costs
+    a copy of the window instead of reading every value from the lines, the
+    window also stays available if lines only keep a limited number of bars.
+    The store can be updated on every bar by calling update, e.g. in next
+    and prenext of the strategy, otherwise it catches up on access."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._buffers: dict[Hashable, BacktraderRollingBuffer] = {}
+        self._lock = RLock()
+
+    def update(self) -> None:
+        """Updates all buffers with the bars added since the last update"""
+        with self._lock:
+            for buffer in self._buffers.values():
+                buffer.update()
+
+    def get_data_feed_columns(
+        self,
+        data_feed: bt.DataBase,
+        lookback_period: int,
+        only_close: bool = False,
+        add_volume: bool = True,
+    ) -> dict[str, np.ndarray]:
+        """Returns data feed columns in ascending order"""
+        line_names = ["close"] if only_close else ["open", "high", "low", "close"]
+        if add_volume:
+            line_names.append("volume")
+        buffer = self._get_buffer(
+            ("data_feed", id(data_feed)),
+            lookback_period,
+            lambda size: BacktraderRollingBuffer(
+                data_feed,
+                {name: getattr(data_feed.lines, name) for name in DATA_FEED_LINES},
+                size,
+            ),
+        )
+        return buffer.get_columns(lookback_period, line_names)
+
+    def get_indicator_columns(
+        self, indicator: bt.IndicatorBase | bt.LinesOperation, lookback_period: int
+    ) -> dict[str, np.ndarray]:
+        """Returns indicator columns in ascending order"""
+
+        def create_buffer(size: int) -> BacktraderRollingBuffer:
+            metadata = BacktraderIndicatorMetadata(indicator)
+            return BacktraderRollingBuffer(metadata.data_feed, metadata.lines, size)
+
+        buffer = self._get_buffer(
+            ("indicator", id(indicator)), lookback_period, create_buffer
+        )
+        return buffer.get_columns(lookback_period, list(buffer.lines.keys()))
+
+    def _get_buffer(
+        self, key: Hashable, lookback_period: int, create_buffer
+    ) -> BacktraderRollingBuffer:
+        """Returns an updated buffer, creates or grows it if needed"""
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None or buffer.size < lookback_period:
+                buffer = create_buffer(max(self.size, lookback_period))
+                self._buffers[key] = buffer
+            buffer.update()
+            return buffer
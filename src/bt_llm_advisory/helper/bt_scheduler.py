@@ -0,0 +1,141 @@
+from typing import Callable
+
+import backtrader as bt
+
+
+class BacktraderAdvisorTrigger:
+    """Base class for triggers deciding when an advisor runs
+
+    A trigger is checked once per bar. If no trigger of an advisor is due,
+    the advisor reuses its last signal."""
+
+    def is_due(self, strategy: bt.Strategy, notifications: dict[str, int]) -> bool:
+        """Returns True if the advisor should run on the current bar"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Resets the state of the trigger before a new run"""
+        pass
+
+
+class EveryNBars(BacktraderAdvisorTrigger):
+    """Triggers every n bars of the strategy"""
+
+    def __init__(self, bars: int) -> None:
+        self.bars = bars
+        self._last_bar: int | None = None
+
+    def is_due(self, strategy: bt.Strategy, notifications: dict[str, int]) -> bool:
+        bar = len(strategy)
+        if self._last_bar is not None and bar - self._last_bar < self.bars:
+            return False
+        self._last_bar = bar
+        return True
+
+    def reset(self) -> None:
+        self._last_bar = None
+
+
+class OnDataFeedBar(BacktraderAdvisorTrigger):
+    """Triggers when a data feed has a new bar
+
+    The data feed can be set by index, name or the data feed itself."""
+
+    def __init__(self, data_feed: int | str | bt.DataBase) -> None:
+        self.data_feed = data_feed
+        self._last_len: int | None = None
+
+    def is_due(self, strategy: bt.Strategy, notifications: dict[str, int]) -> bool:
+        data_feed = self.data_feed
+        if isinstance(data_feed, int):
+            data_feed = strategy.datas[data_feed]
+        elif isinstance(data_feed, str):
+            data_feed = strategy.getdatabyname(data_feed)
+        data_len = len(data_feed)
+        if data_len == self._last_len:
+            return False
+        self._last_len = data_len
+        return True
+
+    def reset(self) -> None:
+        self._last_len = None
+
+
+class OnNotification(BacktraderAdvisorTrigger):
+    """Triggers when the strategy received an order or trade notification
+
+    Requires the strategy to forward notifications to the advisory."""
+
+    def __init__(self, *kinds: str) -> None:
+        self.kinds = kinds or ("order", "trade")
+        self._last_counts: dict[str, int] = {}
+
+    def is_due(self, strategy: bt.Strategy, notifications: dict[str, int]) -> bool:
+        due = False
+        for kind in self.kinds:
+            count = notifications.get(kind, 0)
+            if count != self._last_counts.get(kind, 0):
+                due = True
+            self._last_counts[kind] = count
+        return due
+
+    def reset(self) -> None:
+        self._last_counts = {}
+
+
+class OnThresholdCross(BacktraderAdvisorTrigger):
+    """Triggers when a line crosses a threshold
+
+    The line is usually an indicator or a line of an indicator. The direction
+    can be "up", "down" or "both"."""
+
+    def __init__(
+        self, line: bt.LineRoot, threshold: float, direction: str = "both"
+    ) -> None:
+        if direction not in ("up", "down", "both"):
+            raise ValueError(f"Unknown direction: {direction}")
+        self.line = line
+        self.threshold = threshold
+        self.direction = direction
+        self._last_value: float | None = None
+
+    def is_due(self, strategy: bt.Strategy, notifications: dict[str, int]) -> bool:
+        value = self.line[0]
+        last_value, self._last_value = self._last_value, value
+        if last_value is None:
+            return False
+        crossed_up = last_value <= self.threshold < value
+        crossed_down = last_value >= self.threshold > value
+        if self.direction == "up":
+            return crossed_up
+        if self.direction == "down":
+            return crossed_down
+        return crossed_up or crossed_down
+
+    def reset(self) -> None:
+        self._last_value = None
+
+
+class OnCondition(BacktraderAdvisorTrigger):
+    """Triggers when a condition returns True for the strategy"""
+
+    def __init__(self, condition: Callable[[bt.Strategy], bool]) -> None:
+        self.condition = condition
+
+    def is_due(self, strategy: bt.Strategy, notifications: dict[str, int]) -> bool:
+        return bool(self.condition(strategy))
+
+
+def is_schedule_due(
+    schedule: list[BacktraderAdvisorTrigger] | None,
+    strategy: bt.Strategy,
+    notifications: dict[str, int],
+) -> bool:
+    """Returns True if any trigger of a schedule is due
+
+    All triggers are checked, so every trigger can update its state. Without a
+    schedule the advisor runs on every bar."""
+    if not schedule:
+        return True
+    due = [trigger.is_due(strategy, notifications) for trigger in schedule]
+    return any(due)
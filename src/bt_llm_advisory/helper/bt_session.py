@@ -0,0 +1,124 @@
+import json
+from collections import deque
+from threading import Lock
+from typing import Any
+
+import backtrader as bt
+
+from llm_advisory.pydantic_models import LLMAdvisorSignal
+
+from bt_llm_advisory.helper.bt_local_model import get_advisor_input_hash
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+
+class BacktraderAdvisorySession:
+    """Records and replays advisory sessions
+
+    When recording, every advisor run is appended as a json line to the
+    session file, containing the bar, the input hash of the advisor, the
+    signal and optionally the prompt and data. The advise of the advisory
+    advisor is recorded like any other signal:
+    ```
+    {"bar": 30, "datetime": "...", "advisor": "BacktraderTrendAdvisor", "input_hash": "...", "signal": {...}}
+    ```
+    When replaying, the recorded signals are returned by bar and advisor
+    without invoking the model. If validate is set, the input hash of the
+    advisor is compared with the recorded one and differences are collected
+    as divergences, if strict is set an exception is raised instead. Without
+    validation, the advisor data is not generated at all. Session files can
+    also be used with BacktraderReplayModel."""
+
+    def __init__(
+        self,
+        path: str,
+        replay: bool = False,
+        validate: bool = True,
+        strict: bool = False,
+        record_prompts: bool = True,
+    ) -> None:
+        self.path = path
+        self.replay = replay
+        self.validate = validate
+        self.strict = strict
+        self.record_prompts = record_prompts
+        self.divergences: list[dict[str, Any]] = []
+        self._lock = Lock()
+        self._file = None
+        self._records: dict[tuple[int, str], deque[dict[str, Any]]] = {}
+        if replay:
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    self._records.setdefault(
+                        (record["bar"], record["advisor"]), deque()
+                    ).append(record)
+
+    def record(
+        self,
+        advisor: Any,
+        snapshot: BacktraderStrategySnapshot,
+        signal: LLMAdvisorSignal | None,
+    ) -> None:
+        """Appends the signal of an advisor for the bar of a snapshot"""
+        if signal is None:
+            return
+        bar, bar_datetime = snapshot.key
+        record = {
+            "bar": bar,
+            "datetime": bt.num2date(bar_datetime).isoformat() if bar else None,
+            "advisor": advisor.advisor_name,
+            "input_hash": get_advisor_input_hash(advisor),
+            "signal": signal.model_dump(mode="json"),
+        }
+        if self.record_prompts:
+            record["prompt"] = advisor.advisor_messages_input.advisor_prompt
+            record["data"] = advisor.advisor_messages_input.advisor_data
+        line = json.dumps(record)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def get_signal(
+        self, advisor: Any, snapshot: BacktraderStrategySnapshot
+    ) -> LLMAdvisorSignal | None:
+        """Returns the recorded signal of an advisor for the bar of a snapshot
+
+        If validate is set, the prompt of the advisor needs to be compiled
+        before. Returns None if no signal was recorded."""
+        bar = snapshot.key[0]
+        with self._lock:
+            records = self._records.get((bar, advisor.advisor_name))
+            record = records.popleft() if records else None
+        if record is None:
+            if self.strict:
+                raise LookupError(
+                    f"No recorded signal for {advisor.advisor_name} on bar {bar}"
+                )
+            return None
+        if self.validate:
+            input_hash = get_advisor_input_hash(advisor)
+            if input_hash != record.get("input_hash"):
+                divergence = {
+                    "bar": bar,
+                    "advisor": advisor.advisor_name,
+                    "recorded_hash": record.get("input_hash"),
+                    "input_hash": input_hash,
+                }
+                if self.strict:
+                    raise ValueError(
+                        f"Advisor input diverged from session: {divergence}"
+                    )
+                with self._lock:
+                    self.divergences.append(divergence)
+        return advisor.signal_model_type.model_validate(record["signal"])
+
+    def close(self) -> None:
+        """Closes the session file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
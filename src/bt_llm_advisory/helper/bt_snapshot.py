@@ -0,0 +1,360 @@
+from threading import RLock
+from typing import Any, Callable, Hashable
+
+import backtrader as bt
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactOutputMode,
+)
+
+from bt_llm_advisory.pydantic_models import (
+    BacktraderStrategyData,
+    BacktraderBrokerData,
+    BacktraderPositionsData,
+    BacktraderDataFeedData,
+    BacktraderIndicatorData,
+)
+from bt_llm_advisory.helper.bt_data_generation import (
+    BacktraderMetadataIndex,
+    generate_strategy_data,
+    generate_broker_data,
+    generate_positions_data,
+    generate_data_feed_data,
+    generate_merged_data_feed_data,
+    generate_indicator_data,
+    group_indicators_by_data_feed,
+)
+from bt_llm_advisory.helper.bt_rolling_store import BacktraderRollingStore
+
+
+def get_snapshot_key(strategy: bt.Strategy) -> tuple[int, float]:
+    """Returns the key of the current bar of a strategy
+
+    The key consists of the strategy length and the datetime of the current bar."""
+    return (len(strategy), strategy.datetime[0] if len(strategy) else float("nan"))
+
+
+class BacktraderStrategySnapshot:
+    """Per-bar snapshot of strategy data
+
+    The snapshot is created once per advisory call and shared by all advisors.
+    All data is generated lazily on first access and reused afterwards, so
+    every feed and indicator is walked only once per bar regardless of the
+    number of advisors using it. If a rolling store is provided, data feed
+    and indicator data is taken from the store instead of the lines. Names
+    and visibility of data feeds and indicators are taken from the metadata
+    index, which is shared by all snapshots of a strategy if provided."""
+
+    def __init__(
+        self,
+        strategy: bt.Strategy,
+        data_lookback_period: int,
+        indicator_lookback_period: int,
+        rolling_store: BacktraderRollingStore | None = None,
+        metadata_index: BacktraderMetadataIndex | None = None,
+    ) -> None:
+        self.strategy = strategy
+        self.data_lookback_period = data_lookback_period
+        self.indicator_lookback_period = indicator_lookback_period
+        self.rolling_store = rolling_store
+        self.metadata_index = metadata_index or BacktraderMetadataIndex(strategy)
+        self.key = get_snapshot_key(strategy)
+        self._cache: dict[Hashable, Any] = {}
+        self._due_advisors: dict[str, bool] = {}
+        # advisors may run concurrently, generation is done only once
+        self._lock = RLock()
+
+    def _get_cached(self, key: Hashable, generate: Callable[[], Any]) -> Any:
+        """Returns a cached value, generates it if not yet available"""
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = generate()
+            return self._cache[key]
+
+    def get_strategy_data(self) -> BacktraderStrategyData:
+        """Returns strategy data"""
+        return self._get_cached(
+            ("strategy",),
+            lambda: generate_strategy_data(
+                self.strategy, metadata_index=self.metadata_index
+            ),
+        )
+
+    def get_broker_data(self) -> BacktraderBrokerData:
+        """Returns broker data"""
+        return self._get_cached(
+            ("broker",), lambda: generate_broker_data(self.strategy)
+        )
+
+    def get_positions_data(self) -> BacktraderPositionsData:
+        """Returns positions data"""
+        return self._get_cached(
+            ("positions",), lambda: generate_positions_data(self.strategy)
+        )
+
+    def get_data_feed_data(
+        self,
+        data_feed: bt.DataBase,
+        lookback_period: int | None = None,
+        only_close: bool = False,
+        add_volume: bool = True,
+    ) -> BacktraderDataFeedData:
+        """Returns data feed data, uses the default lookback period if not set"""
+        if lookback_period is None:
+            lookback_period = self.data_lookback_period
+        return self._get_cached(
+            ("data_feed", id(data_feed), lookback_period, only_close, add_volume),
+            lambda: generate_data_feed_data(
+                data_feed=data_feed,
+                lookback_period=lookback_period,
+                only_close=only_close,
+                add_volume=add_volume,
+                rolling_store=self.rolling_store,
+                metadata_index=self.metadata_index,
+            ),
+        )
+
+    def get_indicator_data(
+        self,
+        indicator: bt.IndicatorBase | bt.LinesOperation,
+        lookback_period: int | None = None,
+    ) -> BacktraderIndicatorData:
+        """Returns indicator data, uses the default lookback period if not set"""
+        if lookback_period is None:
+            lookback_period = self.indicator_lookback_period
+        return self._get_cached(
+            ("indicator", id(indicator), lookback_period),
+            lambda: generate_indicator_data(
+                indicator=indicator,
+                lookback_period=lookback_period,
+                rolling_store=self.rolling_store,
+                metadata_index=self.metadata_index,
+            ),
+        )
+
+    def get_merged_data_feed_data(
+        self,
+        data_feed: bt.DataBase,
+        indicators: list[bt.IndicatorBase | bt.LinesOperation],
+        lookback_period: int | None = None,
+        only_close: bool = False,
+        add_volume: bool = True,
+    ) -> BacktraderDataFeedData:
+        """Returns data feed data joined with the data of its indicators"""
+        if lookback_period is None:
+            lookback_period = self.data_lookback_period
+        return self._get_cached(
+            (
+                "merged_data_feed",
+                id(data_feed),
+                tuple(id(indicator) for indicator in indicators),
+                lookback_period,
+                only_close,
+                add_volume,
+            ),
+            lambda: generate_merged_data_feed_data(
+                data_feed=data_feed,
+                indicators=indicators,
+                lookback_period=lookback_period,
+                only_close=only_close,
+                add_volume=add_volume,
+                rolling_store=self.rolling_store,
+                metadata_index=self.metadata_index,
+            ),
+        )
+
+    def get_visible_indicators(self) -> list[bt.IndicatorBase | bt.LinesOperation]:
+        """Returns all visible indicators of the strategy"""
+        return self.metadata_index.get_visible_indicators()
+
+    def get_strategy_artefacts(self) -> list[LLMAdvisorDataArtefact]:
+        """Returns strategy data artefacts"""
+        strategy_data = self.get_strategy_data()
+        return [
+            LLMAdvisorDataArtefact(
+                description="Strategy", artefact=strategy_data.description
+            )
+        ]
+
+    def get_broker_artefacts(self) -> list[LLMAdvisorDataArtefact]:
+        """Returns broker and positions data artefacts"""
+        broker_data = self.get_broker_data()
+        positions_data = self.get_positions_data()
+        response = []
+        response.append(
+            LLMAdvisorDataArtefact(
+                description="Broker",
+                artefact=broker_data.description,
+                output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+            )
+        )
+        for data_name, position in positions_data.positions.items():
+            response.append(
+                LLMAdvisorDataArtefact(
+                    description=f"Position {data_name}",
+                    artefact=position.model_dump(),
+                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+                )
+            )
+        return response
+
+    def get_data_feed_artefacts(
+        self,
+        data_feeds: list[bt.DataBase] | None = None,
+        lookback_period: int | None = None,
+        only_close: bool = False,
+        add_volume: bool = True,
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns data feed artefacts, uses all data feeds if not set"""
+        if data_feeds is None:
+            data_feeds = self.strategy.datas
+        response = []
+        for data_feed in data_feeds:
+            data_feed_data = self.get_data_feed_data(
+                data_feed,
+                lookback_period=lookback_period,
+                only_close=only_close,
+                add_volume=add_volume,
+            )
+            response.append(
+                LLMAdvisorDataArtefact(
+                    description=f"DataFeed {data_feed_data.name}",
+                    artefact=data_feed_data.data,
+                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+                )
+            )
+        return response
+
+    def get_indicator_artefacts(
+        self, lookback_period: int | None = None
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns artefacts for all visible indicators of the strategy"""
+        indicators_data = {}
+        for indicator in self.get_visible_indicators():
+            indicator_data = self.get_indicator_data(indicator, lookback_period)
+            indicators_data[indicator_data.name] = indicator_data
+        return [
+            LLMAdvisorDataArtefact(
+                description=f"Indicator {indicator_data.name}",
+                artefact=indicator_data.data,
+                output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+            )
+            for indicator_data in indicators_data.values()
+        ]
+
+    def get_merged_data_feed_artefacts(
+        self,
+        data_feeds: list[bt.DataBase] | None = None,
+        lookback_period: int | None = None,
+        only_close: bool = False,
+        add_volume: bool = True,
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns one artefact per data feed containing its indicators
+
+        Indicators are joined as columns to the data feed they are running
+        on, so the datetime column and table header are sent only once per
+        data feed. If all data feeds are used, indicators which are not
+        running on a data feed of the strategy are returned separately."""
+        indicator_groups = group_indicators_by_data_feed(
+            self.get_visible_indicators(), self.metadata_index
+        )
+        response = []
+        for data_feed in data_feeds or self.strategy.datas:
+            data_feed_data = self.get_merged_data_feed_data(
+                data_feed,
+                indicator_groups.pop(id(data_feed), []),
+                lookback_period=lookback_period,
+                only_close=only_close,
+                add_volume=add_volume,
+            )
+            response.append(
+                LLMAdvisorDataArtefact(
+                    description=f"DataFeed {data_feed_data.name} with indicators",
+                    artefact=data_feed_data.data,
+                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+                )
+            )
+        if data_feeds is not None:
+            return response
+        for indicators in indicator_groups.values():
+            for indicator in indicators:
+                indicator_data = self.get_indicator_data(indicator)
+                response.append(
+                    LLMAdvisorDataArtefact(
+                        description=f"Indicator {indicator_data.name}",
+                        artefact=indicator_data.data,
+                        output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+                    )
+                )
+        return response
+
+    def get_default_strategy_data(
+        self, merge_indicator_tables: bool = False
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns default strategy data
+
+        Contains strategy, broker, positions, data feed and indicator data.
+        If merge_indicator_tables is set, indicators are joined to the tables
+        of their data feeds."""
+        if merge_indicator_tables:
+            return self._get_cached(
+                ("default_strategy_data", True),
+                lambda: (
+                    self.get_strategy_artefacts()
+                    + self.get_broker_artefacts()
+                    + self.get_merged_data_feed_artefacts()
+                ),
+            )
+        return self._get_cached(
+            ("default_strategy_data", False),
+            lambda: (
+                self.get_strategy_artefacts()
+                + self.get_broker_artefacts()
+                + self.get_data_feed_artefacts()
+                + self.get_indicator_artefacts()
+            ),
+        )
+
+    def get_advisor_data(self, advisor: Any) -> list[LLMAdvisorDataArtefact]:
+        """Returns the data of an advisor for this snapshot
+
+        The data is generated by the advisor only once per snapshot and is
+        stored by the advisor name."""
+        return self._get_cached(
+            ("advisor", advisor.advisor_name), lambda: advisor.get_advisor_data(self)
+        )
+
+    def get_advisor_fingerprint(self, advisor: Any) -> dict[str, float] | None:
+        """Returns the fingerprint of an advisor for this snapshot
+
+        The fingerprint is taken only once per snapshot and is stored by the
+        advisor name, so the change gate is updated with the fingerprint it
+        was checked with, even if the strategy continued meanwhile."""
+        return self._get_cached(
+            ("fingerprint", advisor.advisor_name),
+            lambda: advisor.get_fingerprint(self),
+        )
+
+    def set_advisor_due(self, advisor: Any, due: bool) -> None:
+        """Sets if an advisor is scheduled to run for this snapshot"""
+        self._due_advisors[advisor.advisor_name] = due
+
+    def is_advisor_due(self, advisor: Any) -> bool:
+        """Returns True if an advisor is scheduled to run for this snapshot"""
+        return self._due_advisors.get(advisor.advisor_name, True)
+
+    def prime(self, advisors: list[Any]) -> None:
+        """Generates the data of all advisors which need to run
+
+        After priming, advisors can read their data from the snapshot without
+        accessing the strategy, e.g. while the strategy continues in another
+        thread."""
+        for advisor in advisors:
+            if not hasattr(advisor, "get_advisor_data"):
+                continue
+            if hasattr(advisor, "needs_update") and not advisor.needs_update(self):
+                continue
+            self.get_advisor_data(advisor)
+            if getattr(advisor, "change_gate", None) is not None:
+                self.get_advisor_fingerprint(advisor)
@@ -1,8 +1,14 @@
-from typing import Literal
+from functools import cached_property
+from typing import Any, Literal
 from datetime import datetime
 
-from pydantic import BaseModel, Field
-from llm_advisory.pydantic_models import LLMAdvisorSignal, LLMAdvisorAdvise
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+from llm_advisory.pydantic_models import (
+    LLMAdvisorSignal,
+    LLMAdvisorAdvise,
+    LLMAdvisorState,
+)
 
 
 class BacktraderLLMAdvisorSignal(LLMAdvisorSignal):
@@ -14,6 +20,20 @@ class BacktraderLLMAdvisorSignal(LLMAdvisorSignal):
     )
 
 
+class BacktraderPersonaSignal(BacktraderLLMAdvisorSignal):
+    """Signal of a single persona of a persona panel"""
+
+    persona: str = Field(description="Name of the persona giving the signal")
+
+
+class BacktraderPersonaPanelSignal(BacktraderLLMAdvisorSignal):
+    """Signal of a persona panel containing the signals of all personas"""
+
+    personas: list[BacktraderPersonaSignal] = Field(
+        default=[], description="Signal of every persona of the panel"
+    )
+
+
 class BacktraderLLMAdvisorAdvise(LLMAdvisorAdvise):
     """Signal for state advise"""
 
@@ -56,20 +76,54 @@ class BacktraderPositionsData(BaseModel):
     positions: dict[str, BacktraderPositionData]
 
 
-class BacktraderDataFeedData(BaseModel):
+class BacktraderColumnarData(BaseModel):
+    """Model for columnar data
+
+    Values are stored as arrays per column in ascending order, records are
+    only created when data is accessed."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    columns: dict[str, np.ndarray] = Field(exclude=True)
+
+    @computed_field
+    @cached_property
+    def data(self) -> list[dict[str, datetime | float]]:
+        """Records with the latest values first"""
+        column_names = list(self.columns.keys())
+        column_values = [column.tolist() for column in self.columns.values()]
+        records = [dict(zip(column_names, row)) for row in zip(*column_values)]
+        records.reverse()
+        return records
+
+    def get_column(self, name: str) -> np.ndarray:
+        """Returns the values of a column in ascending order"""
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getstate__(self) -> dict[Any, Any]:
+        # records are not pickled, they can be created from the columns
+        state = super().__getstate__()
+        state["__dict__"] = {
+            k: v for k, v in state["__dict__"].items() if k != "data"
+        }
+        return state
+
+
+class BacktraderDataFeedData(BacktraderColumnarData):
     """Model for data feed data"""
 
     name: str
     instrument: str
     resolution: str
-    data: list[dict[str, datetime | float]]
 
 
-class BacktraderIndicatorData(BaseModel):
+class BacktraderIndicatorData(BacktraderColumnarData):
     """Model for indicator data"""
 
     name: str
-    data: list[dict[str, datetime | float]]
 
 
 class BacktraderAnalyzerData(BaseModel):
@@ -77,3 +131,31 @@ class BacktraderAnalyzerData(BaseModel):
 
     name: str
     data: list[dict[str, datetime | float]]
+
+
+class BacktraderAdvisorMetrics(BaseModel):
+    """Model for timings of an advisor on a single bar"""
+
+    advisor_name: str
+    bar: int
+    data_generation: float = Field(description="Seconds to generate the data")
+    prompt_compilation: float = Field(description="Seconds to compile the prompt")
+    model_call: float = Field(description="Seconds to invoke the model")
+    response_parsing: float = Field(
+        description="Seconds to (de)serialize the response for the response cache"
+    )
+    prompt_chars: int
+    prompt_tokens: int
+
+
+class BacktraderAdvisoryResponse(BaseModel):
+    """Model for responses of the asyncio advisory"""
+
+    state: LLMAdvisorState
+    advise: LLMAdvisorSignal | None
+    missing_advisors: list[str] = Field(
+        default=[], description="Advisors without a signal for the bar"
+    )
+    stale_advisors: list[str] = Field(
+        default=[], description="Missing advisors with a reused signal"
+    )
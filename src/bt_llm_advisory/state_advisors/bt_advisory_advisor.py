@@ -1,18 +1,12 @@
 from llm_advisory.state_advisors import AdvisoryAdvisor
 from llm_advisory.pydantic_models import (
     LLMAdvisorDataArtefact,
-    LLMAdvisorDataArtefactOutputMode,
     LLMAdvisorUpdateStateData,
 )
-from llm_advisory.helper.llm_prompt import compile_data_artefacts
 
 from bt_llm_advisory import BacktraderLLMAdvisor
 from bt_llm_advisory.pydantic_models import BacktraderLLMAdvisorAdvise
-from bt_llm_advisory.helper.bt_data_generation import (
-    get_strategy_from_state,
-    generate_broker_data,
-    generate_positions_data,
-)
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
 
 ADVISOR_INSTRUCTIONS = """
 You are an Advisory Advisor, an AI advisor agent specialized in generating a trading advisory
@@ -56,29 +50,48 @@ class BacktraderAdvisoryAdvisor(AdvisoryAdvisor, BacktraderLLMAdvisor):
         self, state: LLMAdvisorUpdateStateData
     ) -> LLMAdvisorUpdateStateData:
         # TODO broker + strategy data
-        self.advisor_messages_input.advisor_data = compile_data_artefacts(
-            self._get_broker_and_positions_data(state)
-        )
-        return super()._update_state(state)
-
-    def _get_broker_and_positions_data(self, state) -> list[LLMAdvisorDataArtefact]:
-        strategy = get_strategy_from_state(state)
-        broker_data = generate_broker_data(strategy)
-        positions_data = generate_positions_data(strategy)
-        response = [self._get_signal_data(state)]
-        response.append(
-            LLMAdvisorDataArtefact(
-                description="Broker",
-                artefact=broker_data.description,
-                output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
-            )
-        )
-        for data_name, position in positions_data.positions.items():
-            response.append(
+        return BacktraderLLMAdvisor.update_state(self, state)
+
+    async def aupdate_state(
+        self, state: LLMAdvisorUpdateStateData
+    ) -> LLMAdvisorUpdateStateData:
+        return await BacktraderLLMAdvisor.aupdate_state(self, state)
+
+    def get_update_data(
+        self, state: LLMAdvisorUpdateStateData, snapshot: BacktraderStrategySnapshot
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns advisor signals with broker and positions data
+
+        Advisors which did not answer in time are added as missing advisors."""
+        advisor_data = [self._get_signal_data(state)]
+        missing_advisors = state.metadata.get("missing_advisors")
+        if missing_advisors:
+            stale_advisors = state.metadata.get("stale_advisors") or []
+            advisor_data.append(
                 LLMAdvisorDataArtefact(
-                    description=f"Position {data_name}",
-                    artefact=position.model_dump(),
-                    output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+                    description=(
+                        "Advisors without a signal for the latest data, signals"
+                        " of stale advisors are from earlier data with a"
+                        " reduced confidence"
+                    ),
+                    artefact={
+                        "missing_advisors": [
+                            name
+                            for name in missing_advisors
+                            if name not in stale_advisors
+                        ],
+                        "stale_advisors": stale_advisors,
+                    },
                 )
             )
-        return response
+        return advisor_data + snapshot.get_advisor_data(self)
+
+    def get_update_prompt(self, state: LLMAdvisorUpdateStateData) -> str:
+        """Returns the prompt of the advisory advisor, which does not change"""
+        return self.advisor_messages_input.advisor_prompt
+
+    def get_advisor_data(
+        self, snapshot: BacktraderStrategySnapshot
+    ) -> list[LLMAdvisorDataArtefact]:
+        """Returns broker and positions data"""
+        return snapshot.get_broker_artefacts()
@@ -0,0 +1,100 @@
+import asyncio
+import math
+
+import backtrader as bt
+import numpy as np
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+
+from synthetic import create_cerebro
+
+
+class CountingModel(BacktraderLocalModel):
+    """Local model counting the runs per advisor"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.advisor_calls = {}
+
+    def get_signal(self, advisor):
+        name = advisor.advisor_name
+        self.advisor_calls[name] = self.advisor_calls.get(name, 0) + 1
+        return super().get_signal(advisor)
+
+
+class AdvisoryStrategy(bt.Strategy):
+    """Strategy getting the advisory on every bar
+
+    The advisory is created outside of the strategy and passed as param, like
+    an advisory shared by several runs."""
+
+    params = (
+        ("bt_llm_advisory", None),
+        ("use_asyncio", False),
+        ("advisory_kwargs", None),
+    )
+
+    def __init__(self):
+        self.bt_llm_advisory = self.p.bt_llm_advisory
+        self.bt_llm_advisory.init_strategy(self)
+        self.responses = []
+
+    def next(self):
+        kwargs = self.p.advisory_kwargs or {}
+        if self.p.use_asyncio:
+            response = asyncio.run(self.bt_llm_advisory.aget_advisory(**kwargs))
+        else:
+            response = self.bt_llm_advisory.get_advisory(**kwargs)
+        self.responses.append(response)
+
+    def stop(self):
+        self.bt_llm_advisory.stop()
+
+    def get_signals(self, advisor_name: str) -> list:
+        """Returns the signals of an advisor on every bar"""
+        return [response.state.signals[advisor_name] for response in self.responses]
+
+
+def run_advisory(
+    bt_llm_advisory: BacktraderLLMAdvisory,
+    bars: int,
+    num_data_feeds: int = 1,
+    **kwargs,
+) -> AdvisoryStrategy:
+    """Runs a backtest on synthetic data getting the advisory on every bar"""
+    cerebro = create_cerebro(
+        AdvisoryStrategy,
+        num_data_feeds,
+        bars,
+        bt_llm_advisory=bt_llm_advisory,
+        **kwargs,
+    )
+    return cerebro.run()[0]
+
+
+def records_equal(a: list[dict], b: list[dict]) -> bool:
+    """Returns True if two lists of records contain the same values"""
+    return len(a) == len(b) and all(
+        record.keys() == other.keys()
+        and all(
+            value == other[name]
+            or (
+                isinstance(value, float)
+                and math.isnan(value)
+                and math.isnan(other[name])
+            )
+            for name, value in record.items()
+        )
+        for record, other in zip(a, b)
+    )
+
+
+def columns_equal(a, b) -> bool:
+    """Returns True if two columnar models contain the same values"""
+    if a.columns.keys() != b.columns.keys():
+        return False
+    return all(
+        np.array_equal(column, b.columns[name], equal_nan=column.dtype.kind == "f")
+        for name, column in a.columns.items()
+    )
@@ -0,0 +1,48 @@
+import logging
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.state_advisors import BacktraderAdvisoryAdvisor
+
+from conftest import run_advisory
+
+
+class FailingModel(BacktraderLocalModel):
+    """Local model failing for a single advisor
+
+    Records the data of the advisory advisor."""
+
+    def __init__(self):
+        super().__init__()
+        self.advisory_data = []
+
+    async def aget_signal(self, advisor):
+        if isinstance(advisor, BacktraderAdvisoryAdvisor):
+            self.advisory_data.append(advisor.advisor_messages_input.advisor_data)
+        if advisor.advisor_name == "Failing":
+            raise ValueError("invalid response")
+        return await super().aget_signal(advisor)
+
+
+def test_failing_advisor_is_missing(caplog):
+    local_model = FailingModel()
+    bt_llm_advisory = BacktraderLLMAdvisory(
+        advisors=[
+            BacktraderPersonaAdvisor("Failing", "failing persona"),
+            BacktraderPersonaAdvisor("Working", "working persona"),
+        ],
+        local_model=local_model,
+    )
+    with caplog.at_level(logging.ERROR, logger="bt_llm_advisory"):
+        strategy = run_advisory(bt_llm_advisory, 5, use_asyncio=True)
+    assert len(strategy.responses) == 5
+    for response in strategy.responses:
+        assert response.missing_advisors == ["Failing"]
+        assert "Working" in response.state.signals
+        assert "Failing" not in response.state.signals
+        assert response.advise is not None
+    assert sum("Advisor Failing failed" in r.message for r in caplog.records) == 5
+    # missing advisors are passed to the advisory advisor with the state
+    assert len(local_model.advisory_data) == 5
+    assert all("Failing" in data for data in local_model.advisory_data)
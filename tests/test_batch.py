@@ -0,0 +1,58 @@
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor, BacktraderTrendAdvisor
+from bt_llm_advisory.helper.bt_batch import BacktraderAdvisoryBatch
+from bt_llm_advisory.helper.bt_change_gate import BacktraderChangeGate
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_scheduler import EveryNBars
+
+from conftest import AdvisoryStrategy, run_advisory
+from synthetic import create_cerebro
+
+
+def create_advisory(
+    local_model: BacktraderLocalModel, batch: BacktraderAdvisoryBatch | None = None
+) -> BacktraderLLMAdvisory:
+    """Returns an advisory with a scheduled and a gated advisor"""
+    scheduled = BacktraderPersonaAdvisor("Scheduled", "scheduled persona")
+    scheduled.schedule = [EveryNBars(3)]
+    trend = BacktraderTrendAdvisor(short_ma_period=5, long_ma_period=10)
+    trend.change_gate = BacktraderChangeGate(
+        default_threshold=0.5, max_staleness=4, relative=True
+    )
+    return BacktraderLLMAdvisory(
+        advisors=[scheduled, trend, BacktraderPersonaAdvisor("Always", "persona")],
+        local_model=local_model,
+        batch=batch,
+    )
+
+
+# advisories are shared by the strategies of all runs and passes
+LOCAL_MODEL = BacktraderLocalModel()
+BT_LLM_ADVISORY = create_advisory(LOCAL_MODEL)
+BATCH = BacktraderAdvisoryBatch(max_workers=4)
+BATCH_MODEL = BacktraderLocalModel()
+BATCH_BT_LLM_ADVISORY = create_advisory(BATCH_MODEL, BATCH)
+
+
+def get_signals(strategy: AdvisoryStrategy) -> list[dict]:
+    """Returns the signals of all advisors on every bar"""
+    return [
+        {
+            name: (signal.signal, signal.confidence, signal.reasoning)
+            for name, signal in response.state.signals.items()
+        }
+        for response in strategy.responses
+    ]
+
+
+def test_batch_returns_signals_of_bar_by_bar_run():
+    strategy = run_advisory(BT_LLM_ADVISORY, 60)
+    calls = LOCAL_MODEL.calls
+    cerebro = create_cerebro(
+        AdvisoryStrategy, 1, 60, bt_llm_advisory=BATCH_BT_LLM_ADVISORY
+    )
+    batch_strategy = BATCH.run(cerebro)[0]
+    assert get_signals(batch_strategy) == get_signals(strategy)
+    assert BATCH.get_stats()["pending"] == 0
+    # every input is requested once, the advisory advisor on a later pass
+    assert BATCH_MODEL.calls == calls
@@ -0,0 +1,18 @@
+from bench_advisory import run_scenario
+
+
+def test_benchmark_scenario():
+    result = run_scenario(
+        num_data_feeds=2,
+        num_indicators=10,
+        lookback=5,
+        bars=0,
+        measure_bars=3,
+        allocations=True,
+    )
+    assert result["bars"] == 5 + 3 + 100
+    assert "advisory" in result["sections"]
+    assert "compile_data_artefacts" in result["sections"]
+    for summary in result["sections"].values():
+        assert 0 < summary["p50_ms"] <= summary["max_ms"]
+        assert summary["alloc_peak_bytes"] > 0
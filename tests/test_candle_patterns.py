@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderCandlePatternAdvisor
+from bt_llm_advisory.helper.bt_candle_patterns import (
+    detect_candle_patterns,
+    get_latest_candle_patterns,
+)
+
+from conftest import CountingModel, run_advisory
+
+
+def create_columns(candles: list[tuple[float, float, float, float]]):
+    columns = (np.array(values, dtype=float) for values in zip(*candles))
+    return dict(zip(("open", "high", "low", "close"), columns))
+
+
+@pytest.mark.parametrize(
+    "candles,pattern",
+    [
+        ([(10, 10.5, 8.5, 9), (9, 9.5, 7, 9.4)], "Hammer"),
+        ([(9, 9.2, 7.8, 8), (8, 10.5, 7.9, 10)], "Bullish Engulfing"),
+        ([(10, 10.2, 8, 10.05)], "Doji"),
+        ([(10, 10.1, 7.9, 8), (8, 8.2, 7.7, 7.9), (8, 9.8, 7.9, 9.6)], "Morning Star"),
+    ],
+)
+def test_detect_candle_patterns(candles, pattern):
+    assert pattern in get_latest_candle_patterns(create_columns(candles))
+
+
+def test_missing_values_never_match():
+    nan = np.nan
+    patterns = detect_candle_patterns(*create_columns([(nan, nan, nan, nan)]).values())
+    assert not any(matches.any() for matches in patterns.values())
+
+
+def run_candle_advisory(bars: int, **kwargs) -> tuple[list, CountingModel]:
+    """Returns the candle pattern signals on every bar and the local model"""
+    local_model = CountingModel()
+    bt_llm_advisory = BacktraderLLMAdvisory(
+        advisors=[BacktraderCandlePatternAdvisor(**kwargs)], local_model=local_model
+    )
+    strategy = run_advisory(bt_llm_advisory, bars)
+    return strategy.get_signals("BacktraderCandlePatternAdvisor"), local_model
+
+
+def test_pattern_detection_is_opt_in():
+    signals, local_model = run_candle_advisory(50)
+    runs = local_model.advisor_calls["BacktraderCandlePatternAdvisor"]
+    assert runs == len(signals)
+
+
+def test_detected_patterns_skip_the_model():
+    signals, local_model = run_candle_advisory(200, detect_patterns=True)
+    runs = local_model.advisor_calls.get("BacktraderCandlePatternAdvisor", 0)
+    local_signals = [
+        signal for signal in signals if signal.reasoning.startswith("No Pattern")
+    ]
+    assert local_signals
+    assert all(signal.signal == "none" for signal in local_signals)
+    assert runs <= len(signals) - len(local_signals)
@@ -0,0 +1,131 @@
+import math
+
+import backtrader as bt
+
+from bt_llm_advisory import BacktraderLLMAdvisor, BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderTrendAdvisor
+from bt_llm_advisory.helper.bt_change_gate import BacktraderChangeGate
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+
+from conftest import CountingModel, run_advisory
+from synthetic import create_cerebro
+
+BARS = 300
+MAX_STALENESS = 10
+
+
+def create_trend_change_gate() -> BacktraderChangeGate:
+    """Returns the change gate of the README example"""
+    return BacktraderChangeGate(
+        thresholds={
+            "close": 0.01,
+            "short_ma": 0.005,
+            "long_ma": 0.003,
+            "ma_diff": 1.0,
+            "adx": 0.1,
+            "atr": 0.1,
+            "rsi": 0.1,
+            "bb_width": 0.1,
+            "linreg_slope": 1.0,
+        },
+        relative=True,
+        max_staleness=MAX_STALENESS,
+    )
+
+
+def test_change_gate_skips_unchanged_fingerprint():
+    gate = BacktraderChangeGate(thresholds={"rsi": 2.0}, max_staleness=5)
+    assert gate.is_changed({"rsi": 50.0}, 1)
+    gate.update({"rsi": 50.0}, 1)
+    assert not gate.is_changed({"rsi": 51.5}, 2)
+    assert gate.is_changed({"rsi": 52.5}, 2)
+    assert gate.is_changed({"rsi": 51.5}, 6)
+    assert gate.is_changed({"rsi": 50.0, "adx": 20.0}, 2)
+    assert gate.is_changed({"rsi": math.nan}, 2)
+    # features without a threshold use the default threshold of 0.0
+    gate.update({"rsi": 50.0, "adx": 20.0}, 2)
+    assert gate.is_changed({"rsi": 50.0, "adx": 20.1}, 3)
+    assert not gate.is_changed({"rsi": 50.0, "adx": 20.0}, 3)
+    gate.reset()
+    assert gate.is_changed({"rsi": 50.0, "adx": 20.0}, 3)
+
+
+def test_change_gate_relative_thresholds():
+    gate = BacktraderChangeGate(thresholds={"close": 0.01, "slope": 1.0}, relative=True)
+    gate.update({"close": 100.0, "slope": 0.5}, 1)
+    assert not gate.is_changed({"close": 100.9, "slope": 0.9}, 2)
+    assert gate.is_changed({"close": 101.1, "slope": 0.9}, 2)
+    # a sign change exceeds a relative threshold of 1.0
+    assert gate.is_changed({"close": 100.0, "slope": -0.1}, 2)
+
+
+def test_trend_advisor_gate_skips_runs():
+    trend_advisor = BacktraderTrendAdvisor()
+    trend_advisor.change_gate = create_trend_change_gate()
+    local_model = CountingModel()
+    bt_llm_advisory = BacktraderLLMAdvisory(
+        advisors=[trend_advisor], local_model=local_model
+    )
+    signals = run_advisory(bt_llm_advisory, BARS).get_signals("BacktraderTrendAdvisor")
+    runs = local_model.advisor_calls["BacktraderTrendAdvisor"]
+    assert len(signals) / MAX_STALENESS <= runs < len(signals) * 0.8
+    assert all(signal is not None for signal in signals)
+
+
+class RecordingChangeGate(BacktraderChangeGate):
+    """Change gate recording the fingerprints of all runs"""
+
+    def __init__(self):
+        super().__init__(max_staleness=1)
+        self.updates = []
+
+    def update(self, fingerprint, bar):
+        self.updates.append((fingerprint, bar))
+        super().update(fingerprint, bar)
+
+
+class CloseAdvisor(BacktraderLLMAdvisor):
+    """Advisor with the live close of the strategy as fingerprint"""
+
+    def __init__(self):
+        super().__init__()
+        self.change_gate = RecordingChangeGate()
+        self.fingerprints = 0
+
+    def init_strategy(self, strategy):
+        self.data_feed = strategy.datas[0]
+
+    def get_fingerprint(self, snapshot):
+        self.fingerprints += 1
+        return {"close": self.data_feed.close[0]}
+
+
+class SubmittingStrategy(bt.Strategy):
+    def __init__(self):
+        self.advisor = CloseAdvisor()
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[self.advisor], local_model=BacktraderLocalModel(latency=0.01)
+        )
+        self.bt_llm_advisory.init_strategy(self)
+        self.closes = {}
+
+    def next(self):
+        self.closes[len(self)] = self.data.close[0]
+        if len(self) % 3 == 0:
+            # the advisory completes while the strategy is on later bars
+            self.handle = self.bt_llm_advisory.submit_advisory()
+        elif len(self) % 3 == 2 and len(self) > 2:
+            self.handle.result()
+
+    def stop(self):
+        self.bt_llm_advisory.stop()
+
+
+def test_change_gate_uses_fingerprint_of_snapshot():
+    strategy = create_cerebro(SubmittingStrategy, 1, 100).run()[0]
+    updates = strategy.advisor.change_gate.updates
+    assert len(updates) > 1
+    for fingerprint, bar in updates:
+        assert fingerprint == {"close": strategy.closes[bar]}
+    # taken once per snapshot for the check and the update of the gate
+    assert strategy.advisor.fingerprints <= len(strategy.closes)
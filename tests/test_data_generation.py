@@ -0,0 +1,72 @@
+import backtrader as bt
+import numpy as np
+
+from bt_llm_advisory.helper.bt_data_generation import (
+    generate_data_feed_data,
+    generate_indicator_data,
+    num2date_array,
+)
+
+from conftest import records_equal
+from synthetic import create_cerebro
+
+LOOKBACK = 20
+
+
+def get_records(lines: dict[str, bt.LineBuffer], clock: bt.LineRoot, size: int):
+    """Returns the records of the lines read value by value, latest first"""
+    return [
+        {
+            "datetime": bt.num2date(clock.lines.datetime[-ago]),
+            **{name: line[-ago] for name, line in lines.items()},
+        }
+        for ago in range(size)
+    ]
+
+
+class ExtractionStrategy(bt.Strategy):
+    def __init__(self):
+        self.bbands = bt.ind.BollingerBands(self.data, period=10)
+        self.compared = 0
+        self.differing = 0
+
+    def prenext(self):
+        self.next()
+
+    def next(self):
+        size = min(LOOKBACK, len(self))
+        data_feed_lines = {
+            name: getattr(self.data.lines, name)
+            for name in ("open", "high", "low", "close", "volume")
+        }
+        indicator_lines = {
+            f"BollingerBands[10, 2.0].{alias}": getattr(self.bbands, alias)
+            for alias in self.bbands.getlinealiases()
+        }
+        for data, expected in (
+            (
+                generate_data_feed_data(self.data, LOOKBACK).data,
+                get_records(data_feed_lines, self.data, size),
+            ),
+            (
+                generate_indicator_data(self.bbands, LOOKBACK).data,
+                get_records(indicator_lines, self.data, size),
+            ),
+        ):
+            self.compared += 1
+            self.differing += not records_equal(data, expected)
+
+
+def test_extracted_data_equals_values_of_lines():
+    strategy = create_cerebro(ExtractionStrategy, 1, 100).run()[0]
+    assert strategy.compared == 200
+    assert strategy.differing == 0
+
+
+def test_num2date_array_equals_num2date():
+    values = np.array(
+        [739000.0 + i / 1440 for i in range(2000)] + [739000.123456789, np.nan]
+    )
+    datetimes = num2date_array(values).tolist()
+    assert datetimes[:-1] == [bt.num2date(value) for value in values[:-1]]
+    assert datetimes[-1] is None
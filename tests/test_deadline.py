@@ -0,0 +1,57 @@
+import time
+
+import backtrader as bt
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+
+from synthetic import create_cerebro
+
+DEADLINE = 0.2
+LATENCY = 2.0
+
+
+class SlowModel:
+    """Model blocking a thread like model providers, except for the advise"""
+
+    def __init__(self):
+        self.local_model = BacktraderLocalModel()
+
+    def get_signal(self, advisor):
+        if advisor.advisor_name != "BacktraderAdvisoryAdvisor":
+            time.sleep(LATENCY)
+        return self.local_model.get_signal(advisor)
+
+
+class DeadlineStrategy(bt.Strategy):
+    def __init__(self):
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[
+                BacktraderPersonaAdvisor("Slow", "slow persona"),
+                BacktraderPersonaAdvisor("Slower", "slower persona"),
+            ],
+            local_model=SlowModel(),
+        )
+        self.bt_llm_advisory.init_strategy(self)
+        self.durations = []
+        self.responses = []
+
+    def next(self):
+        start = time.perf_counter()
+        self.responses.append(self.bt_llm_advisory.get_advisory(deadline=DEADLINE))
+        self.durations.append(time.perf_counter() - start)
+
+    def stop(self):
+        self.bt_llm_advisory.stop()
+
+
+def test_deadline_bounds_wall_clock_time():
+    start = time.perf_counter()
+    strategy = create_cerebro(DeadlineStrategy, 1, 3).run()[0]
+    assert len(strategy.durations) == 3
+    assert max(strategy.durations) < DEADLINE + 0.5
+    assert time.perf_counter() - start < LATENCY
+    for response in strategy.responses:
+        assert response.advise is not None
+        assert sorted(response.missing_advisors) == ["Slow", "Slower"]
@@ -0,0 +1,42 @@
+import backtrader as bt
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderTrendAdvisor
+from bt_llm_advisory.helper.bt_data_generation import show_lineroot_obj
+
+from synthetic import create_cerebro
+
+
+class RegistryStrategy(bt.Strategy):
+    def __init__(self):
+        self.rsi = bt.ind.RSI(self.data)
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[BacktraderTrendAdvisor(), BacktraderTrendAdvisor()]
+        )
+        self.bt_llm_advisory.init_strategy(self)
+        registry = self.bt_llm_advisory.indicator_registry
+        self.sma = self.bt_llm_advisory.get_indicator(bt.ind.SMA, self.data, period=50)
+        self.other_sma = self.bt_llm_advisory.get_indicator(
+            bt.ind.SMA, self.data, period=51
+        )
+        self.counts = (registry.created, registry.reused)
+        self.advisors = self.bt_llm_advisory.advisors
+
+    def next(self):
+        pass
+
+
+def test_identical_indicators_are_shared():
+    strategy = create_cerebro(RegistryStrategy, 1, 100).run()[0]
+    first, second = (advisor.indicators[strategy.data] for advisor in strategy.advisors)
+    # the rsi of the strategy is used by the advisors
+    assert first["rsi"] is strategy.rsi
+    for name in ("short_ma", "long_ma", "adx", "atr", "rsi", "linreg_slope"):
+        assert first[name] is second[name]
+    # the long moving average of the advisors is shown by the strategy
+    assert strategy.sma is first["long_ma"]
+    assert show_lineroot_obj(strategy.sma)
+    assert strategy.other_sma is not strategy.sma
+    # created by the first advisor except the rsi and the other sma, reused
+    # by the first advisor for the rsi, by the second advisor and for the sma
+    assert strategy.counts == (7, 9)
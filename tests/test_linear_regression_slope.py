@@ -0,0 +1,48 @@
+import backtrader as bt
+import numpy as np
+import pytest
+
+from bt_llm_advisory.advisors.bt_trend_advisor import LinearRegressionSlope
+
+from synthetic import SyntheticData, create_cerebro
+
+PERIOD = 10
+
+
+def get_slope(values: list[float]) -> float:
+    """Returns the slope of a linear regression computed from scratch"""
+    x = np.arange(len(values))
+    return np.polyfit(x, values, 1)[0]
+
+
+class SlopeStrategy(bt.Strategy):
+    def __init__(self):
+        self.slope = LinearRegressionSlope(self.data.close, period=PERIOD)
+        self.slopes = []
+        self.expected = []
+
+    def next(self):
+        self.slopes.append(self.slope[0])
+        self.expected.append(get_slope(self.data.close.get(size=PERIOD)))
+
+
+@pytest.mark.parametrize("runonce", [True, False])
+def test_slope_equals_regression(runonce, monkeypatch):
+    # recompute the running sums often to cover reseeding
+    monkeypatch.setattr(LinearRegressionSlope, "RESEED_INTERVAL", 50)
+    strategy = create_cerebro(SlopeStrategy, 1, 500).run(runonce=runonce)[0]
+    assert len(strategy.slopes) == 500 - PERIOD + 1
+    np.testing.assert_allclose(strategy.slopes, strategy.expected, atol=1e-9)
+
+
+def test_slope_of_replayed_bars_equals_regression():
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.replaydata(
+        SyntheticData(bars=300, timeframe=bt.TimeFrame.Minutes),
+        timeframe=bt.TimeFrame.Minutes,
+        compression=5,
+    )
+    cerebro.addstrategy(SlopeStrategy)
+    strategy = cerebro.run()[0]
+    assert len(strategy.slopes) > 300 - 5 * PERIOD
+    np.testing.assert_allclose(strategy.slopes, strategy.expected, atol=1e-9)
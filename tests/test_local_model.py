@@ -0,0 +1,60 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bt_llm_advisory import BacktraderLLMAdvisor
+from bt_llm_advisory.helper.bt_local_model import (
+    BacktraderLocalModel,
+    BacktraderReplayModel,
+)
+
+
+def create_advisor(name: str, data: str) -> BacktraderLLMAdvisor:
+    advisor = BacktraderLLMAdvisor()
+    advisor.advisor_name = name
+    advisor.advisor_messages_input.advisor_prompt = "prompt"
+    advisor.advisor_messages_input.advisor_data = data
+    return advisor
+
+
+def test_local_model_is_deterministic():
+    local_model = BacktraderLocalModel()
+    advisor = create_advisor("Advisor", "data")
+    signal = local_model.get_signal(advisor)
+    assert signal == BacktraderLocalModel().get_signal(advisor)
+    assert signal.signal in ("bullish", "bearish", "neutral", "none")
+    assert 0.0 <= signal.confidence <= 1.0
+    signals = {
+        local_model.get_signal(create_advisor("Advisor", f"data {i}")).signal
+        for i in range(50)
+    }
+    assert len(signals) > 1
+
+
+def test_local_model_counts_concurrent_calls():
+    local_model = BacktraderLocalModel()
+    advisor = create_advisor("Advisor", "data")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: local_model.get_signal(advisor), range(2000)))
+    assert local_model.calls == 2000
+
+
+def test_replay_model_returns_recorded_signals_in_order(tmp_path):
+    path = tmp_path / "signals.jsonl"
+    records = [
+        {"advisor": "Advisor", "signal": {"signal": signal, "confidence": 0.5}}
+        for signal in ("bullish", "bearish", "neutral")
+    ]
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    replay_model = BacktraderReplayModel(str(path), strict=True)
+    advisor = create_advisor("Advisor", "data")
+    assert [replay_model.get_signal(advisor).signal for _ in range(3)] == [
+        "bullish",
+        "bearish",
+        "neutral",
+    ]
+    with pytest.raises(LookupError):
+        replay_model.get_signal(advisor)
+    with pytest.raises(LookupError):
+        replay_model.get_signal(create_advisor("Other", "data"))
@@ -0,0 +1,59 @@
+import backtrader as bt
+
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+from synthetic import add_indicators, create_cerebro
+
+LOOKBACK = 10
+
+
+class MergedStrategy(bt.Strategy):
+    def __init__(self):
+        add_indicators(self, 6)
+        self.rsi_sma = bt.ind.SMA(bt.ind.RSI(self.datas[1]), period=3)
+        self.compared = 0
+        self.differing = 0
+        self.shorter = 0
+
+    def next(self):
+        if len(self) % 20:
+            return
+        snapshot = BacktraderStrategySnapshot(self, LOOKBACK, LOOKBACK)
+        # values of every column by datetime in the separate tables
+        columns = {}
+        for artefact in (
+            snapshot.get_data_feed_artefacts() + snapshot.get_indicator_artefacts()
+        ):
+            table = artefact.description.split(" ", 1)[1]
+            for record in artefact.artefact:
+                for column, value in record.items():
+                    if column != "datetime":
+                        key = (table, column, record["datetime"])
+                        columns[key] = value
+        for artefact in snapshot.get_merged_data_feed_artefacts():
+            data_feed = artefact.description.removesuffix(" with indicators")
+            data_feed = data_feed.removeprefix("DataFeed ")
+            assert len(artefact.artefact) == LOOKBACK
+            for row in artefact.artefact:
+                for column, value in row.items():
+                    if column == "datetime":
+                        continue
+                    table = column.rsplit(".", 1)[0] if "." in column else data_feed
+                    expected = columns.pop((table, column, row["datetime"]))
+                    self.compared += 1
+                    self.differing += value != expected and value == value
+        # all columns of the separate tables are merged
+        assert not columns
+        self.shorter += len(
+            compile_data_artefacts(snapshot.get_default_strategy_data(True))
+        ) < len(compile_data_artefacts(snapshot.get_default_strategy_data()))
+
+
+def test_merged_tables_join_indicators_on_datetime():
+    strategy = create_cerebro(MergedStrategy, 2, 100).run()[0]
+    # 5 bars with 10 rows of 2 data feeds with 5 lines and 5 indicator lines
+    assert strategy.compared == 5 * 10 * 2 * (5 + 5)
+    assert strategy.differing == 0
+    assert strategy.shorter == 5
@@ -0,0 +1,49 @@
+import backtrader as bt
+
+from bt_llm_advisory.helper import bt_data_generation
+from bt_llm_advisory.helper.bt_data_generation import (
+    BacktraderMetadataIndex,
+    get_data_feed_name,
+    get_indicator_name,
+)
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+from synthetic import add_indicators, create_cerebro
+
+
+class IndexStrategy(bt.Strategy):
+    def __init__(self):
+        add_indicators(self, 5)
+        self.hidden = bt.ind.SMA(self.data, period=3, plotskip=True)
+        self.metadata_index = BacktraderMetadataIndex(self)
+
+    def next(self):
+        snapshot = BacktraderStrategySnapshot(
+            self, 10, 10, metadata_index=self.metadata_index
+        )
+        snapshot.get_default_strategy_data()
+        snapshot.get_default_strategy_data(merge_indicator_tables=True)
+
+
+def test_metadata_is_resolved_once(monkeypatch):
+    resolved = []
+
+    def get_name(indicator):
+        resolved.append(indicator)
+        return get_indicator_name(indicator)
+
+    monkeypatch.setattr(bt_data_generation, "get_indicator_name", get_name)
+    strategy = create_cerebro(IndexStrategy, 2, 50).run()[0]
+    metadata_index = strategy.metadata_index
+    indicators = strategy.getindicators()
+    # every indicator is resolved once, the hidden indicator is not shown
+    assert len(resolved) == len(indicators) == 6
+    assert metadata_index.get_visible_indicators() == indicators[:5]
+    for indicator in indicators:
+        metadata = metadata_index.get_indicator_metadata(indicator)
+        assert metadata.name == get_indicator_name(indicator)
+        assert metadata.data_feed is indicator.data
+    for data_feed in strategy.datas:
+        metadata = metadata_index.get_data_feed_metadata(data_feed)
+        assert metadata.name == get_data_feed_name(data_feed)
+    assert len(resolved) == 6
@@ -0,0 +1,38 @@
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_metrics import (
+    BacktraderAdvisoryMetrics,
+    PrometheusTextFileSink,
+    RingBufferMetricsSink,
+)
+
+from conftest import run_advisory
+
+LATENCY = 0.01
+
+
+def test_metrics_are_recorded_per_advisor_and_bar(tmp_path):
+    ring_buffer = RingBufferMetricsSink()
+    path = tmp_path / "metrics.prom"
+    prometheus = PrometheusTextFileSink(str(path), write_interval=0.0)
+    metrics = BacktraderAdvisoryMetrics(sinks=[ring_buffer, prometheus])
+    bt_llm_advisory = BacktraderLLMAdvisory(
+        advisors=[
+            BacktraderPersonaAdvisor("First", "first persona"),
+            BacktraderPersonaAdvisor("Second", "second persona"),
+        ],
+        local_model=BacktraderLocalModel(latency=LATENCY),
+        metrics=metrics,
+    )
+    run_advisory(bt_llm_advisory, 10)
+    records = ring_buffer.get_records("First")
+    assert [record.bar for record in records] == list(range(1, 11))
+    for record in records:
+        assert record.model_call >= LATENCY
+        assert record.data_generation >= 0 and record.prompt_compilation >= 0
+        assert record.prompt_tokens == (record.prompt_chars + 3) // 4
+    assert len(ring_buffer.get_records()) == 30
+    text = path.read_text()
+    assert 'bt_llm_advisory_advisor_runs_total{advisor="First"} 10' in text
+    assert "bt_llm_advisory_last_bar 10" in text
@@ -0,0 +1,53 @@
+import backtrader as bt
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_parallel import run_backtest, run_parallel_backtests
+
+from synthetic import SyntheticData
+
+BARS = 50
+
+
+class TradingStrategy(bt.Strategy):
+    def __init__(self):
+        self.local_model = BacktraderLocalModel()
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[BacktraderPersonaAdvisor("Persona", "persona")],
+            local_model=self.local_model,
+        )
+        self.bt_llm_advisory.init_strategy(self)
+
+    def next(self):
+        advise = self.bt_llm_advisory.get_advisory().advise
+        if advise.signal == "buy" and not self.position:
+            self.buy()
+        elif advise.signal in ("sell", "close") and self.position:
+            self.close()
+
+
+def create_cerebro(seed: int) -> bt.Cerebro:
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(SyntheticData(bars=BARS, seed=seed), name=f"SYN{seed}")
+    cerebro.addstrategy(TradingStrategy)
+    return cerebro
+
+
+def get_result(strategies: list[bt.Strategy]) -> tuple[float, int]:
+    strategy = strategies[0]
+    return strategy.broker.getvalue(), strategy.local_model.calls
+
+
+def test_parallel_backtests_equal_sequential_backtests():
+    params = [{"seed": seed} for seed in range(4)]
+    results = run_parallel_backtests(
+        create_cerebro, params, get_result=get_result, max_workers=2
+    )
+    assert results == [
+        run_backtest(create_cerebro, backtest_params, get_result)
+        for backtest_params in params
+    ]
+    # every backtest uses its own advisory
+    assert all(calls == 2 * BARS for _, calls in results)
+    assert len({value for value, _ in results}) > 1
@@ -0,0 +1,59 @@
+import pytest
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors.bt_persona_panel_advisor import (
+    BacktraderPersonaPanelAdvisor,
+)
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.pydantic_models import (
+    BacktraderPersonaPanelSignal,
+    BacktraderPersonaSignal,
+)
+
+from conftest import run_advisory
+
+BARS = 10
+PERSONAS = [
+    ("Aggressive", "aggressive trader"),
+    ("Cautious", "risk averse trader"),
+    ("Contrarian", "contrarian trader"),
+]
+
+
+@pytest.mark.parametrize("use_asyncio", [False, True])
+def test_panel_requests_all_personas_at_once(use_asyncio):
+    local_model = BacktraderLocalModel()
+    bt_llm_advisory = BacktraderLLMAdvisory(
+        advisors=[BacktraderPersonaPanelAdvisor(PERSONAS)],
+        local_model=local_model,
+    )
+    strategy = run_advisory(bt_llm_advisory, BARS, use_asyncio=use_asyncio)
+    # one request for the panel and one for the advisory advisor per bar
+    assert local_model.calls == 2 * BARS
+    for response in strategy.responses:
+        signals = response.state.signals
+        assert all(signals[name] is not None for name, _ in PERSONAS)
+        assert "BacktraderPersonaPanelAdvisor" not in signals
+        assert response.advise is not None
+
+
+def test_panel_reports_signals_of_its_personas():
+    panel = BacktraderPersonaPanelAdvisor(PERSONAS[:2])
+    signal = BacktraderPersonaPanelSignal(
+        signal="bullish",
+        confidence=0.8,
+        reasoning="panel",
+        personas=[
+            BacktraderPersonaSignal(
+                persona=name, signal="bearish", confidence=0.5, reasoning=name
+            )
+            for name in ("Aggressive", "Unknown")
+        ],
+    )
+    signals = panel.get_state_signals(signal)
+    # unknown personas are dropped, missing personas are not reported
+    assert list(signals) == ["Aggressive"]
+    assert signals["Aggressive"].signal == "bearish"
+    stale_signal = panel.get_stale_signal(signal, 0.5)
+    assert stale_signal.confidence == pytest.approx(0.4)
+    assert stale_signal.personas[0].confidence == pytest.approx(0.25)
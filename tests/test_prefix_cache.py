@@ -0,0 +1,91 @@
+import backtrader as bt
+
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+from llm_advisory.pydantic_models import LLMAdvisorDataArtefact
+
+from bt_llm_advisory import BacktraderLLMAdvisor, BacktraderLLMAdvisory
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_prefix_cache import (
+    PREFIX_BOUNDARY_MARKER,
+    BacktraderPrefixCacheSimulator,
+    BacktraderPrefixLayout,
+)
+
+from synthetic import create_cerebro
+
+
+def create_artefacts(price: float) -> list[LLMAdvisorDataArtefact]:
+    return [
+        LLMAdvisorDataArtefact(description="Price", artefact=price),
+        LLMAdvisorDataArtefact(description="Strategy", artefact="Test strategy"),
+        LLMAdvisorDataArtefact(description="Positions", artefact={"SYN0": 0}),
+    ]
+
+
+def test_prefix_layout_places_stable_artefacts_first():
+    layout = BacktraderPrefixLayout(boundary_marker=PREFIX_BOUNDARY_MARKER)
+    # without a change all artefacts are stable
+    assert layout.compile(create_artefacts(1.0), compile_data_artefacts) == (
+        compile_data_artefacts(create_artefacts(1.0))
+    )
+    artefacts = create_artefacts(2.0)
+    assert layout.compile(artefacts, compile_data_artefacts) == "\n\n".join(
+        [
+            compile_data_artefacts(artefacts[1:]),
+            PREFIX_BOUNDARY_MARKER,
+            compile_data_artefacts(artefacts[:1]),
+        ]
+    )
+    # changed artefacts stay in the changing part
+    stable, changing = layout.split(create_artefacts(2.0))
+    assert [artefact.description for artefact in changing] == ["Price"]
+
+
+def test_prefix_cache_simulator():
+    simulator = BacktraderPrefixCacheSimulator(block_size=4, min_prefix=8, max_blocks=4)
+    assert simulator.record("First", "aaaabbbbcccc") == 0
+    assert simulator.record("Second", "aaaabbbbdddd") == 8
+    # shorter prefixes than min_prefix are not cached
+    assert simulator.record("Second", "aaaaeeee") == 0
+    # the least recently used blocks were evicted
+    assert simulator.record("First", "aaaabbbbcccc") == 8
+    stats = simulator.get_stats("Second")
+    assert stats["requests"] == 2
+    assert stats["hit_ratio"] == 8 / 20
+
+
+class ReversedAdvisor(BacktraderLLMAdvisor):
+    """Advisor sending the data feed before the strategy description"""
+
+    def get_advisor_data(self, snapshot):
+        return list(reversed(snapshot.get_default_strategy_data()))
+
+
+class LayoutStrategy(bt.Strategy):
+    params = (("prefix_layout", False), ("simulator", None))
+
+    def __init__(self):
+        advisor = ReversedAdvisor()
+        if self.p.prefix_layout:
+            advisor.prefix_layout = BacktraderPrefixLayout()
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[advisor],
+            local_model=BacktraderLocalModel(),
+            prefix_cache_simulator=self.p.simulator,
+        )
+        self.bt_llm_advisory.init_strategy(self)
+
+    def next(self):
+        self.bt_llm_advisory.get_advisory()
+
+
+def get_hit_ratio(prefix_layout: bool) -> float:
+    simulator = BacktraderPrefixCacheSimulator(block_size=64, min_prefix=256)
+    create_cerebro(
+        LayoutStrategy, 1, 50, prefix_layout=prefix_layout, simulator=simulator
+    ).run()
+    return simulator.get_stats("ReversedAdvisor")["hit_ratio"]
+
+
+def test_prefix_layout_increases_cached_prefix():
+    assert get_hit_ratio(True) > get_hit_ratio(False) + 0.1
@@ -0,0 +1,51 @@
+import backtrader as bt
+
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+from bt_llm_advisory.helper import bt_prompt_builder
+from bt_llm_advisory.helper.bt_prompt_builder import BacktraderPromptBuilder
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+from synthetic import SyntheticData
+
+LOOKBACK = 10
+BARS = 100
+
+
+class BuilderStrategy(bt.Strategy):
+    def __init__(self):
+        bt.ind.SMA(self.datas[0], period=5)
+        bt.ind.RSI(self.datas[1], period=5)
+        self.prompt_builder = BacktraderPromptBuilder()
+        self.compiled = 0
+        self.differing = 0
+
+    def next(self):
+        artefacts = BacktraderStrategySnapshot(
+            self, LOOKBACK, LOOKBACK
+        ).get_default_strategy_data()
+        self.compiled += 1
+        self.differing += self.prompt_builder.compile(
+            artefacts
+        ) != compile_data_artefacts(artefacts)
+
+
+def test_prompt_builder_equals_compiled_artefacts(monkeypatch):
+    compiled = []
+
+    def compile_artefacts(artefacts):
+        compiled.extend(artefact.description for artefact in artefacts)
+        return compile_data_artefacts(artefacts)
+
+    monkeypatch.setattr(bt_prompt_builder, "compile_data_artefacts", compile_artefacts)
+    cerebro = bt.Cerebro(stdstats=False)
+    data = SyntheticData(bars=BARS, timeframe=bt.TimeFrame.Minutes)
+    cerebro.adddata(data, name="SYN0")
+    cerebro.resampledata(data, timeframe=bt.TimeFrame.Minutes, compression=5)
+    cerebro.addstrategy(BuilderStrategy)
+    strategy = cerebro.run()[0]
+    assert strategy.compiled > 50
+    assert strategy.differing == 0
+    # the table of the resampled data feed is reused until it has a new bar
+    assert compiled.count("DataFeed SYN0[5 Minutes]") <= strategy.compiled / 5 + 1
+    assert compiled.count("Strategy") == 1
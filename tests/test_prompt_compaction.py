@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from llm_advisory.pydantic_models import (
+    LLMAdvisorDataArtefact,
+    LLMAdvisorDataArtefactOutputMode,
+)
+from llm_advisory.helper.llm_prompt import compile_data_artefacts
+
+from bt_llm_advisory.helper.bt_metrics import estimate_tokens
+from bt_llm_advisory.helper.bt_prompt_compaction import BacktraderPromptCompactor
+
+
+def create_table(name: str, rows: int) -> LLMAdvisorDataArtefact:
+    start = datetime(2024, 1, 1)
+    return LLMAdvisorDataArtefact(
+        description=f"Indicator {name}",
+        artefact=[
+            {
+                "datetime": start - timedelta(minutes=i),
+                f"{name}.value": 100.0 + i / 3,
+            }
+            for i in range(rows)
+        ],
+        output_mode=LLMAdvisorDataArtefactOutputMode.MARKDOWN_TABLE,
+    )
+
+
+def create_artefacts(rows: int) -> list[LLMAdvisorDataArtefact]:
+    return [
+        LLMAdvisorDataArtefact(description="Strategy", artefact="Test strategy"),
+        create_table("SMA", rows),
+        create_table("RSI", rows),
+    ]
+
+
+class CountingTokenCounter:
+    """Token counter counting how often the strategy description is counted"""
+
+    def __init__(self):
+        self.strategy_counted = 0
+
+    def __call__(self, text: str) -> int:
+        self.strategy_counted += "Test strategy" in text
+        return estimate_tokens(text)
+
+
+def test_data_within_budget_is_unchanged():
+    artefacts = create_artefacts(10)
+    compactor = BacktraderPromptCompactor(max_tokens=100000)
+    assert compactor.compact(artefacts) is artefacts
+
+
+def test_compacted_data_fits_budget():
+    artefacts = create_artefacts(500)
+    compactor = BacktraderPromptCompactor(max_tokens=1000, keep_recent=10)
+    compacted = compactor.compact(artefacts)
+    assert estimate_tokens(compile_data_artefacts(compacted)) <= 1000
+    # tables are merged and the most recent rows are kept
+    tables = [artefact for artefact in compacted if artefact.description != "Strategy"]
+    assert len(tables) == 1
+    assert list(tables[0].artefact[0].keys()) == ["datetime", "SMA.value", "RSI.value"]
+    assert [record["datetime"] for record in tables[0].artefact[:10]] == [
+        record["datetime"] for record in artefacts[1].artefact[:10]
+    ]
+
+
+def test_compaction_counts_parts_once():
+    artefacts = create_artefacts(2000)
+    token_counter = CountingTokenCounter()
+    compactor = BacktraderPromptCompactor(max_tokens=500, token_counter=token_counter)
+    compactor.compact(artefacts)
+    # counted with the full data, once for all compaction steps and with the
+    # compacted data
+    assert token_counter.strategy_counted == 3
+
+
+def test_data_without_tables_above_budget():
+    artefacts = [
+        LLMAdvisorDataArtefact(description="Strategy", artefact="x" * 1000),
+        create_table("SMA", 0),
+    ]
+    compactor = BacktraderPromptCompactor(max_tokens=10)
+    assert compactor.compact(artefacts) == artefacts
+
+
+
+def test_compacted_data_fits_budget_close_to_estimate():
+    artefacts = create_artefacts(500)
+    # counted per char, the estimate used while compacting misses the line
+    # breaks of the compiled data, so candidates just within the estimated
+    # budget are too large
+    for max_tokens in range(3000, 3200, 5):
+        compactor = BacktraderPromptCompactor(
+            max_tokens=max_tokens, token_counter=len
+        )
+        compacted = compactor.compact(artefacts)
+        assert len(compile_data_artefacts(compacted)) <= max_tokens
@@ -0,0 +1,41 @@
+import pickle
+from datetime import datetime
+
+import numpy as np
+
+from bt_llm_advisory.pydantic_models import BacktraderIndicatorData
+
+
+def create_indicator_data() -> BacktraderIndicatorData:
+    return BacktraderIndicatorData(
+        name="SMA",
+        columns={
+            "datetime": np.array(
+                ["2024-01-01T00:01", "2024-01-01T00:02"], dtype="datetime64[us]"
+            ),
+            "SMA.sma": np.array([np.nan, 1.5]),
+        },
+    )
+
+
+def test_columnar_data_creates_records_lazily():
+    indicator_data = create_indicator_data()
+    assert len(indicator_data) == 2
+    assert "data" not in indicator_data.__dict__
+    records = indicator_data.data
+    assert records[0] == {"datetime": datetime(2024, 1, 1, 0, 2), "SMA.sma": 1.5}
+    assert records[1]["datetime"] == datetime(2024, 1, 1, 0, 1)
+    assert np.isnan(records[1]["SMA.sma"])
+    assert indicator_data.data is records
+    assert indicator_data.model_dump() == {"name": "SMA", "data": records}
+
+
+def test_columnar_data_is_pickled_without_records():
+    indicator_data = create_indicator_data()
+    records = indicator_data.data
+    unpickled = pickle.loads(pickle.dumps(indicator_data))
+    assert "data" not in unpickled.__dict__
+    np.testing.assert_array_equal(
+        unpickled.get_column("SMA.sma"), indicator_data.get_column("SMA.sma")
+    )
+    assert unpickled.data[0] == records[0]
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from llm_advisory.pydantic_models import LLMAdvisorUpdateStateData
+
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_rate_limit import BacktraderRateLimiter
+
+
+async def call(rate_limiter: BacktraderRateLimiter, calls: list[float]) -> None:
+    async with rate_limiter:
+        calls.append(time.monotonic())
+
+
+def test_rate_limiter_limits_requests_per_second():
+    rate_limiter = BacktraderRateLimiter(requests_per_second=20)
+    calls = []
+
+    async def run():
+        await asyncio.gather(*(call(rate_limiter, calls) for _ in range(5)))
+
+    asyncio.run(run())
+    assert calls[-1] - calls[0] >= 4 / 20 * 0.9
+
+
+def test_rate_limiter_limits_concurrency():
+    rate_limiter = BacktraderRateLimiter(max_concurrency=2)
+    running = []
+    peak = []
+
+    async def limited_call():
+        async with rate_limiter:
+            running.append(None)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+    async def run():
+        await asyncio.gather(*(limited_call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert max(peak) == 2
+
+
+def test_rate_limiter_releases_permit_when_cancelled():
+    rate_limiter = BacktraderRateLimiter(max_concurrency=1, requests_per_second=1)
+    calls = []
+
+    async def run():
+        await call(rate_limiter, calls)
+        # waits for its rate slot while holding the only permit
+        waiting = asyncio.ensure_future(call(rate_limiter, calls))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        await asyncio.wait_for(call(rate_limiter, calls), 3)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+class BlockingProvider:
+    """Model provider stand-in blocking in the executor until released"""
+
+    def __init__(self):
+        self.model = BacktraderLocalModel()
+        self.released = threading.Event()
+        self.started = 0
+
+    def get_signal(self, advisor):
+        self.started += 1
+        self.released.wait(3)
+        return self.model.get_signal(advisor)
+
+
+def test_rate_limiter_holds_permit_until_cancelled_call_ends():
+    rate_limiter = BacktraderRateLimiter(max_concurrency=1)
+    provider = BlockingProvider()
+    advisor = BacktraderPersonaAdvisor("Persona", "persona")
+    executor = ThreadPoolExecutor(max_workers=2)
+    state = LLMAdvisorUpdateStateData(
+        metadata={
+            "local_model": provider,
+            "model_provider_name": "provider",
+            "model_executor": executor,
+            "rate_limits": {"provider": rate_limiter},
+        }
+    )
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(advisor._ainvoke_model(state), 0.05)
+        # the cancelled call still runs in the executor and holds the permit
+        second = asyncio.ensure_future(advisor._ainvoke_model(state))
+        await asyncio.sleep(0.05)
+        started = provider.started
+        provider.released.set()
+        await asyncio.wait_for(second, 3)
+        return started
+
+    try:
+        assert asyncio.run(run()) == 1
+        assert provider.model.calls == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,58 @@
+import pickle
+import sqlite3
+
+from bt_llm_advisory.helper.bt_response_cache import BacktraderResponseCache
+
+
+def test_response_cache_hit_and_miss(tmp_path):
+    response_cache = BacktraderResponseCache(str(tmp_path / "cache.sqlite"))
+    key = response_cache.get_key("model", "advisor", "prompt")
+    assert response_cache.get(key) is None
+    response_cache.set(key, '{"signal": "bullish"}')
+    assert response_cache.get(key) == '{"signal": "bullish"}'
+    assert key != response_cache.get_key("model", "advisor", "other prompt")
+    stats = response_cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    # responses are shared by all instances using the same path
+    reopened = pickle.loads(pickle.dumps(response_cache))
+    assert reopened.get(key) == '{"signal": "bullish"}'
+
+
+def test_response_cache_keeps_total_size(tmp_path):
+    response_cache = BacktraderResponseCache(str(tmp_path / "cache.sqlite"))
+    response_cache.set("a", "x" * 10)
+    response_cache.set("b", "x" * 20)
+    response_cache.set("a", "x" * 5)
+    assert response_cache.get_stats()["size"] == 25
+    response_cache.clear()
+    assert response_cache.get_stats()["size"] == 0
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    response_cache = BacktraderResponseCache(
+        str(tmp_path / "cache.sqlite"), max_size=30
+    )
+    for key in ("a", "b", "c"):
+        response_cache.set(key, "x" * 10)
+    assert response_cache.get("a") is not None
+    response_cache.set("d", "x" * 10)
+    assert response_cache.get("b") is None
+    assert all(response_cache.get(key) is not None for key in ("a", "c", "d"))
+    response_cache.set("e", "x" * 25)
+    assert [key for key in "acde" if response_cache.get(key) is not None] == ["e"]
+    assert response_cache.get_stats()["size"] == 25
+
+
+def test_response_cache_sums_size_of_existing_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute(
+            "CREATE TABLE responses (key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        connection.execute("INSERT INTO responses VALUES ('a', 'xxxx', 4, 0)")
+    connection.close()
+    response_cache = BacktraderResponseCache(path)
+    assert response_cache.get_stats()["size"] == 4
+    assert response_cache.get("a") == "xxxx"
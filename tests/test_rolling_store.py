@@ -0,0 +1,69 @@
+import backtrader as bt
+import pytest
+
+from bt_llm_advisory.helper.bt_data_generation import (
+    generate_data_feed_data,
+    generate_indicator_data,
+)
+from bt_llm_advisory.helper.bt_rolling_store import BacktraderRollingStore
+
+from conftest import columns_equal
+from synthetic import SyntheticData, create_cerebro
+
+LOOKBACK = 20
+
+
+class RollingStoreStrategy(bt.Strategy):
+    params = (("every", 1),)
+
+    def __init__(self):
+        self.rsi = bt.ind.RSI(self.data, period=5)
+        self.rolling_store = BacktraderRollingStore(LOOKBACK)
+        self.compared = 0
+        self.differing = 0
+
+    def next(self):
+        if len(self) % self.p.every:
+            return
+        for data, expected in (
+            (
+                generate_data_feed_data(
+                    self.data, LOOKBACK, rolling_store=self.rolling_store
+                ),
+                generate_data_feed_data(self.data, LOOKBACK),
+            ),
+            (
+                generate_indicator_data(
+                    self.rsi, LOOKBACK, rolling_store=self.rolling_store
+                ),
+                generate_indicator_data(self.rsi, LOOKBACK),
+            ),
+        ):
+            self.compared += 1
+            self.differing += not columns_equal(data, expected)
+
+
+def run_replayed(every: int) -> RollingStoreStrategy:
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.replaydata(
+        SyntheticData(bars=300, timeframe=bt.TimeFrame.Minutes),
+        timeframe=bt.TimeFrame.Minutes,
+        compression=5,
+    )
+    cerebro.addstrategy(RollingStoreStrategy, every=every)
+    return cerebro.run()[0]
+
+
+@pytest.mark.parametrize("every", [1, 3, 7])
+def test_rolling_store_matches_replayed_data_feed(every):
+    strategy = run_replayed(every)
+    assert strategy.compared > 0
+    assert strategy.differing == 0
+
+
+@pytest.mark.parametrize("every", [1, 2, 50])
+def test_rolling_store_matches_data_feed(every):
+    cerebro = create_cerebro(RollingStoreStrategy, 1, 200, every=every)
+    strategy = cerebro.run()[0]
+    assert strategy.compared > 0
+    assert strategy.differing == 0
@@ -0,0 +1,84 @@
+import backtrader as bt
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_scheduler import (
+    EveryNBars,
+    OnNotification,
+    OnThresholdCross,
+    is_schedule_due,
+)
+
+from conftest import CountingModel, run_advisory
+from synthetic import create_cerebro
+
+
+class ScheduledStrategy(bt.Strategy):
+    def __init__(self):
+        self.scheduled = BacktraderPersonaAdvisor("Scheduled", "scheduled persona")
+        self.scheduled.schedule = [EveryNBars(5)]
+        self.always = BacktraderPersonaAdvisor("Always", "persona")
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[self.scheduled, self.always]
+        )
+        self.bt_llm_advisory.init_strategy(self)
+        self.due = {"Scheduled": 0, "Always": 0}
+
+    def next(self):
+        snapshot = self.bt_llm_advisory.get_snapshot()
+        for advisor in (self.scheduled, self.always):
+            self.due[advisor.advisor_name] += snapshot.is_advisor_due(advisor)
+
+
+def test_advisor_is_due_on_scheduled_bars():
+    strategy = create_cerebro(ScheduledStrategy, 1, 50).run()[0]
+    assert strategy.due == {"Scheduled": 10, "Always": 50}
+
+
+def create_advisory(local_model: CountingModel) -> BacktraderLLMAdvisory:
+    """Returns an advisory with a scheduled and an unscheduled advisor"""
+    scheduled = BacktraderPersonaAdvisor("Scheduled", "scheduled persona")
+    scheduled.schedule = [EveryNBars(5)]
+    return BacktraderLLMAdvisory(
+        advisors=[scheduled, BacktraderPersonaAdvisor("Always", "persona")],
+        local_model=local_model,
+    )
+
+
+def test_advisor_runs_on_scheduled_bars():
+    local_model = CountingModel()
+    strategy = run_advisory(create_advisory(local_model), 50)
+    assert local_model.advisor_calls["Scheduled"] == 10
+    assert local_model.advisor_calls["Always"] == 50
+    # the last signal is reused between scheduled bars
+    signals = strategy.get_signals("Scheduled")
+    for i in range(0, 50, 5):
+        assert all(signal is signals[i] for signal in signals[i : i + 5])
+
+
+def test_reused_advisory_resets_schedule():
+    local_model = CountingModel()
+    bt_llm_advisory = create_advisory(local_model)
+    for _ in range(2):
+        run_advisory(bt_llm_advisory, 50)
+    assert local_model.advisor_calls["Scheduled"] == 20
+
+
+def test_triggers():
+    line = [0.0]
+    trigger = OnThresholdCross(line, 50.0, direction="up")
+    due = []
+    for value in (40.0, 55.0, 60.0, 45.0, 51.0):
+        line[0] = value
+        due.append(trigger.is_due(None, {}))
+    assert due == [False, True, False, False, True]
+    trigger.reset()
+    assert not trigger.is_due(None, {})
+    trigger = OnNotification("order")
+    assert not trigger.is_due(None, {"order": 0, "trade": 1})
+    assert trigger.is_due(None, {"order": 1, "trade": 1})
+    assert not trigger.is_due(None, {"order": 1, "trade": 2})
+    trigger.reset()
+    assert trigger.is_due(None, {"order": 1, "trade": 2})
+    # without a schedule the advisor runs on every bar
+    assert is_schedule_due(None, None, {})
@@ -0,0 +1,54 @@
+import backtrader as bt
+import pytest
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_session import BacktraderAdvisorySession
+
+from conftest import AdvisoryStrategy
+from synthetic import SyntheticData
+
+BARS = 20
+
+
+def run_session(session, seed: int = 0) -> tuple[list, BacktraderLocalModel]:
+    """Returns the signals of a backtest with a session and the local model"""
+    local_model = BacktraderLocalModel()
+    bt_llm_advisory = BacktraderLLMAdvisory(
+        advisors=[BacktraderPersonaAdvisor("Persona", "persona")],
+        local_model=local_model,
+        session=session,
+    )
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(SyntheticData(bars=BARS, seed=seed), name="SYN0")
+    cerebro.addstrategy(AdvisoryStrategy, bt_llm_advisory=bt_llm_advisory)
+    signals = [
+        {name: signal.model_dump() for name, signal in response.state.signals.items()}
+        for response in cerebro.run()[0].responses
+    ]
+    return signals, local_model
+
+
+def test_replayed_session_returns_recorded_signals(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    recorded, local_model = run_session(BacktraderAdvisorySession(path))
+    assert local_model.calls == 2 * BARS
+    session = BacktraderAdvisorySession(path, replay=True)
+    replayed, local_model = run_session(session)
+    assert local_model.calls == 0
+    assert replayed == recorded
+    assert session.divergences == []
+
+
+def test_replayed_session_reports_divergences(tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    run_session(BacktraderAdvisorySession(path))
+    session = BacktraderAdvisorySession(path, replay=True)
+    # other data changes the input of the advisors on every bar
+    run_session(session, seed=1)
+    assert {divergence["bar"] for divergence in session.divergences} == set(
+        range(1, BARS + 1)
+    )
+    with pytest.raises(ValueError):
+        run_session(BacktraderAdvisorySession(path, replay=True, strict=True), seed=1)
@@ -0,0 +1,70 @@
+import backtrader as bt
+
+from bt_llm_advisory import BacktraderLLMAdvisor
+from bt_llm_advisory.helper.bt_data_generation import (
+    generate_data_feed_data,
+    generate_indicator_data,
+)
+from bt_llm_advisory.helper.bt_snapshot import BacktraderStrategySnapshot
+
+from conftest import columns_equal
+from synthetic import create_cerebro
+
+
+class CountingAdvisor(BacktraderLLMAdvisor):
+    """Advisor counting how often its data is generated"""
+
+    def __init__(self):
+        super().__init__()
+        self.generated = 0
+
+    def get_advisor_data(self, snapshot):
+        self.generated += 1
+        return super().get_advisor_data(snapshot)
+
+
+class SnapshotStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = bt.ind.SMA(self.data, period=5)
+        self.advisors = [CountingAdvisor(), CountingAdvisor()]
+        self.advisors[1].advisor_name = "CountingAdvisor2"
+        self.results = []
+
+    def next(self):
+        snapshot = BacktraderStrategySnapshot(self, 10, 5)
+        first = snapshot.get_default_strategy_data()
+        self.results.append(
+            {
+                "same_object": first is snapshot.get_default_strategy_data(),
+                "data_feed": columns_equal(
+                    snapshot.get_data_feed_data(self.data),
+                    generate_data_feed_data(self.data, 10),
+                ),
+                "indicator": columns_equal(
+                    snapshot.get_indicator_data(self.sma),
+                    generate_indicator_data(self.sma, 5),
+                ),
+            }
+        )
+        for advisor in self.advisors:
+            snapshot.get_advisor_data(advisor)
+            snapshot.get_advisor_data(advisor)
+
+
+def run_strategy(bars: int = 30) -> SnapshotStrategy:
+    return create_cerebro(SnapshotStrategy, num_data_feeds=1, bars=bars).run()[0]
+
+
+def test_snapshot_data_matches_generated_data():
+    strategy = run_strategy()
+    assert strategy.results
+    for result in strategy.results:
+        assert result == {"same_object": True, "data_feed": True, "indicator": True}
+
+
+def test_advisor_data_generated_once_per_snapshot():
+    strategy = run_strategy()
+    bars = len(strategy.results)
+    assert [advisor.generated for advisor in strategy.advisors] == [bars, bars]
+
+
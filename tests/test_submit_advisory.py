@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import backtrader as bt
+import pytest
+
+from bt_llm_advisory import BacktraderLLMAdvisory
+from bt_llm_advisory.advisors import BacktraderPersonaAdvisor
+from bt_llm_advisory.helper.bt_local_model import BacktraderLocalModel
+from bt_llm_advisory.helper.bt_snapshot import get_snapshot_key
+
+from synthetic import create_cerebro
+
+SUBMIT_BAR = 5
+
+
+class BlockingModel(BacktraderLocalModel):
+    """Local model blocking submitted advisories until they are released"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def get_signal(self, advisor):
+        if threading.current_thread().name == "bt_llm_advisory_0":
+            self.released.wait()
+        return super().get_signal(advisor)
+
+
+class SubmittingStrategy(bt.Strategy):
+    def __init__(self):
+        self.local_model = BlockingModel()
+        self.bt_llm_advisory = BacktraderLLMAdvisory(
+            advisors=[BacktraderPersonaAdvisor("Persona", "persona")],
+            local_model=self.local_model,
+        )
+        self.bt_llm_advisory.init_strategy(self)
+        self.snapshot_keys = {}
+
+    def next(self):
+        self.snapshot_keys[len(self)] = get_snapshot_key(self)
+        if len(self) == SUBMIT_BAR:
+            self.handle = self.bt_llm_advisory.submit_advisory()
+        elif len(self) == SUBMIT_BAR + 1:
+            try:
+                self.pending = self.bt_llm_advisory.has_pending_advisories()
+                with pytest.raises(RuntimeError):
+                    self.bt_llm_advisory.get_advisory()
+                with pytest.raises(RuntimeError):
+                    self.bt_llm_advisory.get_advisory(deadline=1.0)
+                with pytest.raises(RuntimeError):
+                    asyncio.run(self.bt_llm_advisory.aget_advisory())
+            finally:
+                self.local_model.released.set()
+            self.handle_response = self.handle.result()
+            self.response = self.bt_llm_advisory.get_advisory()
+
+    def stop(self):
+        self.bt_llm_advisory.stop()
+
+
+def test_pending_advisories_keep_their_snapshot():
+    strategy = create_cerebro(SubmittingStrategy, 1, 10).run()[0]
+    assert strategy.pending
+    assert strategy.handle.bar == SUBMIT_BAR
+    handle_snapshot = strategy.handle_response.state.metadata["snapshot"]
+    assert handle_snapshot.key == strategy.snapshot_keys[SUBMIT_BAR]
+    snapshot = strategy.response.state.metadata["snapshot"]
+    assert snapshot.key == strategy.snapshot_keys[SUBMIT_BAR + 1]
+    assert "Persona" in strategy.handle_response.state.signals